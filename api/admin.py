@@ -18,15 +18,27 @@ class PreguntaAdmin(admin.ModelAdmin):
     list_display = ['id', 'nivel', 'explanation', 'pregunta', 'respuesta', 'estado', 'registro']
 
 class ProgresoAdmin(admin.ModelAdmin):
-    list_display = ['id', 'usuario', 'lenguaje', 'progresoLenguaje', 'puntos', 'nivelesCompletados', 'registro']
+    list_display = ['id', 'usuario', 'lenguaje', 'progresoLenguaje', 'puntos', 'registro']
+
+class NivelCompletadoAdmin(admin.ModelAdmin):
+    list_display = ['id', 'usuario', 'nivel', 'puntos', 'completado']
+
+class PuntajeAdmin(admin.ModelAdmin):
+    list_display = ['usuario', 'puntos', 'actualizado']
 
 class ContactarAdmin(admin.ModelAdmin):
     list_display = ['id', 'nombre', 'celular', 'correo', 'mensaje', 'registro']
 
+class CorreoAdmin(admin.ModelAdmin):
+    list_display = ['id', 'asunto', 'destinatarios', 'estado', 'intentos', 'proximoIntento', 'registro']
+
 admin.site.register(FotoPredeterminada, FotoPredeterminadaAdmin)
 admin.site.register(Usuario, UsuarioAdmin)
 admin.site.register(Lenguaje, LenguajeAdmin)
 admin.site.register(Nivel, NivelAdmin)
 admin.site.register(Pregunta, PreguntaAdmin)
 admin.site.register(Progreso, ProgresoAdmin)
-admin.site.register(Contactar, ContactarAdmin)
\ No newline at end of file
+admin.site.register(NivelCompletado, NivelCompletadoAdmin)
+admin.site.register(Puntaje, PuntajeAdmin)
+admin.site.register(Contactar, ContactarAdmin)
+admin.site.register(Correo, CorreoAdmin)
\ No newline at end of file
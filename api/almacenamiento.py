@@ -0,0 +1,27 @@
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+import hashlib, os
+
+# Los derivados ya se nombran a partir de un original direccionado por contenido
+SIN_DIRECCIONAR = ('derivados/',)
+
+class AlmacenamientoContenido(FileSystemStorage):
+    # Nombra cada archivo por el SHA-256 de su contenido: subidas idénticas comparten un solo archivo
+    # y una URL nunca cambia de contenido, por lo que puede guardarse en caché indefinidamente.
+    def save(self, name, content, max_length = None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        name = name.replace('\\', '/')
+        if name.startswith(SIN_DIRECCIONAR):
+            return super().save(name, content, max_length)
+        resumen = hashlib.sha256()
+        for bloque in content.chunks():
+            resumen.update(bloque)
+        content.seek(0)
+        carpeta, archivo = os.path.split(name)
+        nombre = f'{carpeta}/{resumen.hexdigest()}{os.path.splitext(archivo)[1].lower()}'.lstrip('/')
+        if self.exists(nombre):
+            return nombre
+        return super().save(nombre, content, max_length)
@@ -0,0 +1,55 @@
+from .models import Usuario
+from django.conf import settings
+from django.utils.functional import cached_property
+from rest_framework import permissions
+from rest_framework_simplejwt import exceptions, serializers, tokens
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings as ajustesJwt
+import hmac
+
+class UsuarioToken(TokenUser):
+    # Usuario de la petición construido con los claims ya validados por JWTStatelessUserAuthentication.
+    # La fila de Usuario solo se consulta si la vista la necesita, y como máximo una vez.
+    @cached_property
+    def usuario(self):
+        return Usuario.objects.get(id = self.id)
+
+    @cached_property
+    def administrador(self):
+        return bool(self.token.get('administrador', False))
+
+def generarToken(usuario):
+    token = tokens.RefreshToken.for_user(usuario)
+    token['administrador'] = usuario.administrador
+    return token
+
+class RefrescoSerializer(serializers.TokenRefreshSerializer):
+    # El acceso se autentica solo con los claims: un usuario desactivado conserva su token de acceso
+    # hasta que vence (ACCESS_TOKEN_LIFETIME). Al refrescar sí se consulta la fila, para no emitir
+    # tokens nuevos a cuentas desactivadas y para que el claim administrador refleje la base de datos.
+    def validate(self, attrs):
+        refresco = self.token_class(attrs['refresh'])
+        administrador = Usuario.objects.filter(id = refresco.payload.get('user_id'), estado = True).values_list('administrador', flat = True).first()
+        if administrador is None:
+            raise exceptions.InvalidToken('La cuenta del token no está activa')
+        # Igual que TokenRefreshSerializer.validate, con el claim administrador tomado de la fila
+        if ajustesJwt.ROTATE_REFRESH_TOKENS and ajustesJwt.BLACKLIST_AFTER_ROTATION:
+            refresco.blacklist()
+        refresco['administrador'] = administrador
+        datos = {'access': str(refresco.access_token)}
+        if ajustesJwt.ROTATE_REFRESH_TOKENS:
+            refresco.set_jti()
+            refresco.set_exp()
+            refresco.set_iat()
+            datos['refresh'] = str(refresco)
+        return datos
+
+class EsAdministrador(permissions.BasePermission):
+    def has_permission(self, request, view):
+        return bool(request.user and request.user.is_authenticated and getattr(request.user, 'administrador', False))
+
+class EsRecolectorMetricas(permissions.BasePermission):
+    # Prometheus envía METRICAS_TOKEN como bearer_token; sin token configurado el endpoint queda cerrado
+    def has_permission(self, request, view):
+        token = getattr(settings, 'METRICAS_TOKEN', '')
+        return bool(token) and hmac.compare_digest(request.META.get('HTTP_AUTHORIZATION', ''), f'Bearer {token}')
@@ -0,0 +1,37 @@
+from .models import Lenguaje
+from .serializers import CartaSerializer
+from . import enrutador, metricas
+from django.core.cache import cache
+from rest_framework.renderers import JSONRenderer
+import hashlib, time
+
+CLAVE_VERSION = 'catalogo:version'
+
+def version():
+    # La versión inicial usa el reloj para no reutilizar cuerpos viejos si la caché pierde la clave
+    return cache.get_or_set(CLAVE_VERSION, time.time_ns(), timeout = None)
+
+def invalidar():
+    try:
+        cache.incr(CLAVE_VERSION)
+    except ValueError:
+        cache.set(CLAVE_VERSION, time.time_ns(), timeout = None)
+
+def obtener():
+    clave = f'catalogo:{version()}'
+    entrada = cache.get(clave)
+    metricas.cache('catalogo', entrada is not None)
+    if entrada is None:
+        # Se lee de la primaria: el cuerpo queda en caché sin expiración bajo la versión que invalidar()
+        # acaba de subir, y una réplica atrasada guardaría el catálogo anterior con la versión nueva
+        with enrutador.primaria():
+            serializer = CartaSerializer(Lenguaje.objects.filter(estado = True).prefetch_related('nivel_set'), many = True)
+            cuerpo = JSONRenderer().render({
+                'estado': 200,
+                'validar': True,
+                'mensaje': '¡Excelente! La información ha sido procesada exitosamente',
+                'dato': serializer.data
+            })
+        entrada = (f'"{hashlib.sha256(cuerpo).hexdigest()[:32]}"', cuerpo)
+        cache.set(clave, entrada, timeout = None)
+    return entrada
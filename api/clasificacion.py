@@ -0,0 +1,33 @@
+from .models import Puntaje
+from django.db.models import F, Q
+from django.utils import timezone
+
+POR_PAGINA = 50
+
+# Orden del ranking, respaldado por el índice puntaje_ranking_idx
+ORDEN = ('-puntos', 'actualizado', 'usuario_id')
+
+def sumarPuntos(usuario, puntos):
+    # Actualización atómica sobre la fila del usuario, sin releer el agregado de Progreso
+    sumar = Puntaje.objects.filter(usuario_id = usuario)
+    if not sumar.update(puntos = F('puntos') + puntos, actualizado = timezone.now()):
+        # Sin fila se crea vacía (sin error si otra solicitud la creó a la vez) y se suma de nuevo,
+        # para que los puntos de ninguna de las dos solicitudes se pierdan
+        Puntaje.objects.bulk_create([Puntaje(usuario_id = usuario)], ignore_conflicts = True)
+        sumar.update(puntos = F('puntos') + puntos, actualizado = timezone.now())
+
+def pagina(numero = 1):
+    inicio = (max(numero, 1) - 1) * POR_PAGINA
+    puntajes = Puntaje.objects.select_related('usuario').only('puntos', 'actualizado', 'usuario__nombre').order_by(*ORDEN)
+    return [
+        {'puesto': puesto, 'nombre': puntaje.usuario.nombre, 'puntos': puntaje.puntos}
+        for puesto, puntaje in enumerate(puntajes[inicio:inicio + POR_PAGINA], start = inicio + 1)
+    ]
+
+def posicion(puntaje):
+    # Cuenta sobre el rango del índice que precede al usuario en el orden del ranking
+    return Puntaje.objects.filter(
+        Q(puntos__gt = puntaje.puntos) |
+        Q(puntos = puntaje.puntos, actualizado__lt = puntaje.actualizado) |
+        Q(puntos = puntaje.puntos, actualizado = puntaje.actualizado, usuario_id__lt = puntaje.usuario_id)
+    ).count() + 1
@@ -0,0 +1,39 @@
+from .models import NivelCompletado, Progreso
+from . import clasificacion
+from django.db import IntegrityError, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Least
+from django.utils import timezone
+
+def puntosGanados(nivel, intentos):
+    if nivel.totalPreguntas <= intentos:
+        return nivel.totalPreguntas
+    return (nivel.totalPreguntas - intentos) * 2 + nivel.totalPreguntas
+
+def porcentaje(terminados, totalNiveles):
+    # Un nivel completado y luego desactivado sigue contando; el tope evita pasar de 100.
+    # migrarNivelesCompletados repite este cálculo en SQL
+    return min(terminados * 100 // max(totalNiveles, 1), 100)
+
+def completar(usuario, nivel, intentos):
+    # Devuelve los puntos ganados, o None si el nivel ya estaba completado.
+    # La restricción única de NivelCompletado decide qué envío gana; Progreso y Puntaje
+    # solo cambian en la misma transacción que esa inserción.
+    puntos = puntosGanados(nivel, intentos)
+    with transaction.atomic():
+        try:
+            with transaction.atomic():
+                NivelCompletado.objects.create(usuario_id = usuario, nivel = nivel, puntos = puntos)
+        except IntegrityError:
+            return None
+        # El porcentaje sale del contador de la fila y de Lenguaje.totalNiveles, sin COUNT sobre NivelCompletado
+        actualizados = Progreso.objects.filter(usuario_id = usuario, lenguaje_id = nivel.lenguaje_id).update(
+            puntos = F('puntos') + puntos,
+            nivelesTerminados = F('nivelesTerminados') + 1,
+            progresoLenguaje = Least((F('nivelesTerminados') + 1) * 100 / max(nivel.lenguaje.totalNiveles, 1), Value(100)),
+            registro = timezone.now()
+        )
+        if not actualizados:
+            raise Progreso.DoesNotExist
+        clasificacion.sumarPuntos(usuario, puntos)
+    return puntos
@@ -0,0 +1,50 @@
+from .models import Lenguaje, Nivel, Pregunta
+from contextlib import contextmanager
+from django.db.models import Count, F
+import threading
+
+_estado = threading.local()
+
+@contextmanager
+def suspendido():
+    # Durante las operaciones masivas las señales no recuentan; se recalcula una vez al final
+    anterior = getattr(_estado, 'suspendido', False)
+    _estado.suspendido = True
+    try:
+        yield
+    finally:
+        _estado.suspendido = anterior
+
+def estaSuspendido():
+    return getattr(_estado, 'suspendido', False)
+
+def mover(modelo, campo, anterior, actual):
+    # anterior y actual son (activo, id del padre); el ajuste es un UPDATE con F() sobre la fila del padre
+    if anterior == actual:
+        return
+    if anterior[0] and anterior[1]:
+        modelo.objects.filter(id = anterior[1], **{f'{campo}__gt': 0}).update(**{campo: F(campo) - 1})
+    if actual[0] and actual[1]:
+        modelo.objects.filter(id = actual[1]).update(**{campo: F(campo) + 1})
+
+def recontar(modelo, campo, hijos, relacion, ids):
+    ids = set(ids)
+    if not ids:
+        return 0
+    totales = dict(
+        hijos.objects.filter(**{f'{relacion}_id__in': ids}, estado = True)
+        .values(relacion).annotate(total = Count('id')).values_list(relacion, 'total')
+    )
+    cambiados = []
+    for fila in modelo.objects.filter(id__in = ids).only('id', campo):
+        total = totales.get(fila.id, 0)
+        if getattr(fila, campo) != total:
+            setattr(fila, campo, total)
+            cambiados.append(fila)
+    return modelo.objects.bulk_update(cambiados, [campo])
+
+def recontarNiveles(niveles):
+    return recontar(Nivel, 'totalPreguntas', Pregunta, 'nivel', niveles)
+
+def recontarLenguajes(lenguajes):
+    return recontar(Lenguaje, 'totalNiveles', Nivel, 'lenguaje', lenguajes)
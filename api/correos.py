@@ -0,0 +1,65 @@
+from .models import Correo
+from . import metricas
+from django.conf import settings
+from django.core import mail
+from django.db.models import F, Q
+from django.utils import timezone
+import datetime, time, uuid
+
+ASUNTO_REGISTRO = '¡Bienvenida/o a SaddWy! Confirma tu cuenta para comenzar'
+ASUNTO_RECUPERACION = 'Restablecimiento de contraseña en SaddWy'
+# Tipo con el que se etiqueta la duración del envío en las métricas
+TIPOS = {ASUNTO_REGISTRO: 'register', ASUNTO_RECUPERACION: 'recoveryEmail'}
+
+def encolar(asunto, mensaje, destinatarios, remitente = None):
+    # Se guarda en la misma transacción de la petición; el envío lo hace el comando enviarCorreos
+    return Correo.objects.create(
+        asunto = asunto,
+        mensaje = mensaje,
+        remitente = remitente or settings.EMAIL_HOST_USER,
+        destinatarios = list(destinatarios)
+    )
+
+def reclamar(limite, bloqueo = 300):
+    # Marca un lote con un identificador propio para que dos procesos no envíen el mismo correo
+    ahora = timezone.now()
+    disponibles = Correo.objects.filter(
+        Q(estado = Correo.PENDIENTE) | Q(estado = Correo.ENVIANDO),
+        proximoIntento__lte = ahora
+    ).order_by('proximoIntento', 'id').values_list('id', flat = True)[:limite]
+    lote = uuid.uuid4().hex
+    Correo.objects.filter(
+        Q(estado = Correo.PENDIENTE) | Q(estado = Correo.ENVIANDO),
+        id__in = list(disponibles),
+        proximoIntento__lte = ahora
+    ).update(estado = Correo.ENVIANDO, lote = lote, proximoIntento = ahora + datetime.timedelta(seconds = bloqueo))
+    return list(Correo.objects.filter(lote = lote, estado = Correo.ENVIANDO).order_by('id'))
+
+def espera(intentos, base = 30, maximo = 3600):
+    return datetime.timedelta(seconds = min(base * 2 ** (intentos - 1), maximo))
+
+def enviar(correos, conexion, maxIntentos = 5, base = 30):
+    enviados = 0
+    for correo in correos:
+        inicio = time.perf_counter()
+        try:
+            conexion.open()
+            mail.EmailMessage(correo.asunto, correo.mensaje, correo.remitente, correo.destinatarios, connection = conexion).send()
+        except Exception as e:
+            metricas.correo(TIPOS.get(correo.asunto, 'otro'), False, time.perf_counter() - inicio)
+            # La conexión puede haber quedado inservible; se abre de nuevo en el siguiente correo
+            conexion.close()
+            correo.intentos += 1
+            correo.error = str(e)
+            if correo.intentos >= maxIntentos:
+                correo.estado = Correo.FALLIDO
+            else:
+                correo.estado = Correo.PENDIENTE
+                correo.proximoIntento = timezone.now() + espera(correo.intentos, base)
+            correo.save(update_fields = ['intentos', 'error', 'estado', 'proximoIntento'])
+        else:
+            metricas.correo(TIPOS.get(correo.asunto, 'otro'), True, time.perf_counter() - inicio)
+            # Se marca enseguida: si el proceso muere a mitad del lote, los ya entregados no se reenvían
+            Correo.objects.filter(id = correo.id).update(estado = Correo.ENVIADO, intentos = F('intentos') + 1, error = '')
+            enviados += 1
+    return enviados
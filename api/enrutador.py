@@ -0,0 +1,59 @@
+from django.conf import settings
+from rest_framework import permissions
+import contextlib, contextvars
+
+REPLICA = 'replica'
+PRIMARIA = 'default'
+
+# Por solicitud: si puede leer de la réplica y si ya escribió en la primaria
+_replica = contextvars.ContextVar('replica', default = False)
+_escribio = contextvars.ContextVar('escribio', default = False)
+
+def rutas():
+    return tuple(getattr(settings, 'REPLICA_RUTAS', ()))
+
+def disponible():
+    return REPLICA in settings.DATABASES
+
+@contextlib.contextmanager
+def primaria():
+    # Lecturas que no pueden ver datos atrasados aunque la solicitud use la réplica
+    replica = _replica.set(False)
+    try:
+        yield
+    finally:
+        _replica.reset(replica)
+
+class MiddlewareReplica:
+    # Solo las lecturas (GET/HEAD) de las rutas configuradas pueden usar la réplica;
+    # cualquier otra solicitud, como questions POST, editUser o login, lee y escribe en la primaria
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        replica = _replica.set(request.method in permissions.SAFE_METHODS and request.path.startswith(rutas()))
+        escribio = _escribio.set(False)
+        try:
+            return self.get_response(request)
+        finally:
+            _replica.reset(replica)
+            _escribio.reset(escribio)
+
+class EnrutadorReplica:
+    def db_for_read(self, model, **hints):
+        # Después de la primera escritura la solicitud sigue en la primaria para leer lo que escribió
+        if _replica.get() and not _escribio.get() and disponible():
+            return REPLICA
+        return PRIMARIA
+
+    def db_for_write(self, model, **hints):
+        _escribio.set(True)
+        return PRIMARIA
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # La réplica es una copia de la primaria: los objetos de ambas se pueden relacionar
+        return True
+
+    def allow_migrate(self, db, app_label, model_name = None, **hints):
+        # La réplica se actualiza copiando la primaria, nunca con migraciones
+        return db != REPLICA
@@ -0,0 +1,30 @@
+from .models import Contactar, Progreso, Usuario
+from django.core.serializers.json import DjangoJSONEncoder
+import csv, json
+
+MODELOS = {
+    'usuarios': (Usuario, ['id', 'nombre', 'correo', 'estado', 'registro', 'administrador']),
+    'progresos': (Progreso, ['id', 'usuario_id', 'lenguaje_id', 'progresoLenguaje', 'puntos', 'registro']),
+    'contactos': (Contactar, ['id', 'nombre', 'celular', 'correo', 'mensaje', 'registro'])
+}
+FORMATOS = {'csv': 'text/csv; charset=utf-8', 'ndjson': 'application/x-ndjson'}
+
+class Eco:
+    # csv.writer escribe en este objeto y la línea se devuelve en lugar de acumularse en memoria
+    def write(self, valor):
+        return valor
+
+def filas(nombre, lote = 2000):
+    modelo, campos = MODELOS[nombre]
+    return campos, modelo.objects.order_by('id').values_list(*campos).iterator(chunk_size = lote)
+
+def generar(nombre, formato, lote = 2000):
+    campos, datos = filas(nombre, lote)
+    if formato == 'csv':
+        escritor = csv.writer(Eco())
+        yield escritor.writerow(campos)
+        for fila in datos:
+            yield escritor.writerow(fila)
+    else:
+        for fila in datos:
+            yield json.dumps(dict(zip(campos, fila)), cls = DjangoJSONEncoder, ensure_ascii = False) + '\n'
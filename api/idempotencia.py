@@ -0,0 +1,50 @@
+from django.core.cache import cache
+from rest_framework import response, status
+import hashlib, json
+
+CABECERA = 'Idempotency-Key'
+EN_PROCESO = 'en proceso'
+# Tiempo durante el que una repetición devuelve el resultado guardado
+DURACION = 60 * 60 * 24
+# Tiempo máximo que se reserva una clave mientras se procesa la primera solicitud
+RESERVA = 60
+
+def clave(request, alcance):
+    valor = request.headers.get(CABECERA, '').strip()
+    if not valor:
+        return None
+    return f'idempotencia:{request.user.id}:{alcance}:{valor[:128]}'
+
+def huella(request):
+    # Resumen del cuerpo: la misma clave con otro cuerpo no debe devolver el resultado guardado
+    return hashlib.sha256(json.dumps(request.data, sort_keys = True, default = str).encode()).hexdigest()
+
+def reservar(llave, huella):
+    # Devuelve la respuesta guardada, una respuesta 409 si la misma clave sigue en proceso,
+    # una respuesta 422 si la clave ya se usó con otro cuerpo, o None si se puede continuar
+    if cache.add(llave, EN_PROCESO, timeout = RESERVA):
+        return None
+    guardado = cache.get(llave)
+    if guardado is None or guardado == EN_PROCESO:
+        return response.Response({
+            'estado': 409,
+            'validar': False,
+            'mensaje': 'Tu solicitud anterior todavía se está procesando. Por favor, intenta nuevamente en unos segundos'
+        }, status = status.HTTP_409_CONFLICT)
+    if guardado[2] != huella:
+        return response.Response({
+            'estado': 422,
+            'validar': False,
+            'mensaje': 'Esta clave de idempotencia ya se usó con otros datos. Por favor, genera una nueva clave para esta solicitud'
+        }, status = status.HTTP_422_UNPROCESSABLE_ENTITY)
+    respuesta = response.Response(guardado[1], status = guardado[0])
+    respuesta[f'{CABECERA}-Replayed'] = 'true'
+    return respuesta
+
+def guardar(llave, huella, respuesta):
+    # Los errores internos no se guardan para que el cliente pueda reintentar con la misma clave
+    if respuesta.status_code >= 500:
+        cache.delete(llave)
+    else:
+        cache.set(llave, (respuesta.status_code, respuesta.data, huella), timeout = DURACION)
+    return respuesta
@@ -0,0 +1,49 @@
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+import io, os
+
+# Lado máximo en píxeles de cada derivado
+TAMANOS = {'pequena': 64, 'mediana': 256, 'grande': 512}
+CARPETA = 'derivados'
+# Errores de una imagen ilegible o demasiado grande (Pillow rechaza las bombas de descompresión)
+ERRORES = (OSError, ValueError, Image.DecompressionBombError)
+
+def formato(nombre):
+    return ('PNG', '.png') if nombre.lower().endswith('.png') else ('JPEG', '.jpg')
+
+def nombreDerivado(nombre, tamano):
+    base = os.path.splitext(nombre)[0]
+    return f'{CARPETA}/{base}_{TAMANOS[tamano]}{formato(nombre)[1]}'
+
+def derivados(nombre):
+    return [nombreDerivado(nombre, tamano) for tamano in TAMANOS]
+
+def generar(nombre, almacenamiento = default_storage, forzar = False):
+    if not nombre or (not forzar and almacenamiento.exists(nombreDerivado(nombre, 'grande'))):
+        return False
+    tipo = formato(nombre)[0]
+    with almacenamiento.open(nombre, 'rb') as archivo:
+        imagen = Image.open(archivo)
+        # En JPEG el decodificador puede reducir la escala al leer, evitando decodificar la imagen completa
+        imagen.draft('RGB', (max(TAMANOS.values()),) * 2)
+        imagen = ImageOps.exif_transpose(imagen)
+        imagen = imagen.convert('RGBA' if tipo == 'PNG' else 'RGB')
+    for tamano, lado in sorted(TAMANOS.items(), key = lambda item: -item[1]):
+        imagen.thumbnail((lado, lado), Image.LANCZOS)
+        # Sin info no se copian EXIF, perfiles ICC ni comentarios del original
+        imagen.info = {}
+        contenido = io.BytesIO()
+        if tipo == 'PNG':
+            imagen.save(contenido, 'PNG', optimize = True)
+        else:
+            imagen.save(contenido, 'JPEG', quality = 82, optimize = True, progressive = True)
+        destino = nombreDerivado(nombre, tamano)
+        if almacenamiento.exists(destino):
+            almacenamiento.delete(destino)
+        almacenamiento.save(destino, ContentFile(contenido.getvalue()))
+    return True
+
+def eliminar(nombre, almacenamiento = default_storage):
+    for derivado in derivados(nombre):
+        almacenamiento.delete(derivado)
@@ -0,0 +1,54 @@
+from . import metricas
+from django.conf import settings
+from django.db import connections
+import contextlib, logging, time
+
+logger = logging.getLogger('api.sql')
+
+def umbral():
+    return getattr(settings, 'SQL_UMBRAL_LENTO_MS', 100)
+
+def vista(request):
+    # Sin nombre de URL, view_name es la ruta de la función de la vista
+    coincidencia = getattr(request, 'resolver_match', None)
+    return coincidencia.view_name if coincidencia else request.path
+
+class Medidor:
+    # Se envuelve cada ejecución SQL de la solicitud; no depende de DEBUG ni guarda las consultas
+    def __init__(self, request):
+        self.request = request
+        self.consultas = 0
+        self.duracion = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duracion = (time.perf_counter() - inicio) * 1000
+            self.consultas += 1
+            self.duracion += duracion
+            if duracion >= umbral():
+                logger.warning(
+                    '%.1f ms %s [%s] %s',
+                    duracion, vista(self.request), context['connection'].alias, sql,
+                    extra = {'duracion': duracion, 'parametros': params}
+                )
+
+class MiddlewareSQL:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        medidor = Medidor(request)
+        inicio = time.perf_counter()
+        with contextlib.ExitStack() as pila:
+            for conexion in connections.all():
+                pila.enter_context(conexion.execute_wrapper(medidor))
+            respuesta = self.get_response(request)
+        total = (time.perf_counter() - inicio) * 1000
+        metricas.solicitud(request, respuesta, total / 1000, medidor.consultas, medidor.duracion / 1000)
+        # En las respuestas en streaming solo se cuentan las consultas hechas antes de empezar a enviar
+        tiempos = f'db;desc="SQL ({medidor.consultas})";dur={medidor.duracion:.2f}, total;dur={total:.2f}'
+        respuesta['Server-Timing'] = f'{respuesta["Server-Timing"]}, {tiempos}' if respuesta.has_header('Server-Timing') else tiempos
+        return respuesta
@@ -0,0 +1,86 @@
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework import exceptions, throttling, views
+from rest_framework_simplejwt import tokens
+from rest_framework_simplejwt.exceptions import TokenError
+import hashlib, math
+
+class CubetaFichas(throttling.SimpleRateThrottle):
+    # Cubeta de fichas por clave: admite ráfagas de hasta N solicitudes y recupera una ficha cada
+    # periodo/N. Se implementa como GCRA: en lugar de las fichas se guarda el instante en que la
+    # cubeta vuelve a estar llena, un solo valor por clave. La lectura y escritura en la caché no son
+    # atómicas, por lo que con concurrencia alta pueden pasar unas pocas solicitudes de más.
+    tipo = None
+
+    def __init__(self):
+        # La tasa depende de la vista; se resuelve en allow_request
+        self.espera = None
+
+    @property
+    def cache(self):
+        return caches[getattr(settings, 'LIMITES_CACHE', 'default')]
+
+    def get_rate(self):
+        # Un alcance sin tasa en LIMITES no tiene límite
+        return getattr(settings, 'LIMITES', {}).get(self.scope)
+
+    def allow_request(self, request, view):
+        # En las vistas de función la clase envuelta lleva el nombre de la función (login.ip, register.correo, ...)
+        self.scope = f'{view.__class__.__name__}.{self.tipo}'
+        self.rate = self.get_rate()
+        if self.rate is None:
+            return True
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+        ahora = self.timer()
+        llena = max(self.cache.get(self.key, ahora), ahora) + self.duration / self.num_requests
+        self.espera = llena - ahora - self.duration
+        if self.espera > 0:
+            return False
+        self.cache.set(self.key, llena, timeout = math.ceil(llena - ahora))
+        return True
+
+    def wait(self):
+        return self.espera
+
+class PorIp(CubetaFichas):
+    tipo = 'ip'
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {'scope': self.scope, 'ident': self.get_ident(request)}
+
+class PorCorreo(CubetaFichas):
+    # Limita los intentos contra una misma cuenta aunque lleguen desde muchas IP
+    tipo = 'correo'
+
+    def cuenta(self, request, view):
+        if 'token' in view.kwargs:
+            # Se verifican la firma y la expiración (sin la lista negra, que consulta la vista) para que
+            # un token falsificado no elija la cubeta de otra cuenta; sin token válido solo limita la IP
+            try:
+                return str(tokens.UntypedToken(view.kwargs['token'])['user_id'])
+            except (TokenError, KeyError):
+                return None
+        correo = request.data.get('correo') if hasattr(request.data, 'get') else None
+        return str(correo).strip().lower() if correo else None
+
+    def get_cache_key(self, request, view):
+        cuenta = self.cuenta(request, view)
+        if cuenta is None:
+            return None
+        return self.cache_format % {'scope': self.scope, 'ident': hashlib.sha256(cuenta.encode()).hexdigest()[:32]}
+
+LIMITES = [PorIp, PorCorreo]
+
+def manejarExcepcion(exc, context):
+    respuesta = views.exception_handler(exc, context)
+    # DRF ya agrega Retry-After; solo se ajusta el cuerpo al formato de las demás respuestas
+    if isinstance(exc, exceptions.Throttled) and respuesta is not None:
+        respuesta.data = {
+            'estado': 429,
+            'validar': False,
+            'mensaje': f'Has realizado demasiadas solicitudes. Por favor, inténtalo nuevamente en {exc.wait} segundos'
+        }
+    return respuesta
@@ -0,0 +1,30 @@
+from api.models import Lenguaje
+from api import progresos
+from django.core.management.base import BaseCommand
+import time
+
+class Command(BaseCommand):
+    help = 'Crea por lotes el Progreso faltante de los lenguajes activados; se ejecuta como worker junto a enviarCorreos'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lenguaje', type = int, help = 'Id de un lenguaje activo a asignar aunque no esté pendiente')
+        parser.add_argument('--todos', action = 'store_true', help = 'Recorre todos los lenguajes activos en lugar de solo los pendientes')
+        parser.add_argument('--lote', type = int, default = 1000, help = 'Cantidad de usuarios por lote')
+        parser.add_argument('--continuo', action = 'store_true', help = 'Sigue esperando lenguajes pendientes en lugar de terminar')
+        parser.add_argument('--intervalo', type = float, default = 30, help = 'Segundos entre revisiones en modo continuo')
+
+    def handle(self, *args, **options):
+        if options['lenguaje'] or options['todos']:
+            lenguajes = Lenguaje.objects.filter(estado = True)
+            if options['lenguaje']:
+                lenguajes = lenguajes.filter(id = options['lenguaje'])
+            for lenguaje in lenguajes.values_list('id', 'nombre'):
+                creados = progresos.asignarLenguaje(lenguaje[0], lote = options['lote'])
+                self.stdout.write(self.style.SUCCESS(f'{lenguaje[1]}: {creados} progresos creados'))
+            return
+        while True:
+            for nombre, creados in progresos.asignarPendientes(lote = options['lote']):
+                self.stdout.write(self.style.SUCCESS(f'{nombre}: {creados} progresos creados'))
+            if not options['continuo']:
+                break
+            time.sleep(options['intervalo'])
@@ -0,0 +1,71 @@
+from api import sqlite
+from django.core.management.base import BaseCommand
+import os, sqlite3, tempfile, threading, time
+
+ESQUEMA = (
+    'CREATE TABLE progreso (id INTEGER PRIMARY KEY, usuario INTEGER, puntos INTEGER NOT NULL DEFAULT 0)',
+    'CREATE TABLE completado (id INTEGER PRIMARY KEY, usuario INTEGER, nivel INTEGER, puntos INTEGER, UNIQUE (usuario, nivel))',
+)
+
+def conectar(ruta, pragmas):
+    conexion = sqlite3.connect(ruta, timeout = 30, isolation_level = None, check_same_thread = False)
+    sqlite.aplicar(conexion, pragmas)
+    return conexion
+
+def medir(ruta, pragmas, transacciones, escritores, lectores):
+    conexion = conectar(ruta, pragmas)
+    for sentencia in ESQUEMA:
+        conexion.execute(sentencia)
+    conexion.executemany('INSERT INTO progreso (usuario) VALUES (?)', [(usuario,) for usuario in range(escritores)])
+    conexion.close()
+
+    terminado = threading.Event()
+    lecturas = []
+
+    def escribir(usuario):
+        # Cada transacción imita un envío de nivel: una inserción y un incremento de puntos
+        conexion = conectar(ruta, pragmas)
+        for nivel in range(transacciones // escritores):
+            conexion.execute('BEGIN IMMEDIATE')
+            conexion.execute('INSERT INTO completado (usuario, nivel, puntos) VALUES (?, ?, 3)', (usuario, nivel))
+            conexion.execute('UPDATE progreso SET puntos = puntos + 3 WHERE usuario = ?', (usuario,))
+            conexion.execute('COMMIT')
+        conexion.close()
+
+    def leer():
+        conexion = conectar(ruta, pragmas)
+        cantidad = 0
+        while not terminado.is_set():
+            conexion.execute('SELECT usuario, puntos FROM progreso ORDER BY puntos DESC').fetchall()
+            cantidad += 1
+        lecturas.append(cantidad)
+        conexion.close()
+
+    hilosLectura = [threading.Thread(target = leer) for _ in range(lectores)]
+    hilosEscritura = [threading.Thread(target = escribir, args = (usuario,)) for usuario in range(escritores)]
+    inicio = time.perf_counter()
+    for hilo in hilosLectura + hilosEscritura:
+        hilo.start()
+    for hilo in hilosEscritura:
+        hilo.join()
+    duracion = time.perf_counter() - inicio
+    terminado.set()
+    for hilo in hilosLectura:
+        hilo.join()
+    return (transacciones // escritores) * escritores / duracion, sum(lecturas) / duracion
+
+class Command(BaseCommand):
+    help = 'Compara el rendimiento de escritura de SQLite con los pragmas predeterminados y con SQLITE_PRAGMAS'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--transacciones', type = int, default = 2000, help = 'Transacciones de escritura en total')
+        parser.add_argument('--escritores', type = int, default = 4, help = 'Hilos que escriben')
+        parser.add_argument('--lectores', type = int, default = 2, help = 'Hilos que leen mientras se escribe')
+
+    def handle(self, *args, **options):
+        configuraciones = {'predeterminado': {}, 'ajustado': sqlite.pragmas()}
+        self.stdout.write(f'{"pragmas":<16}{"escrituras/s":>14}{"lecturas/s":>14}')
+        for nombre, pragmas in configuraciones.items():
+            with tempfile.TemporaryDirectory() as carpeta:
+                escrituras, lecturas = medir(os.path.join(carpeta, 'benchmark.sqlite3'), pragmas, options['transacciones'], options['escritores'], options['lectores'])
+            self.stdout.write(f'{nombre:<16}{escrituras:>14.0f}{lecturas:>14.0f}')
@@ -0,0 +1,47 @@
+from api import validaciones
+from django.core.management.base import BaseCommand
+import difflib, re, timeit
+
+def validarPasswordAnterior(password, nombre, correo):
+    # Copia de la validación que existía en register, recoverAccount y editUser
+    if len(password) < 8:
+        return 'longitud'
+    elif ' ' in password:
+        return 'espacio'
+    elif not re.search(r'[A-Z]', password):
+        return 'mayuscula'
+    elif not re.search(r'[a-z]', password):
+        return 'minuscula'
+    elif not re.search(r'\d', password):
+        return 'digito'
+    else:
+        patron = r'[!@#$%^&*()\-_=+{};:,<.>/?[\]\'"`~\\|]'
+        similitud_1 = difflib.SequenceMatcher(None, nombre.lower(), password.lower()).ratio()
+        similitud_2 = difflib.SequenceMatcher(None, correo.lower(), password.lower()).ratio()
+        if not re.search(patron, password):
+            return 'especial'
+        elif similitud_1 > 0.5 and similitud_2 > 0.5:
+            return 'similitud'
+    return None
+
+CASOS = {
+    'valida': ('Progr4ma#Seguro', 'Nombre De Prueba', 'prueba@gmail.com'),
+    'similar': ('Nombre#De#Prueba1', 'Nombre De Prueba', 'nombredeprueba@gmail.com'),
+    'larga': ('Aa1#' + 'nombredeprueba' * 700, 'Nombre De Prueba', 'nombredeprueba@gmail.com')
+}
+
+class Command(BaseCommand):
+    help = 'Mide el costo por llamada de la validación de contraseñas anterior y la actual'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeticiones', type = int, default = 2000, help = 'Llamadas por caso')
+
+    def handle(self, *args, **options):
+        repeticiones = options['repeticiones']
+        self.stdout.write(f'{"caso":<10}{"anterior (µs)":>16}{"actual (µs)":>16}')
+        for caso, argumentos in CASOS.items():
+            # El caso largo es cuadrático con la versión anterior, se reducen sus repeticiones
+            veces = max(repeticiones // 200, 1) if caso == 'larga' else repeticiones
+            anterior = timeit.timeit(lambda: validarPasswordAnterior(*argumentos), number = veces) / veces
+            actual = timeit.timeit(lambda: validaciones.validarPassword(*argumentos), number = veces) / veces
+            self.stdout.write(f'{caso:<10}{anterior * 1e6:>16.1f}{actual * 1e6:>16.1f}')
@@ -0,0 +1,35 @@
+from api import correos, metricas
+from django.core import mail
+from django.core.management.base import BaseCommand
+import time
+
+class Command(BaseCommand):
+    help = 'Envía los correos pendientes de la bandeja de salida reutilizando una sola conexión SMTP'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type = int, default = 50, help = 'Cantidad de correos reclamados por lote')
+        parser.add_argument('--max-intentos', type = int, default = 5, help = 'Intentos antes de marcar un correo como fallido')
+        parser.add_argument('--espera', type = int, default = 30, help = 'Segundos base del reintento exponencial')
+        parser.add_argument('--continuo', action = 'store_true', help = 'Sigue esperando correos nuevos en lugar de terminar')
+        parser.add_argument('--intervalo', type = float, default = 5, help = 'Segundos entre revisiones en modo continuo')
+
+    def handle(self, *args, **options):
+        conexion = mail.get_connection(fail_silently = False)
+        total = 0
+        try:
+            while True:
+                lote = correos.reclamar(options['lote'])
+                if lote:
+                    total += correos.enviar(lote, conexion, maxIntentos = options['max_intentos'], base = options['espera'])
+                    # Con METRICAS_DIR las duraciones SMTP del worker se suman en /metrics de la API
+                    metricas.volcar()
+                    continue
+                if not options['continuo']:
+                    break
+                # Sin trabajo pendiente se libera la conexión para no mantener abierta la sesión SMTP
+                conexion.close()
+                time.sleep(options['intervalo'])
+        finally:
+            conexion.close()
+            metricas.volcar(forzar = True)
+        self.stdout.write(self.style.SUCCESS(f'{total} correos enviados'))
@@ -0,0 +1,20 @@
+from api import exportacion
+from django.core.management.base import BaseCommand
+
+class Command(BaseCommand):
+    help = 'Exporta usuarios, progresos o mensajes de contacto en CSV o NDJSON sin cargar la tabla en memoria'
+
+    def add_arguments(self, parser):
+        parser.add_argument('modelo', choices = list(exportacion.MODELOS))
+        parser.add_argument('--formato', choices = list(exportacion.FORMATOS), default = 'csv')
+        parser.add_argument('--salida', help = 'Archivo de destino; por defecto la salida estándar')
+        parser.add_argument('--lote', type = int, default = 2000, help = 'Filas leídas por consulta')
+
+    def handle(self, *args, **options):
+        partes = exportacion.generar(options['modelo'], options['formato'], options['lote'])
+        if options['salida']:
+            with open(options['salida'], 'w', encoding = 'utf-8', newline = '') as archivo:
+                archivo.writelines(partes)
+        else:
+            for parte in partes:
+                self.stdout.write(parte, ending = '')
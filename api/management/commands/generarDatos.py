@@ -0,0 +1,139 @@
+from api.models import FotoPredeterminada, Lenguaje, Nivel, NivelCompletado, Pregunta, Progreso, Puntaje, Usuario
+from api import catalogo, completados
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.utils import timezone
+import random, time
+
+# Contraseña de todos los usuarios generados
+CLAVE = 'Semilla#2024'
+NOMBRES = ('Ana', 'Carlos', 'Valentina', 'Santiago', 'Camila', 'Mateo', 'Isabella', 'Sebastián', 'Mariana', 'Nicolás', 'Daniela', 'Andrés')
+APELLIDOS = ('Gómez', 'Rodríguez', 'Martínez', 'López', 'García', 'Hernández', 'Ramírez', 'Torres', 'Castro', 'Morales', 'Vargas', 'Rojas')
+LENGUAJES = ('Python', 'JavaScript', 'Java', 'C', 'Go', 'Rust', 'Kotlin', 'PHP', 'Ruby', 'Swift')
+
+class Command(BaseCommand):
+    help = 'Genera datos sintéticos por lotes: usuarios, lenguajes, niveles, preguntas, progresos y niveles completados'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--usuarios', type = int, default = 1000, help = 'Cantidad de usuarios activos')
+        parser.add_argument('--lenguajes', type = int, default = 5, help = 'Cantidad de lenguajes activos')
+        parser.add_argument('--niveles', type = int, default = 10, help = 'Niveles por lenguaje')
+        parser.add_argument('--preguntas', type = int, default = 8, help = 'Preguntas por nivel')
+        parser.add_argument('--completados', type = float, default = 0.4, help = 'Fracción media de niveles completados por progreso')
+        parser.add_argument('--lote', type = int, default = 5000, help = 'Usuarios por transacción y filas por bulk_create')
+        parser.add_argument('--semilla', type = int, default = 0, help = 'Semilla del generador aleatorio')
+        parser.add_argument('--prefijo', default = None, help = 'Prefijo de correos y nombres de lenguaje; por defecto se deriva de la hora')
+
+    def handle(self, *args, **options):
+        inicio = time.perf_counter()
+        azar = random.Random(options['semilla'])
+        prefijo = options['prefijo'] or f's{time.time_ns() // 1000000}'
+        lote = options['lote']
+        foto = FotoPredeterminada.objects.values_list('foto', flat = True).first() or 'predeterminado/semilla.png'
+
+        with transaction.atomic():
+            lenguajes = Lenguaje.objects.bulk_create([
+                Lenguaje(
+                    logo = 'lenguaje/semilla.png',
+                    urlDocumentation = 'https://saddwy.test/documentacion',
+                    color = {'primario': f'#{azar.randrange(0x1000000):06x}'},
+                    nombre = f'{LENGUAJES[i % len(LENGUAJES)]} {prefijo}-{i}'[:50],
+                    estado = True,
+                    totalNiveles = options['niveles']
+                ) for i in range(options['lenguajes'])
+            ], batch_size = lote)
+            niveles = Nivel.objects.bulk_create([
+                Nivel(
+                    lenguaje = lenguaje,
+                    nombre = f'Nivel {numero}',
+                    explanation = f'Conceptos del nivel {numero} de {lenguaje.nombre}',
+                    totalPreguntas = options['preguntas'],
+                    estado = True
+                ) for lenguaje in lenguajes for numero in range(1, options['niveles'] + 1)
+            ], batch_size = lote)
+            preguntas = (
+                Pregunta(
+                    nivel = nivel,
+                    explanation = 'Explicación de la respuesta correcta',
+                    pregunta = f'Pregunta {numero} de {nivel.nombre}',
+                    respuesta = {'opciones': ['A', 'B', 'C', 'D'], 'correcta': azar.randrange(4)},
+                    estado = True
+                ) for nivel in niveles for numero in range(options['preguntas'])
+            )
+            self.crear(Pregunta, preguntas, lote)
+
+        porLenguaje = {}
+        for nivel in niveles:
+            porLenguaje.setdefault(nivel.lenguaje_id, []).append(nivel)
+        password = make_password(CLAVE)
+        totales = dict.fromkeys(('usuarios', 'progresos', 'completados'), 0)
+        for desde in range(0, options['usuarios'], lote):
+            with transaction.atomic():
+                usuarios = Usuario.objects.bulk_create([
+                    Usuario(
+                        foto = foto,
+                        nombre = f'{azar.choice(NOMBRES)} {azar.choice(APELLIDOS)} {azar.choice(APELLIDOS)}'[:30],
+                        correo = f'{prefijo}.{numero}@saddwy.test',
+                        password = password,
+                        estado = True
+                    ) for numero in range(desde, min(desde + lote, options['usuarios']))
+                ])
+                ahora = timezone.now()
+                progresos, completos, puntajes = [], [], []
+                for usuario in usuarios:
+                    total = 0
+                    for lenguaje in lenguajes:
+                        lista = porLenguaje.get(lenguaje.id, [])
+                        # Se avanza en orden: quien completó el nivel n completó los anteriores
+                        cantidad = min(int(azar.random() * 2 * options['completados'] * len(lista)), len(lista))
+                        puntos = 0
+                        for nivel in lista[:cantidad]:
+                            ganados = completados.puntosGanados(nivel, azar.randint(0, nivel.totalPreguntas * 2))
+                            puntos += ganados
+                            completos.append((usuario.id, nivel.id, ganados, ahora))
+                        progresos.append((usuario.id, lenguaje.id, completados.porcentaje(cantidad, len(lista)), puntos, cantidad, {}, ahora))
+                        total += puntos
+                    puntajes.append((usuario.id, total, ahora))
+                self.insertar(Progreso, ['usuario', 'lenguaje', 'progresoLenguaje', 'puntos', 'nivelesTerminados', 'nivelesCompletados', 'registro'], progresos, lote)
+                self.insertar(NivelCompletado, ['usuario', 'nivel', 'puntos', 'completado'], completos, lote)
+                self.insertar(Puntaje, ['usuario', 'puntos', 'actualizado'], puntajes, lote)
+            totales['usuarios'] += len(usuarios)
+            totales['progresos'] += len(progresos)
+            totales['completados'] += len(completos)
+            self.stdout.write(f'{totales["usuarios"]} usuarios generados')
+        catalogo.invalidar()
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(lenguajes)} lenguajes, {len(niveles)} niveles, {len(niveles) * options["preguntas"]} preguntas, '
+            f'{totales["usuarios"]} usuarios, {totales["progresos"]} progresos y {totales["completados"]} niveles completados '
+            f'en {time.perf_counter() - inicio:.1f} s (prefijo {prefijo}, contraseña {CLAVE})'
+        ))
+
+    def crear(self, modelo, filas, lote):
+        # Inserta un generador por partes para no tener millones de instancias en memoria
+        pendientes = []
+        for fila in filas:
+            pendientes.append(fila)
+            if len(pendientes) >= lote:
+                modelo.objects.bulk_create(pendientes)
+                pendientes = []
+        if pendientes:
+            modelo.objects.bulk_create(pendientes)
+
+    def insertar(self, modelo, campos, filas, lote):
+        # Las tablas con millones de filas se insertan con executemany: bulk_create prepara
+        # cada campo de cada instancia y ese costo domina la generación
+        conexion = connections[DEFAULT_DB_ALIAS]
+        opciones = modelo._meta
+        columnas = [opciones.get_field(campo) for campo in campos]
+        sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+            conexion.ops.quote_name(opciones.db_table),
+            ', '.join(conexion.ops.quote_name(columna.column) for columna in columnas),
+            ', '.join(['%s'] * len(columnas))
+        )
+        with conexion.cursor() as cursor:
+            for inicio in range(0, len(filas), lote):
+                cursor.executemany(sql, [
+                    [columna.get_db_prep_save(valor, conexion) for columna, valor in zip(columnas, fila)]
+                    for fila in filas[inicio:inicio + lote]
+                ])
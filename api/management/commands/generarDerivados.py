@@ -0,0 +1,21 @@
+from api.models import FotoPredeterminada, Lenguaje, Usuario
+from api import imagenes
+from django.core.management.base import BaseCommand
+
+class Command(BaseCommand):
+    help = 'Genera los tamaños reducidos de las fotos de usuario, fotos predeterminadas y logos existentes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--forzar', action = 'store_true', help = 'Vuelve a generar aunque los derivados ya existan')
+
+    def handle(self, *args, **options):
+        nombres = set()
+        for modelo, campo in ((Usuario, 'foto'), (Lenguaje, 'logo'), (FotoPredeterminada, 'foto')):
+            nombres.update(modelo.objects.exclude(**{campo: ''}).values_list(campo, flat = True).distinct().iterator())
+        generados = 0
+        for nombre in sorted(nombres):
+            try:
+                generados += imagenes.generar(nombre, forzar = options['forzar'])
+            except imagenes.ERRORES as e:
+                self.stderr.write(f'{nombre}: {e}')
+        self.stdout.write(self.style.SUCCESS(f'{generados} imágenes procesadas de {len(nombres)}'))
@@ -0,0 +1,50 @@
+from api.models import FotoPredeterminada, Lenguaje, Usuario
+from api import imagenes
+from django.conf import settings
+from django.core.management.base import BaseCommand
+import os, time
+
+CARPETAS = ('usuario', 'lenguaje', 'predeterminado', imagenes.CARPETA)
+
+def recorrer(ruta):
+    # os.scandir entrega las entradas a medida que las lee, sin listar el directorio completo en memoria
+    with os.scandir(ruta) as entradas:
+        for entrada in entradas:
+            if entrada.is_dir(follow_symlinks = False):
+                yield from recorrer(entrada.path)
+            elif entrada.is_file(follow_symlinks = False):
+                yield entrada
+
+class Command(BaseCommand):
+    help = 'Elimina de MEDIA_ROOT los archivos que ya no referencian Usuario.foto, Lenguaje.logo ni FotoPredeterminada.foto'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--simular', action = 'store_true', help = 'Solo muestra lo que se eliminaría')
+        parser.add_argument('--minutos', type = int, default = 60, help = 'Ignora archivos modificados hace menos de estos minutos')
+
+    def handle(self, *args, **options):
+        referenciados = set()
+        for modelo, campo in ((Usuario, 'foto'), (Lenguaje, 'logo'), (FotoPredeterminada, 'foto')):
+            for nombre in modelo.objects.exclude(**{campo: ''}).values_list(campo, flat = True).distinct().iterator():
+                referenciados.add(nombre)
+                referenciados.update(imagenes.derivados(nombre))
+
+        limite = time.time() - options['minutos'] * 60
+        eliminados = liberados = 0
+        for carpeta in CARPETAS:
+            ruta = os.path.join(settings.MEDIA_ROOT, carpeta)
+            if not os.path.isdir(ruta):
+                continue
+            for entrada in recorrer(ruta):
+                nombre = os.path.relpath(entrada.path, settings.MEDIA_ROOT).replace(os.sep, '/')
+                estado = entrada.stat(follow_symlinks = False)
+                if nombre in referenciados or estado.st_mtime > limite:
+                    continue
+                eliminados += 1
+                liberados += estado.st_size
+                if options['simular']:
+                    self.stdout.write(nombre)
+                else:
+                    os.remove(entrada.path)
+        accion = 'se eliminarían' if options['simular'] else 'eliminados'
+        self.stdout.write(self.style.SUCCESS(f'{eliminados} archivos {accion} ({liberados / 1024:.1f} KB)'))
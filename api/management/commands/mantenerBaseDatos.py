@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+class Command(BaseCommand):
+    help = 'Ejecuta ANALYZE, PRAGMA optimize, VACUUM incremental y un checkpoint del WAL sobre la base SQLite'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base', default = 'default', help = 'Alias de la base de datos')
+        parser.add_argument('--paginas', type = int, default = 0, help = 'Páginas libres a devolver con incremental_vacuum; 0 devuelve todas')
+        parser.add_argument('--activar-incremental', action = 'store_true', help = 'Cambia auto_vacuum a INCREMENTAL con un VACUUM completo (bloquea la base mientras dura)')
+
+    def handle(self, *args, **options):
+        conexion = connections[options['base']]
+        if conexion.vendor != 'sqlite':
+            raise CommandError('Este comando solo aplica a bases SQLite')
+        with conexion.cursor() as cursor:
+            def pragma(nombre):
+                cursor.execute(f'PRAGMA {nombre}')
+                return cursor.fetchone()[0]
+
+            libresAntes = pragma('freelist_count')
+            cursor.execute('ANALYZE')
+            cursor.execute('PRAGMA optimize')
+            if options['activar_incremental'] and pragma('auto_vacuum') != 2:
+                cursor.execute('PRAGMA auto_vacuum = INCREMENTAL')
+                cursor.execute('VACUUM')
+                self.stdout.write('auto_vacuum cambiado a INCREMENTAL')
+            if pragma('auto_vacuum') == 2:
+                cursor.execute(f'PRAGMA incremental_vacuum({options["paginas"]})')
+                cursor.fetchall()
+            else:
+                self.stdout.write(self.style.WARNING('auto_vacuum no es INCREMENTAL; use --activar-incremental una vez para habilitar el VACUUM incremental'))
+            if pragma('journal_mode') == 'wal':
+                cursor.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+                cursor.fetchall()
+            libresDespues = pragma('freelist_count')
+            tamano = pragma('page_count') * pragma('page_size')
+        self.stdout.write(self.style.SUCCESS(
+            f'Mantenimiento completado: páginas libres {libresAntes} -> {libresDespues}, tamaño {tamano / 1024 / 1024:.1f} MB'
+        ))
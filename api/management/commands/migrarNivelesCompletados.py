@@ -0,0 +1,48 @@
+from api.models import Lenguaje, Nivel, NivelCompletado, Progreso
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest, Least
+
+class Command(BaseCommand):
+    help = 'Crea NivelCompletado a partir del JSON obsoleto Progreso.nivelesCompletados'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type = int, default = 1000, help = 'Cantidad de progresos leídos por consulta')
+
+    def handle(self, *args, **options):
+        # (lenguaje, nombre) -> id del nivel; con nombres repetidos se usa el nivel más antiguo
+        niveles = {}
+        for id, lenguaje, nombre in Nivel.objects.order_by('-id').values_list('id', 'lenguaje_id', 'nombre'):
+            niveles[(lenguaje, nombre)] = id
+
+        antes = NivelCompletado.objects.count()
+        desconocidos = ultimo = 0
+        progresos = Progreso.objects.exclude(nivelesCompletados = {}).order_by('id')
+        while True:
+            filas = list(progresos.filter(id__gt = ultimo).values_list('id', 'usuario_id', 'lenguaje_id', 'puntos', 'nivelesCompletados')[:options['lote']])
+            if not filas:
+                break
+            ultimo = filas[-1][0]
+            with transaction.atomic():
+                for id, usuario, lenguaje, puntos, nombres in filas:
+                    ids = [niveles.get((lenguaje, nombre)) for nombre, completado in nombres.items() if completado]
+                    desconocidos += ids.count(None)
+                    ids = sorted(set(filter(None, ids)))
+                    if not ids:
+                        continue
+                    # El JSON no guardaba puntos por nivel: se reparten los del progreso para conservar el total
+                    parte, resto = divmod(puntos, len(ids))
+                    NivelCompletado.objects.bulk_create([
+                        NivelCompletado(usuario_id = usuario, nivel_id = nivel, puntos = parte + (1 if posicion < resto else 0))
+                        for posicion, nivel in enumerate(ids)
+                    ], ignore_conflicts = True)
+        # Contador y porcentaje de todas las filas, también de las completadas después de migrar el JSON;
+        # el porcentaje se calcula como completados.porcentaje
+        completadas = NivelCompletado.objects.filter(usuario_id = OuterRef('usuario_id'), nivel__lenguaje_id = OuterRef('lenguaje_id')).values('usuario_id').annotate(total = Count('id')).values('total')
+        totalNiveles = Lenguaje.objects.filter(id = OuterRef('lenguaje_id')).values('totalNiveles')
+        with transaction.atomic():
+            Progreso.objects.update(nivelesTerminados = Coalesce(Subquery(completadas), 0))
+            Progreso.objects.update(progresoLenguaje = Least(F('nivelesTerminados') * 100 / Greatest(Subquery(totalNiveles), Value(1)), Value(100)))
+        creados = NivelCompletado.objects.count() - antes
+        self.stdout.write(self.style.SUCCESS(f'{creados} niveles completados migrados, {desconocidos} nombres sin nivel correspondiente'))
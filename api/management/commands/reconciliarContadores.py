@@ -0,0 +1,39 @@
+from api.models import Lenguaje, Nivel, Pregunta
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Q
+
+# Modelo, contador desnormalizado y relación inversa que se cuenta
+CONTADORES = (
+    (Nivel, 'totalPreguntas', 'pregunta'),
+    (Lenguaje, 'totalNiveles', 'nivel'),
+)
+
+class Command(BaseCommand):
+    help = 'Compara Nivel.totalPreguntas y Lenguaje.totalNiveles con las filas activas y, con --reparar, corrige las diferencias'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reparar', action = 'store_true', help = 'Corrige los contadores que no coinciden')
+
+    def handle(self, *args, **options):
+        diferencias = 0
+        with transaction.atomic():
+            for modelo, campo, relacion in CONTADORES:
+                filas = modelo.objects.annotate(
+                    real = Count(relacion, filter = Q(**{f'{relacion}__estado': True}))
+                ).only('id', campo)
+                cambiados = []
+                for fila in filas.iterator():
+                    if getattr(fila, campo) != fila.real:
+                        self.stdout.write(f'{modelo.__name__} {fila.id}: {campo} = {getattr(fila, campo)}, real = {fila.real}')
+                        setattr(fila, campo, fila.real)
+                        cambiados.append(fila)
+                diferencias += len(cambiados)
+                if options['reparar'] and cambiados:
+                    modelo.objects.bulk_update(cambiados, [campo], batch_size = 500)
+        if not diferencias:
+            self.stdout.write(self.style.SUCCESS('Los contadores coinciden'))
+        elif options['reparar']:
+            self.stdout.write(self.style.SUCCESS(f'{diferencias} contadores reparados'))
+        else:
+            self.stdout.write(self.style.WARNING(f'{diferencias} contadores con diferencias; ejecute con --reparar para corregirlos'))
@@ -0,0 +1,27 @@
+from api.models import Progreso, Puntaje
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Sum, Min
+
+class Command(BaseCommand):
+    help = 'Reconstruye la tabla Puntaje a partir de la suma de puntos de Progreso'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type = int, default = 1000, help = 'Cantidad de filas por bulk_create')
+
+    def handle(self, *args, **options):
+        totales = Progreso.objects.values('usuario').annotate(
+            puntos = Sum('puntos'),
+            registro = Min('registro')
+        ).order_by()
+        with transaction.atomic():
+            Puntaje.objects.all().delete()
+            lote = []
+            creados = 0
+            for total in totales.iterator(chunk_size = options['lote']):
+                lote.append(Puntaje(usuario_id = total['usuario'], puntos = total['puntos'], actualizado = total['registro']))
+                if len(lote) >= options['lote']:
+                    creados += len(Puntaje.objects.bulk_create(lote))
+                    lote = []
+            creados += len(Puntaje.objects.bulk_create(lote))
+        self.stdout.write(self.style.SUCCESS(f'Ranking reconstruido con {creados} usuarios'))
@@ -0,0 +1,35 @@
+from api import enrutador
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+import sqlite3, time
+
+class Command(BaseCommand):
+    help = 'Copia la base SQLite primaria sobre la réplica con la API de respaldo de SQLite'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--paginas', type = int, default = 1024, help = 'Páginas copiadas por paso; entre pasos la primaria queda libre para escribir')
+        parser.add_argument('--continuo', action = 'store_true', help = 'Repite la copia cada --intervalo segundos')
+        parser.add_argument('--intervalo', type = float, default = 30, help = 'Segundos entre copias en modo continuo')
+
+    def copiar(self, origen, destino, paginas):
+        inicio = time.perf_counter()
+        primaria = sqlite3.connect(origen, timeout = 30)
+        replica = sqlite3.connect(destino, timeout = 30)
+        try:
+            primaria.backup(replica, pages = paginas, sleep = 0.005)
+        finally:
+            replica.close()
+            primaria.close()
+        self.stdout.write(self.style.SUCCESS(f'Réplica sincronizada en {time.perf_counter() - inicio:.2f} s'))
+
+    def handle(self, *args, **options):
+        if not enrutador.disponible():
+            raise CommandError('No hay una base de datos "replica" configurada; defina DB_REPLICA')
+        origen, destino = settings.DATABASES[enrutador.PRIMARIA], settings.DATABASES[enrutador.REPLICA]
+        if {origen['ENGINE'], destino['ENGINE']} != {'django.db.backends.sqlite3'}:
+            raise CommandError('La sincronización con la API de respaldo solo aplica a SQLite')
+        while True:
+            self.copiar(str(origen['NAME']), str(destino['NAME']), options['paginas'])
+            if not options['continuo']:
+                break
+            time.sleep(options['intervalo'])
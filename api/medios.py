@@ -0,0 +1,108 @@
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured, SuspiciousFileOperation
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotAllowed, HttpResponseNotModified, StreamingHttpResponse
+from django.utils._os import safe_join
+from django.utils.encoding import filepath_to_uri
+from django.utils.http import http_date, parse_etags
+from django.views.static import was_modified_since
+import mimetypes, os, re, stat
+
+# Nombres por hash de contenido (y sus derivados): su contenido nunca cambia
+INMUTABLE = re.compile(r'(^|/)[0-9a-f]{64}(_\d+)?\.\w+$')
+RANGO = re.compile(r'^bytes=(\d*)-(\d*)$')
+BLOQUE = 64 * 1024
+
+BASE = ''
+
+def configurar():
+    # Se arma una sola vez al iniciar; las vistas y serializadores no consultan el sitio ni la petición
+    global BASE
+    if not settings.MEDIA_HOST:
+        raise ImproperlyConfigured('MEDIA_HOST debe ser un origen absoluto, por ejemplo https://api.saddwy.com')
+    BASE = f"{settings.MEDIA_HOST.rstrip('/')}/{settings.MEDIA_URL.strip('/')}/"
+
+def url(nombre):
+    # Igual que FileSystemStorage.url: espacios, #, ? y caracteres no ASCII se codifican
+    return f'{BASE}{filepath_to_uri(nombre)}' if nombre else None
+
+def rango(cabecera, tamano):
+    # Solo se admite un rango; None indica que la cabecera no aplica y se responde el archivo completo
+    coincidencia = RANGO.match(cabecera.strip())
+    if not coincidencia or coincidencia.groups() == ('', ''):
+        return None
+    inicio, fin = coincidencia.groups()
+    if inicio == '':
+        inicio, fin = max(tamano - int(fin), 0), tamano - 1
+    else:
+        inicio, fin = int(inicio), min(int(fin), tamano - 1) if fin else tamano - 1
+    if inicio > fin or inicio >= tamano:
+        return False
+    return inicio, fin
+
+def leer(archivo, longitud):
+    try:
+        while longitud > 0:
+            bloque = archivo.read(min(BLOQUE, longitud))
+            if not bloque:
+                break
+            longitud -= len(bloque)
+            yield bloque
+    finally:
+        archivo.close()
+
+def servir(request, ruta):
+    if request.method not in ('GET', 'HEAD'):
+        return HttpResponseNotAllowed(['GET', 'HEAD'])
+    try:
+        completa = safe_join(settings.MEDIA_ROOT, ruta)
+        estado = os.stat(completa)
+    except (SuspiciousFileOperation, OSError):
+        raise Http404
+    if not stat.S_ISREG(estado.st_mode):
+        raise Http404
+
+    etag = f'"{estado.st_mtime_ns:x}-{estado.st_size:x}"'
+    cabeceras = {
+        'ETag': etag,
+        'Last-Modified': http_date(estado.st_mtime),
+        'Accept-Ranges': 'bytes',
+        'Cache-Control': 'public, max-age=31536000, immutable' if INMUTABLE.search(ruta) else 'public, max-age=3600'
+    }
+    noneMatch = request.headers.get('If-None-Match')
+    if noneMatch is not None:
+        if etag in parse_etags(noneMatch) or noneMatch.strip() == '*':
+            return HttpResponseNotModified(headers = cabeceras)
+    elif not was_modified_since(request.headers.get('If-Modified-Since'), estado.st_mtime):
+        return HttpResponseNotModified(headers = cabeceras)
+
+    solicitado = request.headers.get('Range')
+    ifRange = request.headers.get('If-Range')
+    if solicitado and (ifRange is None or ifRange in (etag, cabeceras['Last-Modified'])):
+        limites = rango(solicitado, estado.st_size)
+        if limites is False:
+            return HttpResponse(status = 416, headers = {**cabeceras, 'Content-Range': f'bytes */{estado.st_size}'})
+        if limites:
+            inicio, fin = limites
+            archivo = open(completa, 'rb')
+            archivo.seek(inicio)
+            respuesta = StreamingHttpResponse(
+                leer(archivo, fin - inicio + 1),
+                status = 206,
+                content_type = mimetypes.guess_type(completa)[0] or 'application/octet-stream',
+                headers = cabeceras
+            )
+            respuesta['Content-Length'] = fin - inicio + 1
+            respuesta['Content-Range'] = f'bytes {inicio}-{fin}/{estado.st_size}'
+            return respuesta
+
+    # FileResponse usa wsgi.file_wrapper, que en los servidores que lo soportan envía el archivo con sendfile
+    return FileResponse(open(completa, 'rb'), headers = cabeceras)
+
+@receiver(setting_changed)
+def reconfigurar(setting, **kwargs):
+    if setting in ('MEDIA_HOST', 'MEDIA_URL'):
+        configurar()
+
+configurar()
@@ -0,0 +1,206 @@
+from django.conf import settings
+import atexit, bisect, json, os, tempfile, threading, time, uuid
+
+# Límites superiores en segundos de las cubetas de cada histograma
+CUBETAS = {
+    'api_solicitud_segundos': (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+    'api_correo_envio_segundos': (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+}
+DESCRIPCIONES = {
+    'api_solicitudes_total': ('counter', 'Solicitudes atendidas por vista, método y código de estado'),
+    'api_solicitud_segundos': ('histogram', 'Duración de las solicitudes por vista'),
+    'api_consultas_sql_total': ('counter', 'Consultas SQL ejecutadas por vista'),
+    'api_consultas_sql_segundos_total': ('counter', 'Tiempo acumulado en consultas SQL por vista'),
+    'api_correo_envio_segundos': ('histogram', 'Duración del envío SMTP de cada correo por tipo y resultado'),
+    'api_cache_total': ('counter', 'Búsquedas en caché por caché y resultado'),
+    'api_cache_aciertos_ratio': ('gauge', 'Proporción de aciertos de cada caché desde el arranque'),
+}
+
+# Cada hilo acumula en su propio diccionario: en la solicitud no se toma ningún candado
+_local = threading.local()
+_hilos = []
+_retirados = {}
+_registro = threading.Lock()
+_volcando = threading.Lock()
+_volcado = [0.0]
+# Pid e identificador del proceso actual; se renuevan en un proceso hijo de fork
+_proceso = [None, None]
+
+def _sumar(destino, clave, valor):
+    if isinstance(valor, list):
+        actual = destino.get(clave)
+        if actual is None:
+            destino[clave] = list(valor)
+        else:
+            for i, cantidad in enumerate(valor):
+                actual[i] += cantidad
+    else:
+        destino[clave] = destino.get(clave, 0) + valor
+
+def _retirar():
+    # Los hilos terminados se pliegan en _retirados para no acumular un diccionario por hilo
+    for hilo, valores in [par for par in _hilos if not par[0].is_alive()]:
+        _hilos.remove((hilo, valores))
+        for clave, valor in valores.items():
+            _sumar(_retirados, clave, valor)
+
+def _valores():
+    try:
+        return _local.valores
+    except AttributeError:
+        valores = _local.valores = {}
+        with _registro:
+            _retirar()
+            _hilos.append((threading.current_thread(), valores))
+        return valores
+
+def incrementar(nombre, etiquetas, valor = 1):
+    clave = (nombre, etiquetas)
+    valores = _valores()
+    valores[clave] = valores.get(clave, 0) + valor
+
+def observar(nombre, etiquetas, segundos):
+    clave = (nombre, etiquetas)
+    valores = _valores()
+    cubetas = CUBETAS[nombre]
+    # Una cantidad por cubeta (la última es +Inf) seguida de la suma de las observaciones
+    histograma = valores.get(clave)
+    if histograma is None:
+        histograma = valores[clave] = [0] * (len(cubetas) + 2)
+    histograma[bisect.bisect_left(cubetas, segundos)] += 1
+    histograma[-1] += segundos
+
+def solicitud(request, respuesta, segundos, consultas, segundosSql):
+    # Sin ruta resuelta se agrupa todo en una sola etiqueta para no crear una serie por URL
+    coincidencia = getattr(request, 'resolver_match', None)
+    vista = coincidencia.view_name if coincidencia else 'sin_ruta'
+    incrementar('api_solicitudes_total', (('vista', vista), ('metodo', request.method), ('estado', str(respuesta.status_code))))
+    observar('api_solicitud_segundos', (('vista', vista),), segundos)
+    incrementar('api_consultas_sql_total', (('vista', vista),), consultas)
+    incrementar('api_consultas_sql_segundos_total', (('vista', vista),), segundosSql)
+    volcar()
+
+def correo(tipo, enviado, segundos):
+    observar('api_correo_envio_segundos', (('tipo', tipo), ('resultado', 'enviado' if enviado else 'error')), segundos)
+
+def cache(nombre, acierto):
+    incrementar('api_cache_total', (('cache', nombre), ('resultado', 'acierto' if acierto else 'fallo')))
+
+def proceso():
+    with _registro:
+        _retirar()
+        total = {}
+        for clave, valor in _retirados.items():
+            _sumar(total, clave, valor)
+        for _, valores in _hilos:
+            # dict() copia sin ceder el GIL; un histograma puede leerse a mitad de una observación
+            for clave, valor in dict(valores).items():
+                _sumar(total, clave, valor)
+    return total
+
+def carpeta():
+    return getattr(settings, 'METRICAS_DIR', None)
+
+def identidad():
+    # El pid solo no basta: un pid reciclado sobrescribiría los totales de un proceso terminado
+    if _proceso[0] != os.getpid():
+        _proceso[:] = [os.getpid(), uuid.uuid4().hex[:12]]
+    return f'{_proceso[0]}-{_proceso[1]}'
+
+def archivo():
+    return os.path.join(carpeta(), f'{identidad()}.json')
+
+def volcar(forzar = False):
+    # En modo multiproceso cada proceso deja sus totales en METRICAS_DIR/<pid>-<id>.json
+    if not carpeta():
+        return
+    # Un solo hilo por proceso vuelca; los demás siguen sin esperar
+    if not _volcando.acquire(blocking = forzar):
+        return
+    try:
+        ahora = time.monotonic()
+        if not forzar and ahora - _volcado[0] < getattr(settings, 'METRICAS_INTERVALO', 10):
+            return
+        _volcado[0] = ahora
+        os.makedirs(carpeta(), exist_ok = True)
+        descriptor, temporal = tempfile.mkstemp(dir = carpeta(), prefix = f'{identidad()}.', suffix = '.tmp')
+        try:
+            with os.fdopen(descriptor, 'w') as destino:
+                json.dump([[nombre, etiquetas, valor] for (nombre, etiquetas), valor in proceso().items()], destino)
+            os.replace(temporal, archivo())
+        except BaseException:
+            os.unlink(temporal)
+            raise
+    finally:
+        _volcando.release()
+
+atexit.register(volcar, forzar = True)
+
+def recolectar():
+    total = proceso()
+    if not carpeta() or not os.path.isdir(carpeta()):
+        return total
+    propio = os.path.basename(archivo())
+    # Los archivos sin volcar en METRICAS_RETENCION segundos son de procesos terminados hace tiempo
+    limite = time.time() - getattr(settings, 'METRICAS_RETENCION', 60 * 60 * 24)
+    with os.scandir(carpeta()) as entradas:
+        for entrada in entradas:
+            if entrada.name == propio or not entrada.name.endswith(('.json', '.tmp')):
+                continue
+            try:
+                if entrada.stat().st_mtime < limite:
+                    os.remove(entrada.path)
+                    continue
+                if entrada.name.endswith('.tmp'):
+                    continue
+                with open(entrada.path) as origen:
+                    filas = json.load(origen)
+            except (OSError, ValueError):
+                continue
+            for nombre, etiquetas, valor in filas:
+                _sumar(total, (nombre, tuple(map(tuple, etiquetas))), valor)
+    return total
+
+def proporciones(total):
+    busquedas = {}
+    for (nombre, etiquetas), valor in total.items():
+        if nombre == 'api_cache_total':
+            etiquetas = dict(etiquetas)
+            aciertos, todas = busquedas.get(etiquetas['cache'], (0, 0))
+            busquedas[etiquetas['cache']] = (aciertos + (valor if etiquetas['resultado'] == 'acierto' else 0), todas + valor)
+    return {('api_cache_aciertos_ratio', (('cache', cache),)): aciertos / todas for cache, (aciertos, todas) in busquedas.items() if todas}
+
+def escapar(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def formatear(etiquetas):
+    if not etiquetas:
+        return ''
+    return '{' + ','.join(f'{nombre}="{escapar(valor)}"' for nombre, valor in etiquetas) + '}'
+
+def numero(valor):
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+def exponer():
+    # Formato de exposición de texto de Prometheus 0.0.4
+    total = recolectar()
+    total.update(proporciones(total))
+    grupos = {}
+    for (nombre, etiquetas), valor in sorted(total.items()):
+        grupos.setdefault(nombre, []).append((etiquetas, valor))
+    lineas = []
+    for nombre, series in grupos.items():
+        tipo, ayuda = DESCRIPCIONES[nombre]
+        lineas.append(f'# HELP {nombre} {ayuda}')
+        lineas.append(f'# TYPE {nombre} {tipo}')
+        for etiquetas, valor in series:
+            if tipo != 'histogram':
+                lineas.append(f'{nombre}{formatear(etiquetas)} {numero(valor)}')
+                continue
+            acumulado = 0
+            for limite, cantidad in zip((*CUBETAS[nombre], '+Inf'), valor[:-1]):
+                acumulado += cantidad
+                lineas.append(f'{nombre}_bucket{formatear((*etiquetas, ("le", limite)))} {acumulado}')
+            lineas.append(f'{nombre}_sum{formatear(etiquetas)} {numero(valor[-1])}')
+            lineas.append(f'{nombre}_count{formatear(etiquetas)} {acumulado}')
+    return '\n'.join(lineas) + '\n'
@@ -1,5 +1,7 @@
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager
 from django.db import models
+from django.utils import timezone
+from . import rachas
 
 # Create your models here.
 class UsuarioManager(BaseUserManager):
@@ -26,12 +28,8 @@ class Usuario(AbstractBaseUser):
     foto = models.ImageField(upload_to = 'usuario/')
     nombre = models.CharField(max_length = 30)
     correo = models.EmailField(unique = True)
-    racha = models.JSONField(default = {
-        'Lunes': False, 'Martes': False,
-        'Miercoles': False, 'Jueves': False,
-        'Viernes': False, 'Sábado': False,
-        'Domingo': False
-    })
+    # Un bit por día desde el registro; se escribe solo con rachas.registrar
+    actividad = models.BinaryField(default = b'', editable = False)
     estado = models.BooleanField(default = False)
     registro = models.DateField(auto_now_add = True)
     administrador = models.BooleanField(default = False)
@@ -39,8 +37,39 @@ class Usuario(AbstractBaseUser):
     USERNAME_FIELD = 'correo'
     REQUIRED_FIELDS = ['nombre', 'password']
 
+    class Meta:
+        indexes = [
+            models.Index(fields = ['correo', 'estado'], name = 'usuario_correo_estado_idx')
+        ]
+
     def str(self):
         return self.correo
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        # Nombre de la foto tal como se leyó, para generar los derivados solo cuando cambia
+        instancia = super().from_db(db, field_names, values)
+        instancia._imagenCargada = instancia.__dict__.get('foto')
+        return instancia
+
+    def save(self, *args, **kwargs):
+        # Los guardados completos no reescriben actividad para no pisar un registrar concurrente
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            diferidos = self.get_deferred_fields() | {'actividad'}
+            kwargs['update_fields'] = [campo.name for campo in self._meta.concrete_fields if not campo.primary_key and campo.attname not in diferidos]
+        super().save(*args, **kwargs)
+
+    @property
+    def racha(self):
+        return rachas.semana(self.actividad, self.registro, rachas.hoy())
+
+    @property
+    def rachaActual(self):
+        return rachas.rachaActual(self.actividad, self.registro, rachas.hoy())
+
+    @property
+    def rachaMaxima(self):
+        return rachas.rachaMaxima(self.actividad)
     
     def has_perm(self, perm, obj = None):
         return True
@@ -58,8 +87,24 @@ class Lenguaje(models.Model):
     color = models.JSONField()
     nombre = models.CharField(max_length = 50, unique = True)
     estado = models.BooleanField(default = False)
+    totalNiveles = models.PositiveIntegerField(default = 0)
+    # Momento de la última activación cuyo Progreso aún no crea el comando asignarProgresos
+    asignacionPendiente = models.DateTimeField(null = True, blank = True, editable = False)
     registro = models.DateField(auto_now_add = True)
 
+    class Meta:
+        indexes = [
+            # Django filtra los booleanos como WHERE "estado"; SQLite solo usa un índice parcial con esa misma condición
+            models.Index(fields = ['id'], condition = models.Q(estado = True), name = 'lenguaje_activo_idx')
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instancia = super().from_db(db, field_names, values)
+        instancia._estadoCargado = instancia.__dict__.get('estado')
+        instancia._imagenCargada = instancia.__dict__.get('logo')
+        return instancia
+
 class Nivel(models.Model):
     lenguaje = models.ForeignKey(Lenguaje, on_delete = models.CASCADE, limit_choices_to = {'estado': True})
     nombre = models.CharField(max_length = 50)
@@ -68,6 +113,18 @@ class Nivel(models.Model):
     estado = models.BooleanField(default = False)
     registro = models.DateField(auto_now_add = True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields = ['lenguaje', 'estado'], name = 'nivel_lenguaje_estado_idx')
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        # Estado y lenguaje tal como se leyeron, para ajustar Lenguaje.totalNiveles sin volver a contar
+        instancia = super().from_db(db, field_names, values)
+        instancia._cargado = (instancia.__dict__.get('estado'), instancia.__dict__.get('lenguaje_id'))
+        return instancia
+
 class Pregunta(models.Model):
     nivel = models.ForeignKey(Nivel, on_delete = models.CASCADE, limit_choices_to = {'estado': True})
     explanation = models.TextField()
@@ -76,21 +133,94 @@ class Pregunta(models.Model):
     estado = models.BooleanField(default = False)
     registro = models.DateField(auto_now_add = True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields = ['nivel', 'estado'], name = 'pregunta_nivel_estado_idx')
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        # Estado y nivel tal como se leyeron, para ajustar Nivel.totalPreguntas sin volver a contar
+        instancia = super().from_db(db, field_names, values)
+        instancia._cargado = (instancia.__dict__.get('estado'), instancia.__dict__.get('nivel_id'))
+        return instancia
+
 class Progreso(models.Model):
     usuario =  models.ForeignKey(Usuario, on_delete = models.CASCADE, limit_choices_to = {'estado': True})
     lenguaje = models.ForeignKey(Lenguaje, on_delete = models.CASCADE, limit_choices_to = {'estado': True})
     progresoLenguaje = models.PositiveIntegerField(default = 0)
     puntos = models.PositiveIntegerField(default = 0)
+    # Niveles completados en el lenguaje; se suma en la misma transacción que el NivelCompletado
+    nivelesTerminados = models.PositiveIntegerField(default = 0)
+    # Obsoleto: ya no se escribe; solo lo lee migrarNivelesCompletados hasta que todas las bases estén migradas
     nivelesCompletados = models.JSONField(default = dict)
     registro = models.DateTimeField(auto_now = True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields = ['usuario', 'lenguaje'], name = 'progreso_unico')
+        ]
+
+class NivelCompletado(models.Model):
+    usuario = models.ForeignKey(Usuario, on_delete = models.CASCADE)
+    nivel = models.ForeignKey(Nivel, on_delete = models.CASCADE)
+    puntos = models.PositiveIntegerField(default = 0)
+    completado = models.DateTimeField(default = timezone.now)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields = ['usuario', 'nivel'], name = 'nivelcompletado_unico')
+        ]
+        indexes = [
+            models.Index(fields = ['nivel', 'completado'], name = 'nivelcompletado_nivel_idx')
+        ]
+
+class Puntaje(models.Model):
+    usuario = models.OneToOneField(Usuario, on_delete = models.CASCADE, primary_key = True)
+    puntos = models.PositiveIntegerField(default = 0)
+    actualizado = models.DateTimeField(default = timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields = ['-puntos', 'actualizado', 'usuario'], name = 'puntaje_ranking_idx')
+        ]
     
 class FotoPredeterminada(models.Model):
     foto = models.ImageField(upload_to = 'predeterminado/')
     registro = models.DateTimeField(auto_now_add = True)
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instancia = super().from_db(db, field_names, values)
+        instancia._imagenCargada = instancia.__dict__.get('foto')
+        return instancia
+
 class Contactar(models.Model):
     nombre = models.CharField(max_length = 50)
     celular = models.CharField(max_length = 10)
     correo = models.EmailField()
     mensaje = models.TextField()
-    registro = models.DateTimeField(auto_now_add = True)
\ No newline at end of file
+    registro = models.DateTimeField(auto_now_add = True)
+
+class Correo(models.Model):
+    PENDIENTE = 'pendiente'
+    ENVIANDO = 'enviando'
+    ENVIADO = 'enviado'
+    FALLIDO = 'fallido'
+    ESTADOS = [(PENDIENTE, 'Pendiente'), (ENVIANDO, 'Enviando'), (ENVIADO, 'Enviado'), (FALLIDO, 'Fallido')]
+
+    asunto = models.CharField(max_length = 255)
+    mensaje = models.TextField()
+    remitente = models.EmailField()
+    destinatarios = models.JSONField(default = list)
+    estado = models.CharField(max_length = 10, choices = ESTADOS, default = PENDIENTE)
+    intentos = models.PositiveIntegerField(default = 0)
+    proximoIntento = models.DateTimeField(default = timezone.now)
+    lote = models.CharField(max_length = 32, blank = True)
+    error = models.TextField(blank = True)
+    registro = models.DateTimeField(auto_now_add = True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields = ['estado', 'proximoIntento'], name = 'correo_pendiente_idx')
+        ]
\ No newline at end of file
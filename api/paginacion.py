@@ -0,0 +1,27 @@
+from django.core import exceptions
+from django.db import models
+from rest_framework import filters, pagination, serializers
+
+class PaginacionCursor(pagination.CursorPagination):
+    # Paginación por llave sobre id: cada página es un rango del índice primario sin OFFSET
+    ordering = '-id'
+    page_size = 50
+    page_size_query_param = 'cantidad'
+    max_page_size = 500
+
+class FiltroCampos(filters.BaseFilterBackend):
+    # Filtra por igualdad sobre los campos declarados en el atributo filtros de la vista
+    def filter_queryset(self, request, queryset, view):
+        condiciones = {}
+        for campo in getattr(view, 'filtros', ()):
+            valor = request.query_params.get(campo)
+            if valor is None:
+                continue
+            modelo = queryset.model._meta.get_field(campo)
+            if isinstance(modelo, models.BooleanField):
+                valor = {'true': 'True', 'false': 'False'}.get(valor.lower(), valor)
+            try:
+                condiciones[modelo.attname] = modelo.to_python(valor)
+            except exceptions.ValidationError:
+                raise serializers.ValidationError({campo: f'El valor "{valor}" no es válido para este filtro'})
+        return queryset.filter(**condiciones)
@@ -0,0 +1,103 @@
+from .models import Usuario
+from django.conf import settings
+from rest_framework_simplejwt.authentication import JWTStatelessUserAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+import cProfile, os, re, sys, threading, time, uuid
+
+CABECERA = 'HTTP_X_PERFIL'
+PARAMETRO = 'perfil'
+NOMBRE = re.compile(r'^[\w.-]+\.(prof|txt)$')
+
+def carpeta():
+    return str(getattr(settings, 'PERFILES_DIR', settings.BASE_DIR / 'perfiles'))
+
+def solicitado(request):
+    return CABECERA in request.META or PARAMETRO in request.GET
+
+def esAdministrador(request):
+    # Se autentica solo cuando se pide el perfil; la bandera del token se confirma contra Usuario
+    try:
+        resultado = JWTStatelessUserAuthentication().authenticate(request)
+    except (InvalidToken, TokenError):
+        return False
+    if resultado is None:
+        return False
+    return Usuario.objects.filter(id = resultado[0].id, administrador = True, estado = True).exists()
+
+class Muestreo(threading.Thread):
+    # cProfile no guarda pilas completas; las pilas colapsadas (formato de flamegraph.pl) se obtienen
+    # muestreando el marco del hilo de la solicitud mientras el perfil está activo
+    def __init__(self, raiz, intervalo):
+        super().__init__(daemon = True)
+        self.hilo = threading.get_ident()
+        self.raiz = raiz
+        self.intervalo = intervalo
+        self.pilas = {}
+        self.detener = threading.Event()
+
+    def run(self):
+        while not self.detener.wait(self.intervalo):
+            marco = sys._current_frames().get(self.hilo)
+            pila = []
+            while marco is not None and marco is not self.raiz:
+                codigo = marco.f_code
+                pila.append(f'{codigo.co_name} ({os.path.basename(codigo.co_filename)}:{codigo.co_firstlineno})')
+                marco = marco.f_back
+            if pila:
+                clave = ';'.join(reversed(pila))
+                self.pilas[clave] = self.pilas.get(clave, 0) + 1
+
+    def terminar(self):
+        self.detener.set()
+        self.join()
+        return [f'{clave} {cantidad}' for clave, cantidad in self.pilas.items()]
+
+def guardar(perfil, pilas, request):
+    os.makedirs(carpeta(), exist_ok = True)
+    vista = request.resolver_match.view_name if getattr(request, 'resolver_match', None) else 'sin-vista'
+    vista = re.sub(r'[^\w-]', '-', vista)
+    base = f'{time.strftime("%Y%m%d-%H%M%S")}-{vista}-{uuid.uuid4().hex[:8]}'
+    ruta = os.path.join(carpeta(), base)
+    perfil.dump_stats(f'{ruta}.prof')
+    with open(f'{ruta}.txt', 'w', encoding = 'utf-8') as archivo:
+        archivo.write(''.join(f'{linea}\n' for linea in pilas))
+    podar()
+    return base
+
+def podar():
+    maximo = getattr(settings, 'PERFILES_MAXIMO', 200)
+    archivos = sorted(listar(), key = lambda archivo: archivo['modificado'], reverse = True)
+    for archivo in archivos[maximo * 2:]:
+        os.remove(os.path.join(carpeta(), archivo['nombre']))
+
+def listar():
+    if not os.path.isdir(carpeta()):
+        return []
+    archivos = []
+    with os.scandir(carpeta()) as entradas:
+        for entrada in entradas:
+            if entrada.is_file() and NOMBRE.match(entrada.name):
+                estado = entrada.stat()
+                archivos.append({'nombre': entrada.name, 'tamano': estado.st_size, 'modificado': estado.st_mtime})
+    return archivos
+
+class MiddlewarePerfil:
+    # Perfila la solicitud con cProfile si un administrador envía la cabecera X-Perfil o ?perfil=1.
+    # Las demás solicitudes solo pagan la búsqueda de la cabecera y del parámetro.
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not solicitado(request) or not esAdministrador(request):
+            return self.get_response(request)
+        muestreo = Muestreo(sys._getframe(), getattr(settings, 'PERFILES_INTERVALO_MS', 5) / 1000)
+        perfil = cProfile.Profile()
+        muestreo.start()
+        perfil.enable()
+        try:
+            respuesta = self.get_response(request)
+        finally:
+            perfil.disable()
+            pilas = muestreo.terminar()
+        respuesta['X-Perfil'] = guardar(perfil, pilas, request)
+        return respuesta
@@ -0,0 +1,40 @@
+from .models import Lenguaje, Progreso, Puntaje, Usuario
+from django.utils import timezone
+
+def asignar(usuario):
+    # Una sola consulta para los lenguajes activos que aún no tienen Progreso; sin escrituras si no falta ninguno
+    faltantes = list(Lenguaje.objects.filter(estado = True).exclude(progreso__usuario = usuario).values_list('id', flat = True))
+    if faltantes:
+        Progreso.objects.bulk_create([Progreso(usuario = usuario, lenguaje_id = lenguaje) for lenguaje in faltantes], ignore_conflicts = True)
+        Puntaje.objects.bulk_create([Puntaje(usuario = usuario)], ignore_conflicts = True)
+    return len(faltantes)
+
+def asignarLenguaje(lenguaje, lote = 1000):
+    usuarios = Usuario.objects.filter(estado = True, administrador = False).order_by('id').values_list('id', flat = True)
+    ultimo = 0
+    creados = 0
+    while True:
+        ids = list(usuarios.filter(id__gt = ultimo)[:lote])
+        if not ids:
+            return creados
+        existentes = set(Progreso.objects.filter(lenguaje_id = lenguaje, usuario_id__in = ids).values_list('usuario_id', flat = True))
+        nuevos = [Progreso(usuario_id = usuario, lenguaje_id = lenguaje) for usuario in ids if usuario not in existentes]
+        Progreso.objects.bulk_create(nuevos, ignore_conflicts = True)
+        Puntaje.objects.bulk_create([Puntaje(usuario_id = progreso.usuario_id) for progreso in nuevos], ignore_conflicts = True)
+        creados += len(nuevos)
+        ultimo = ids[-1]
+
+def marcarPendiente(lenguaje):
+    lenguaje.asignacionPendiente = timezone.now()
+    Lenguaje.objects.filter(id = lenguaje.id).update(asignacionPendiente = lenguaje.asignacionPendiente)
+
+def asignarPendientes(lote = 1000):
+    # La marca solo se borra si no cambió durante la asignación: una reactivación a mitad del
+    # recorrido deja el lenguaje pendiente para la siguiente ejecución
+    resultados = []
+    for lenguaje, nombre, estado, marca in Lenguaje.objects.filter(asignacionPendiente__isnull = False).values_list('id', 'nombre', 'estado', 'asignacionPendiente'):
+        # Un lenguaje desactivado antes de asignarse ya no necesita Progreso
+        creados = asignarLenguaje(lenguaje, lote = lote) if estado else 0
+        Lenguaje.objects.filter(id = lenguaje, asignacionPendiente = marca).update(asignacionPendiente = None)
+        resultados.append((nombre, creados))
+    return resultados
@@ -0,0 +1,65 @@
+import datetime
+
+# Bit i = actividad del día registro + i; el bit 0 es el bit menos significativo del primer byte
+DIAS = ('Lunes', 'Martes', 'Miercoles', 'Jueves', 'Viernes', 'Sábado', 'Domingo')
+REINTENTOS = 5
+
+def hoy():
+    # Misma fuente que DateField(auto_now_add) para que el día de registro sea el índice 0
+    return datetime.date.today()
+
+def indice(inicio, dia):
+    return (dia - inicio).days
+
+def valor(bits):
+    return int.from_bytes(bits or b'', 'little')
+
+def activo(bits, posicion):
+    return posicion >= 0 and bool(valor(bits) >> posicion & 1)
+
+def marcar(bits, posicion):
+    bits = bytearray(bits or b'')
+    if len(bits) <= posicion // 8:
+        bits.extend(bytes(posicion // 8 + 1 - len(bits)))
+    bits[posicion // 8] |= 1 << (posicion % 8)
+    return bytes(bits)
+
+def semana(bits, inicio, dia):
+    lunes = indice(inicio, dia) - dia.weekday()
+    numero = valor(bits)
+    return {nombre: posicion >= 0 and bool(numero >> posicion & 1) for posicion, nombre in enumerate(DIAS, lunes)}
+
+def rachaActual(bits, inicio, dia):
+    numero = valor(bits)
+    posicion = indice(inicio, dia)
+    # La racha sigue viva hasta que termina el día aunque hoy todavía no haya actividad
+    if not numero >> posicion & 1:
+        posicion -= 1
+    if posicion < 0:
+        return 0
+    huecos = ~numero & ((1 << (posicion + 1)) - 1)
+    return posicion - huecos.bit_length() + 1
+
+def rachaMaxima(bits):
+    # Cada vuelta acorta en uno todas las secuencias de unos; las vueltas dan la secuencia más larga
+    numero = valor(bits)
+    maxima = 0
+    while numero:
+        numero &= numero >> 1
+        maxima += 1
+    return maxima
+
+def registrar(usuario, dia = None):
+    dia = dia or hoy()
+    posicion = indice(usuario.registro, dia)
+    modelo = type(usuario)
+    for _ in range(REINTENTOS):
+        bits = bytes(usuario.actividad or b'')
+        if posicion < 0 or activo(bits, posicion):
+            return False
+        # Compare-and-swap sobre la columna: solo se escribe si nadie la cambió desde la lectura
+        if modelo.objects.filter(id = usuario.id, actividad = bits).update(actividad = marcar(bits, posicion)):
+            usuario.actividad = marcar(bits, posicion)
+            return True
+        usuario.actividad = modelo.objects.values_list('actividad', flat = True).get(id = usuario.id)
+    return False
@@ -1,28 +1,57 @@
 from .models import *
+from . import imagenes, medios
 from rest_framework import serializers
-from django.contrib.sites.shortcuts import get_current_site
 
-class UsuarioSerializer(serializers.ModelSerializer):
+class ImagenField(serializers.ImageField):
+    def to_representation(self, value):
+        return medios.url(value.name)
+
+class MiniaturasField(serializers.ReadOnlyField):
+    def to_representation(self, value):
+        if not value:
+            return None
+        return {tamano: medios.url(imagenes.nombreDerivado(value.name, tamano)) for tamano in imagenes.TAMANOS}
+
+class LlavePrimariaField(serializers.PrimaryKeyRelatedField):
+    # Con many = True el mismo campo valida todos los elementos; cada llave se consulta una sola vez
+    def to_internal_value(self, data):
+        resueltos = self.__dict__.setdefault('_resueltos', {})
+        if not isinstance(data, (int, str)):
+            return super().to_internal_value(data)
+        if data not in resueltos:
+            resueltos[data] = super().to_internal_value(data)
+        return resueltos[data]
+
+class MediosSerializer(serializers.ModelSerializer):
+    # Las imágenes se devuelven como URL absolutas construidas con MEDIA_HOST
+    serializer_field_mapping = {**serializers.ModelSerializer.serializer_field_mapping, models.ImageField: ImagenField}
+
+class UsuarioSerializer(MediosSerializer):
+    fotos = MiniaturasField(source = 'foto')
+    racha = serializers.ReadOnlyField()
+    rachaActual = serializers.ReadOnlyField()
+    rachaMaxima = serializers.ReadOnlyField()
+
     class Meta:
         model = Usuario
-        fields = ['foto', 'nombre', 'correo', 'password', 'racha', 'registro', 'administrador']
+        fields = ['foto', 'fotos', 'nombre', 'correo', 'password', 'racha', 'rachaActual', 'rachaMaxima', 'registro', 'administrador']
 
 class ProgresoSerializer(serializers.ModelSerializer):
     lenguajeLogo = serializers.SerializerMethodField()
+    lenguajeLogos = MiniaturasField(source = 'lenguaje.logo')
     lenguajeNombre = serializers.SerializerMethodField()
     
     def get_lenguajeLogo(self, obj):
-        current_site = get_current_site(self.context['request'])
-        return f"{self.context['request'].scheme}://{current_site}{obj.lenguaje.logo.url}"
+        return medios.url(obj.lenguaje.logo.name)
     
     def get_lenguajeNombre(self, obj):
         return obj.lenguaje.nombre
     
     class Meta:
         model = Progreso
-        fields = ['lenguajeLogo', 'lenguajeNombre', 'progresoLenguaje']
+        fields = ['lenguajeLogo', 'lenguajeLogos', 'lenguajeNombre', 'progresoLenguaje']
     
-class LenguajeSerializer(serializers.ModelSerializer):
+class LenguajeSerializer(MediosSerializer):
     class Meta:
         model = Lenguaje
         fields = ['logo', 'urlDocumentation', 'color', 'nombre']
@@ -42,29 +71,33 @@ class PreguntaSerializer(serializers.ModelSerializer):
         model = Pregunta
         fields = ['nivel', 'explanation', 'pregunta', 'respuesta']
 
-class CartaSerializer(serializers.ModelSerializer):
+class CartaSerializer(MediosSerializer):
+    logos = MiniaturasField(source = 'logo')
     niveles = NivelSerializer(many = True, read_only = True, source = 'nivel_set')
     
     class Meta:
         model = Lenguaje
-        fields = ['logo', 'urlDocumentation', 'color', 'nombre', 'niveles']
+        fields = ['logo', 'logos', 'urlDocumentation', 'color', 'nombre', 'niveles']
     
 class ContactarSerializer(serializers.ModelSerializer):
     class Meta:
         model = Contactar
         fields = '__all__'
 
-class UsuarioSerializerAdmin(serializers.ModelSerializer):
+class UsuarioSerializerAdmin(MediosSerializer):
+    racha = serializers.ReadOnlyField()
+
     class Meta:
         model = Usuario
-        fields = '__all__'
+        exclude = ['actividad']
 
-class LenguajeSerializerAdmin(serializers.ModelSerializer):
+class LenguajeSerializerAdmin(MediosSerializer):
     class Meta:
         model = Lenguaje
         fields = '__all__'
 
 class NivelSerializerAdmin(serializers.ModelSerializer):
+    serializer_related_field = LlavePrimariaField
     lenguajeNombre = serializers.SerializerMethodField()
     
     def get_lenguajeNombre(self, obj):
@@ -75,6 +108,7 @@ class NivelSerializerAdmin(serializers.ModelSerializer):
         fields = ['id', 'nombre', 'explanation', 'totalPreguntas', 'estado', 'registro', 'lenguaje', 'lenguajeNombre']
 
 class PreguntaSerializerAdmin(serializers.ModelSerializer):
+    serializer_related_field = LlavePrimariaField
     nivelNombre = serializers.SerializerMethodField()
     
     def get_nivelNombre(self, obj):
@@ -96,9 +130,24 @@ class ProgresoSerializerAdmin(serializers.ModelSerializer):
 
     class Meta:
         model = Progreso
-        fields = ['id', 'usuario', 'usuarioNombre', 'lenguaje', 'lenguajeNombre', 'progresoLenguaje', 'puntos', 'nivelesPermitidos', 'registro']
+        fields = ['id', 'usuario', 'usuarioNombre', 'lenguaje', 'lenguajeNombre', 'progresoLenguaje', 'puntos', 'registro']
+
+class NivelCompletadoSerializerAdmin(serializers.ModelSerializer):
+    serializer_related_field = LlavePrimariaField
+    usuarioNombre = serializers.SerializerMethodField()
+    nivelNombre = serializers.SerializerMethodField()
+
+    def get_usuarioNombre(self, obj):
+        return obj.usuario.nombre
+
+    def get_nivelNombre(self, obj):
+        return obj.nivel.nombre
+
+    class Meta:
+        model = NivelCompletado
+        fields = ['id', 'usuario', 'usuarioNombre', 'nivel', 'nivelNombre', 'puntos', 'completado']
 
-class FotoSerializerAdmin(serializers.ModelSerializer):
+class FotoSerializerAdmin(MediosSerializer):
     class Meta:
         model = FotoPredeterminada
         fields = '__all__'
\ No newline at end of file
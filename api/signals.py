@@ -1,10 +1,79 @@
 from .models import *
+from . import catalogo, contadores, imagenes, progresos, sqlite
+from django.db.backends.signals import connection_created
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
+import logging
+
+logger = logging.getLogger(__name__)
+
+connection_created.connect(sqlite.configurarConexion)
+
+# Hijo -> (padre, contador en el padre, relación)
+CONTADORES = {
+    Pregunta: (Nivel, 'totalPreguntas', 'nivel'),
+    Nivel: (Lenguaje, 'totalNiveles', 'lenguaje'),
+}
 
 @receiver(post_save, sender = Pregunta)
+@receiver(post_save, sender = Nivel)
+def actualizarContadores(sender, instance, created, **kwargs):
+    if contadores.estaSuspendido():
+        return
+    modelo, campo, relacion = CONTADORES[sender]
+    actual = (instance.estado, getattr(instance, f'{relacion}_id'))
+    anterior = (False, None) if created else getattr(instance, '_cargado', None)
+    if anterior is None:
+        # Instancia construida a mano: sin estado previo conocido se recuenta solo su padre
+        contadores.recontar(modelo, campo, sender, relacion, [actual[1]])
+    else:
+        contadores.mover(modelo, campo, anterior, actual)
+    instance._cargado = actual
+
 @receiver(post_delete, sender = Pregunta)
-def actualizarCantidadNiveles(sender, instance, **kwargs):
-    instancePregunta = instance.nivel
-    instancePregunta.totalPreguntas = Pregunta.objects.filter(nivel = instancePregunta, estado = True).count()
-    instancePregunta.save()
\ No newline at end of file
+@receiver(post_delete, sender = Nivel)
+def descontarContadores(sender, instance, **kwargs):
+    if contadores.estaSuspendido():
+        return
+    modelo, campo, relacion = CONTADORES[sender]
+    anterior = getattr(instance, '_cargado', (instance.estado, getattr(instance, f'{relacion}_id')))
+    contadores.mover(modelo, campo, anterior, (False, None))
+
+@receiver(post_save, sender = Lenguaje)
+@receiver(post_delete, sender = Lenguaje)
+@receiver(post_save, sender = Nivel)
+@receiver(post_delete, sender = Nivel)
+def invalidarCatalogo(sender, instance, **kwargs):
+    catalogo.invalidar()
+
+@receiver(post_save, sender = Lenguaje)
+def asignarProgresosLenguaje(sender, instance, created, **kwargs):
+    # Solo cuando el lenguaje pasa a estar activo. La marca se guarda en la misma transacción y el
+    # comando asignarProgresos la borra al terminar, así una asignación interrumpida se retoma
+    if instance.estado and (created or not getattr(instance, '_estadoCargado', False)):
+        progresos.marcarPendiente(instance)
+    instance._estadoCargado = instance.estado
+
+# Modelo -> campo de imagen con derivados
+IMAGENES = {
+    Usuario: 'foto',
+    Lenguaje: 'logo',
+    FotoPredeterminada: 'foto',
+}
+
+@receiver(post_save, sender = Usuario)
+@receiver(post_save, sender = Lenguaje)
+@receiver(post_save, sender = FotoPredeterminada)
+def generarDerivados(sender, instance, update_fields = None, **kwargs):
+    # Solo cuando la imagen cambió respecto de la leída en from_db; los demás guardados no la tocan
+    campo = IMAGENES[sender]
+    if (update_fields is not None and campo not in update_fields) or campo in instance.get_deferred_fields():
+        return
+    nombre = getattr(instance, campo).name
+    if hasattr(instance, '_imagenCargada') and getattr(instance._imagenCargada, 'name', instance._imagenCargada) == nombre:
+        return
+    instance._imagenCargada = nombre
+    try:
+        imagenes.generar(nombre)
+    except imagenes.ERRORES:
+        logger.exception('No se pudieron generar los derivados de %s', nombre)
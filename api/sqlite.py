@@ -0,0 +1,15 @@
+from django.conf import settings
+
+def pragmas():
+    return getattr(settings, 'SQLITE_PRAGMAS', {})
+
+def aplicar(cursor, valores):
+    for nombre, valor in valores.items():
+        cursor.execute(f'PRAGMA {nombre} = {valor}')
+
+def configurarConexion(sender, connection, **kwargs):
+    # Se ejecuta una vez por conexión nueva; con CONN_MAX_AGE la conexión se reutiliza entre solicitudes
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        aplicar(cursor, pragmas())
@@ -1,3 +1,1282 @@
-from django.test import TestCase
+from .models import *
+from . import autenticacion, clasificacion, completados, correos, enrutador, idempotencia, imagenes, instrumentacion, limites, medios, metricas, perfilado, progresos, rachas, validaciones
+from .management.commands.benchmarkValidaciones import validarPasswordAnterior
+from .management.commands.generarDatos import CLAVE
+from django.conf import settings
+from django.core import mail
+from django.core.cache import cache, caches
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.db import connection, connections
+from django.db.models import Count, Q
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from PIL import Image
+from rest_framework_simplejwt import tokens
+from unittest import mock
+import csv, datetime, io, json, jwt, os, re, shutil, smtplib, statistics, tempfile, threading, time
 
-# Create your tests here.
\ No newline at end of file
+# Una línea "SCAN tabla" (o "SCAN TABLE tabla" antes de SQLite 3.36) sin "USING ... INDEX" es un recorrido completo de la tabla
+RECORRIDO_COMPLETO = re.compile(r'^SCAN (TABLE )?(\w+)$')
+# Tablas de pocas filas que se recorren a propósito (register elige una foto predeterminada al azar)
+RECORRIDOS_ADMITIDOS = {'api_fotopredeterminada'}
+
+class ValidacionesTest(SimpleTestCase):
+    nombre = 'Nombre De Prueba'
+    correo = 'nombredeprueba@gmail.com'
+
+    def test_mensajes_de_la_politica(self):
+        casos = {
+            'Aa1#': 'mínimo de 8 caracteres',
+            'Abcdef1# x': 'no contenga espacios',
+            'abcdef1#': 'letra mayúscula',
+            'ABCDEF1#': 'letra minúscula',
+            'Abcdefg#': 'un número',
+            'Abcdefg1': 'carácter especial',
+            'Nombre#De#Prueba1': 'información personal',
+        }
+        for password, mensaje in casos.items():
+            with self.subTest(password = password):
+                self.assertIn(mensaje, validaciones.validarPassword(password, self.nombre, self.correo))
+        self.assertIsNone(validaciones.validarPassword('Progr4ma#Seguro', self.nombre, self.correo))
+
+    def test_igual_a_la_politica_anterior(self):
+        # La comparación usa la contraseña completa, también después del carácter 64
+        passwords = [
+            'Progr4ma#Seguro',
+            'Nombre#De#Prueba1',
+            'Nombredeprueba@gmail.com1',
+            'Xx1#' + 'a' * 70 + 'nombredeprueba',
+            'Xx1#' + 'a' * 60 + 'Nombre#De#Prueba@gmail.com',
+            'Aa1#' + 'nombredeprueba' * 700,
+        ]
+        for password in passwords:
+            with self.subTest(password = password[:40]):
+                self.assertEqual(
+                    validaciones.validarPassword(password, self.nombre, self.correo) is None,
+                    validarPasswordAnterior(password, self.nombre, self.correo) is None
+                )
+
+    def test_similar_compara_mas_alla_del_caracter_64(self):
+        correo = 'usuario.con.un.correo.electronico.bastante.largo.para.la.prueba@saddwy.test'
+        self.assertTrue(validaciones.similar(correo, 'Z' * 64 + correo))
+        self.assertFalse(validaciones.similar(self.nombre, 'Aa1#' + 'nombredeprueba' * 700))
+
+class RachasTest(SimpleTestCase):
+    inicio = datetime.date(2024, 1, 3)
+
+    def bits(self, *posiciones):
+        bits = b''
+        for posicion in posiciones:
+            bits = rachas.marcar(bits, posicion)
+        return bits
+
+    def dia(self, posicion):
+        return self.inicio + datetime.timedelta(days = posicion)
+
+    def test_marcar_entre_bytes(self):
+        bits = self.bits(0, 7, 8, 23)
+        self.assertEqual(len(bits), 3)
+        self.assertEqual([posicion for posicion in range(30) if rachas.activo(bits, posicion)], [0, 7, 8, 23])
+        self.assertFalse(rachas.activo(bits, -1))
+        self.assertEqual(rachas.marcar(bits, 7), bits)
+
+    def test_semana_se_desplaza_con_el_dia(self):
+        # El registro fue un miércoles: lunes y martes de esa semana son anteriores al registro
+        bits = self.bits(0, 1, 5, 6)
+        self.assertEqual(rachas.semana(bits, self.inicio, self.dia(1)), {'Lunes': False, 'Martes': False, 'Miercoles': True, 'Jueves': True, 'Viernes': False, 'Sábado': False, 'Domingo': False})
+        self.assertEqual(rachas.semana(bits, self.inicio, self.dia(7)), {'Lunes': True, 'Martes': True, 'Miercoles': False, 'Jueves': False, 'Viernes': False, 'Sábado': False, 'Domingo': False})
+        self.assertFalse(any(rachas.semana(bits, self.inicio, self.dia(14)).values()))
+
+    def test_racha_actual(self):
+        bits = self.bits(0, 1, 2, 4, 5, 6, 7, 8)
+        self.assertEqual(rachas.rachaActual(bits, self.inicio, self.dia(8)), 5)
+        # Al cambiar de día la racha sigue viva hasta que termina el día sin actividad
+        self.assertEqual(rachas.rachaActual(bits, self.inicio, self.dia(9)), 5)
+        self.assertEqual(rachas.rachaActual(bits, self.inicio, self.dia(10)), 0)
+        self.assertEqual(rachas.rachaActual(bits, self.inicio, self.dia(2)), 3)
+        self.assertEqual(rachas.rachaActual(bits, self.inicio, self.dia(3)), 3)
+        self.assertEqual(rachas.rachaActual(b'', self.inicio, self.inicio), 0)
+        self.assertEqual(rachas.rachaActual(self.bits(*range(20)), self.inicio, self.dia(19)), 20)
+
+    def test_racha_maxima_con_huecos(self):
+        self.assertEqual(rachas.rachaMaxima(b''), 0)
+        self.assertEqual(rachas.rachaMaxima(self.bits(0, 2, 4)), 1)
+        self.assertEqual(rachas.rachaMaxima(self.bits(0, 1, 2, 10, 11, 12, 13, 14, 15, 16, 17, 18, 30, 31)), 9)
+
+# Máximo de consultas SQL por solicitud en cada endpoint de v01/. Si un cambio agrega
+# consultas (por ejemplo un N+1 en profile, ranking o cards) la prueba falla; si el aumento
+# es intencional se actualiza aquí el presupuesto.
+PRESUPUESTOS = {
+    'register': 7,
+    'validate': 6,
+    'login': 3,
+    'start': 2,
+    'ranking': 3,
+    'edit': 2,
+    'questions GET': 2,
+    'questions POST': 6,
+    'profile': 2,
+    'contact': 1,
+    'recovery': 3,
+    'recover': 3,
+    'export': 1,
+    # Incluye la consulta de estado y administrador de RefrescoSerializer
+    'refresh': 5,
+    'documentation': 0,
+    'metrics': 0,
+    'admin users': 1,
+    'admin languages': 1,
+    'admin levels': 1,
+    'admin questions': 1,
+    'admin progress': 1,
+    'admin completions': 1,
+    'admin photos': 1,
+    'admin contact': 1,
+}
+REPETICIONES = 15
+
+def imagen(color = (200, 40, 40)):
+    contenido = io.BytesIO()
+    Image.new('RGB', (64, 64), color).save(contenido, 'PNG')
+    return ContentFile(contenido.getvalue(), name = 'foto.png')
+
+# El hasher rápido evita que PBKDF2 domine la latencia de login y register; las pruebas repiten
+# solicitudes por encima de los límites, que se desactivan salvo en las pruebas de los límites
+@override_settings(PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher'], LIMITES = {})
+class PruebaApi(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.medios = tempfile.mkdtemp()
+        cls.ajustes = override_settings(MEDIA_ROOT = cls.medios)
+        cls.ajustes.enable()
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls.ajustes.disable()
+        shutil.rmtree(cls.medios, ignore_errors = True)
+
+    def setUp(self):
+        cache.clear()
+
+    @staticmethod
+    def crearUsuario(correo, administrador = False):
+        usuario = Usuario.objects.create_user(correo, 'Usuario De Prueba', CLAVE)
+        Usuario.objects.filter(id = usuario.id).update(estado = True, administrador = administrador)
+        return Usuario.objects.get(id = usuario.id)
+
+    @staticmethod
+    def crearLenguaje(nombre = 'Python', estado = True):
+        return Lenguaje.objects.create(logo = imagen(), urlDocumentation = 'https://docs.python.org', color = {}, nombre = nombre, estado = estado)
+
+    @staticmethod
+    def crearNivel(lenguaje, estado = True, preguntas = 0):
+        nivel = Nivel.objects.create(lenguaje = lenguaje, nombre = 'Nivel', explanation = 'Explicación', estado = estado)
+        for _ in range(preguntas):
+            Pregunta.objects.create(nivel = nivel, explanation = 'Explicación', pregunta = '¿?', respuesta = {}, estado = True)
+        return nivel
+
+    @staticmethod
+    def autorizar(usuario):
+        return {'HTTP_AUTHORIZATION': f'Token {autenticacion.generarToken(usuario).access_token}'}
+
+    def comprobarContadores(self):
+        # Los contadores desnormalizados deben coincidir con un COUNT real de los hijos activos
+        for nivel in Nivel.objects.annotate(real = Count('pregunta', filter = Q(pregunta__estado = True))):
+            self.assertEqual(nivel.totalPreguntas, nivel.real, f'Nivel {nivel.id}')
+        for lenguaje in Lenguaje.objects.annotate(real = Count('nivel', filter = Q(nivel__estado = True))):
+            self.assertEqual(lenguaje.totalNiveles, lenguaje.real, f'Lenguaje {lenguaje.id}')
+
+class PlanConsultasTest(PruebaApi):
+    # Las consultas de las rutas más usadas deben resolverse con índices; si alguna vuelve a recorrer
+    # la tabla completa la prueba lo reporta con su plan. Se explican las consultas que ejecutan las
+    # propias vistas, capturadas al llamarlas, y no copias que pueden quedar desactualizadas.
+    def setUp(self):
+        super().setUp()
+        FotoPredeterminada.objects.create(foto = imagen())
+        self.usuario = self.crearUsuario('plan@saddwy.test')
+        self.lenguaje = self.crearLenguaje()
+        self.nivel = self.crearNivel(self.lenguaje, preguntas = 3)
+        self.crearNivel(self.lenguaje, preguntas = 3)
+        self.crearLenguaje('JavaScript')
+        progresos.asignar(self.usuario)
+        self.cabeceras = self.autorizar(self.usuario)
+
+    def solicitudes(self):
+        json = {'content_type': 'application/json'}
+        return {
+            'login': lambda: self.client.post('/api/v01/login/', {'correo': self.usuario.correo, 'password': CLAVE}, **json),
+            'register': lambda: self.client.post('/api/v01/register/', {'nombre': 'Usuario Registrado', 'correo': 'nuevo@saddwy.test', 'password': 'Registro#2024x'}, **json),
+            'start': lambda: self.client.get('/api/v01/start/', **self.cabeceras),
+            'questions GET': lambda: self.client.get(f'/api/v01/questions/{self.nivel.id}/', **self.cabeceras),
+            'questions POST': lambda: self.client.post(f'/api/v01/questions/{self.nivel.id}/', {'intentos': 3}, **json, **self.cabeceras),
+            'profile': lambda: self.client.get('/api/v01/profile/', **self.cabeceras),
+            'ranking': lambda: self.client.get('/api/v01/ranking/', **self.cabeceras),
+            'correos pendientes': lambda: correos.reclamar(10),
+        }
+
+    def plan(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            return [fila[-1] for fila in cursor.fetchall()]
+
+    def test_sin_recorridos_completos(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('EXPLAIN QUERY PLAN es propio de SQLite')
+        correos.encolar('Asunto', 'Mensaje', ['destino@saddwy.test'])
+        for nombre, solicitud in self.solicitudes().items():
+            with CaptureQueriesContext(connection) as capturadas:
+                resultado = solicitud()
+            if hasattr(resultado, 'status_code'):
+                self.assertLess(resultado.status_code, 400, f'{nombre}: {resultado.content[:300]}')
+            consultas = [consulta['sql'] for consulta in capturadas.captured_queries if consulta['sql'].startswith('SELECT')]
+            self.assertTrue(consultas, nombre)
+            for sql in consultas:
+                with self.subTest(endpoint = nombre, sql = sql):
+                    plan = self.plan(sql)
+                    recorridos = [paso for paso in plan if RECORRIDO_COMPLETO.match(paso) and RECORRIDO_COMPLETO.match(paso)[2] not in RECORRIDOS_ADMITIDOS]
+                    self.assertFalse(recorridos, f'{nombre} recorre la tabla completa:\n{sql}\n' + '\n'.join(plan))
+
+class CatalogoTest(PruebaApi):
+    def setUp(self):
+        super().setUp()
+        self.lenguaje = self.crearLenguaje()
+        self.nivel = self.crearNivel(self.lenguaje)
+        self.cabeceras = self.autorizar(self.crearUsuario('catalogo@saddwy.test'))
+
+    def etag(self):
+        respuesta = self.client.get('/api/v01/start/', **self.cabeceras)
+        self.assertEqual(respuesta.status_code, 200)
+        return respuesta['ETag']
+
+    def test_if_none_match_responde_304_sin_consultas(self):
+        etag = self.etag()
+        with self.assertNumQueries(0):
+            respuesta = self.client.get('/api/v01/start/', HTTP_IF_NONE_MATCH = etag, **self.cabeceras)
+        self.assertEqual(respuesta.status_code, 304)
+        self.assertEqual(respuesta['ETag'], etag)
+        self.assertEqual(self.client.get('/api/v01/start/', HTTP_IF_NONE_MATCH = '"otro"', **self.cabeceras).status_code, 200)
+
+    def renombrar(self, modelo, id):
+        instancia = modelo.objects.get(id = id)
+        instancia.nombre = f'{instancia.nombre} Renombrado'
+        instancia.save()
+
+    def test_etag_cambia_al_modificar_el_catalogo(self):
+        # El ETag es el hash del cuerpo: cada cambio debe invalidar la versión en caché y cambiar el contenido
+        cambios = {
+            'guardar lenguaje': lambda: self.renombrar(Lenguaje, self.lenguaje.id),
+            'guardar nivel': lambda: self.renombrar(Nivel, self.nivel.id),
+            'eliminar nivel': lambda: self.nivel.delete(),
+            'eliminar lenguaje': lambda: self.lenguaje.delete(),
+        }
+        for nombre, cambio in cambios.items():
+            with self.subTest(cambio = nombre):
+                anterior = self.etag()
+                cambio()
+                respuesta = self.client.get('/api/v01/start/', HTTP_IF_NONE_MATCH = anterior, **self.cabeceras)
+                self.assertEqual(respuesta.status_code, 200)
+                self.assertNotEqual(respuesta['ETag'], anterior)
+
+class AsignacionProgresosTest(PruebaApi):
+    def test_activar_lenguaje_deja_la_asignacion_pendiente(self):
+        usuario = self.crearUsuario('progreso@saddwy.test')
+        lenguaje = self.crearLenguaje(estado = False)
+        lenguaje.estado = True
+        lenguaje.save()
+        lenguaje.refresh_from_db()
+        self.assertIsNotNone(lenguaje.asignacionPendiente)
+        self.assertFalse(Progreso.objects.filter(usuario = usuario, lenguaje = lenguaje).exists())
+
+        call_command('asignarProgresos', stdout = io.StringIO())
+        lenguaje.refresh_from_db()
+        self.assertIsNone(lenguaje.asignacionPendiente)
+        self.assertTrue(Progreso.objects.filter(usuario = usuario, lenguaje = lenguaje).exists())
+
+    def test_asignacion_interrumpida_sigue_pendiente(self):
+        self.crearUsuario('progreso@saddwy.test')
+        lenguaje = self.crearLenguaje()
+        with mock.patch('api.progresos.asignarLenguaje', side_effect = RuntimeError('interrumpido')):
+            with self.assertRaises(RuntimeError):
+                call_command('asignarProgresos', stdout = io.StringIO())
+        lenguaje.refresh_from_db()
+        self.assertIsNotNone(lenguaje.asignacionPendiente)
+
+    def test_reactivacion_durante_la_asignacion_no_borra_la_marca(self):
+        lenguaje = self.crearLenguaje()
+        def reactivar(id, lote):
+            progresos.marcarPendiente(Lenguaje.objects.get(id = id))
+            return 0
+        with mock.patch('api.progresos.asignarLenguaje', side_effect = reactivar):
+            call_command('asignarProgresos', stdout = io.StringIO())
+        lenguaje.refresh_from_db()
+        self.assertIsNotNone(lenguaje.asignacionPendiente)
+
+class CorreosTest(PruebaApi):
+    # El ejecutor de pruebas usa el backend locmem: los correos entregados quedan en mail.outbox
+    def encolar(self, cantidad):
+        return [correos.encolar(correos.ASUNTO_REGISTRO, f'Mensaje {numero}', [f'destino{numero}@saddwy.test']) for numero in range(cantidad)]
+
+    def test_worker_envia_y_marca_los_correos(self):
+        self.encolar(3)
+        call_command('enviarCorreos', stdout = io.StringIO())
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertEqual(set(Correo.objects.values_list('estado', 'intentos')), {(Correo.ENVIADO, 1)})
+
+    def test_reclamar_reserva_el_lote_hasta_que_vence(self):
+        self.encolar(3)
+        primero = correos.reclamar(2, bloqueo = 300)
+        self.assertEqual(len(primero), 2)
+        self.assertEqual(len({correo.lote for correo in primero}), 1)
+        segundo = correos.reclamar(5)
+        self.assertEqual([correo.id for correo in segundo], [Correo.objects.exclude(id__in = [correo.id for correo in primero]).get().id])
+        self.assertEqual(correos.reclamar(5), [])
+        # Un lote abandonado vuelve a estar disponible al vencer su reserva
+        Correo.objects.filter(id__in = [correo.id for correo in primero]).update(proximoIntento = timezone.now())
+        self.assertEqual(len(correos.reclamar(5)), 2)
+
+    def test_reintento_con_espera_exponencial_y_maximo(self):
+        correo, = self.encolar(1)
+        with mock.patch('django.core.mail.backends.locmem.EmailBackend.send_messages', side_effect = smtplib.SMTPException('caído')):
+            for intento, espera in ((1, 30), (2, 60)):
+                antes = timezone.now()
+                correos.enviar(correos.reclamar(1), mail.get_connection(), maxIntentos = 3, base = 30)
+                correo.refresh_from_db()
+                self.assertEqual((correo.estado, correo.intentos, correo.error), (Correo.PENDIENTE, intento, 'caído'))
+                self.assertAlmostEqual((correo.proximoIntento - antes).total_seconds(), espera, delta = 2)
+                Correo.objects.filter(id = correo.id).update(proximoIntento = timezone.now())
+            correos.enviar(correos.reclamar(1), mail.get_connection(), maxIntentos = 3, base = 30)
+        correo.refresh_from_db()
+        self.assertEqual((correo.estado, correo.intentos), (Correo.FALLIDO, 3))
+        self.assertEqual(correos.reclamar(1), [])
+
+    def test_correos_entregados_no_se_reenvian_si_el_lote_se_interrumpe(self):
+        self.encolar(2)
+        original = mail.get_connection().__class__.send_messages
+        envios = []
+        def enviarUno(conexion, mensajes):
+            if envios:
+                raise KeyboardInterrupt
+            envios.append(mensajes)
+            return original(conexion, mensajes)
+        with mock.patch('django.core.mail.backends.locmem.EmailBackend.send_messages', enviarUno):
+            with self.assertRaises(KeyboardInterrupt):
+                correos.enviar(correos.reclamar(2), mail.get_connection())
+        self.assertEqual(list(Correo.objects.order_by('id').values_list('estado', flat = True)), [Correo.ENVIADO, Correo.ENVIANDO])
+
+class AutenticacionTest(PruebaApi):
+    def setUp(self):
+        super().setUp()
+        self.usuario = self.crearUsuario('estudiante@saddwy.test')
+        self.administrador = self.crearUsuario('admin@saddwy.test', administrador = True)
+
+    def refrescar(self, refresco):
+        return self.client.post('/api/v01/refresh/', {'refresh': str(refresco)}, content_type = 'application/json')
+
+    def test_claim_administrador_decide_el_acceso_sin_consultar_usuario(self):
+        administrador, usuario = self.autorizar(self.administrador), self.autorizar(self.usuario)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get('/api/v01/profiles/', **administrador).status_code, 200)
+            self.assertEqual(self.client.get('/api/v01/profiles/', **usuario).status_code, 403)
+
+    def test_usuario_se_consulta_una_sola_vez(self):
+        usuario = autenticacion.UsuarioToken(autenticacion.generarToken(self.usuario).access_token)
+        with self.assertNumQueries(1):
+            self.assertEqual(usuario.usuario.correo, self.usuario.correo)
+            self.assertIs(usuario.usuario, usuario.usuario)
+        self.assertFalse(usuario.administrador)
+
+    def test_usuario_desactivado_conserva_el_acceso_hasta_que_vence(self):
+        refresco = autenticacion.generarToken(self.usuario)
+        cabeceras = {'HTTP_AUTHORIZATION': f'Token {refresco.access_token}'}
+        Usuario.objects.filter(id = self.usuario.id).update(estado = False)
+        # Ventana de revocación documentada en SIMPLE_JWT: el token de acceso sigue siendo válido
+        self.assertEqual(self.client.get('/api/v01/start/', **cabeceras).status_code, 200)
+        self.assertEqual(self.refrescar(refresco).status_code, 401)
+
+    def test_refresco_actualiza_el_claim_administrador(self):
+        refresco = autenticacion.generarToken(self.usuario)
+        Usuario.objects.filter(id = self.usuario.id).update(administrador = True)
+        self.assertEqual(self.client.get('/api/v01/profiles/', HTTP_AUTHORIZATION = f'Token {refresco.access_token}').status_code, 403)
+        respuesta = self.refrescar(refresco)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertTrue(tokens.AccessToken(respuesta.json()['access'])['administrador'])
+        self.assertTrue(tokens.RefreshToken(respuesta.json()['refresh'])['administrador'])
+        self.assertEqual(self.client.get('/api/v01/profiles/', HTTP_AUTHORIZATION = f'Token {respuesta.json()["access"]}').status_code, 200)
+        # El refresco usado queda en la lista negra
+        self.assertEqual(self.refrescar(refresco).status_code, 401)
+
+class MediosTest(PruebaApi):
+    def test_url_codifica_el_nombre(self):
+        with self.settings(MEDIA_HOST = 'https://cdn.saddwy.test/'):
+            self.assertEqual(medios.url('usuario/mi foto#1?.png'), 'https://cdn.saddwy.test/imagenes/usuario/mi%20foto%231%3F.png')
+            self.assertEqual(medios.url('usuario/año.png'), 'https://cdn.saddwy.test/imagenes/usuario/a%C3%B1o.png')
+        self.assertEqual(medios.url('usuario/foto.png'), f'{settings.MEDIA_HOST}/imagenes/usuario/foto.png')
+        self.assertRegex(medios.url('usuario/foto.png'), r'^https?://[^/]+/imagenes/')
+        # Sin MEDIA_HOST la configuración falla en lugar de devolver URL relativas
+        with self.assertRaises(ImproperlyConfigured):
+            with self.settings(MEDIA_HOST = ''):
+                pass
+        self.assertTrue(medios.url('usuario/foto.png').startswith(settings.MEDIA_HOST))
+        self.assertIsNone(medios.url(''))
+
+    def guardar(self, nombre, contenido = b'0123456789'):
+        return default_storage.save(nombre, ContentFile(contenido))
+
+    def test_cache_inmutable_solo_para_nombres_por_contenido(self):
+        direccionado = self.guardar('usuario/archivo.txt')
+        self.assertRegex(direccionado, r'^usuario/[0-9a-f]{64}\.txt$')
+        respuesta = self.client.get(f'/imagenes/{direccionado}')
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(b''.join(respuesta.streaming_content), b'0123456789')
+        self.assertEqual(respuesta['Cache-Control'], 'public, max-age=31536000, immutable')
+        otro = self.guardar('derivados/archivo.txt')
+        self.assertEqual(self.client.get(f'/imagenes/{otro}')['Cache-Control'], 'public, max-age=3600')
+
+    def test_get_condicional_responde_304(self):
+        nombre = self.guardar('usuario/archivo.txt')
+        primera = self.client.get(f'/imagenes/{nombre}')
+        self.assertEqual(self.client.get(f'/imagenes/{nombre}', HTTP_IF_NONE_MATCH = primera['ETag']).status_code, 304)
+        self.assertEqual(self.client.get(f'/imagenes/{nombre}', HTTP_IF_MODIFIED_SINCE = primera['Last-Modified']).status_code, 304)
+        self.assertEqual(self.client.get(f'/imagenes/{nombre}', HTTP_IF_NONE_MATCH = '"otro"').status_code, 200)
+
+    def test_rangos(self):
+        nombre = self.guardar('usuario/archivo.txt')
+        casos = {
+            'bytes=2-5': (206, b'2345', 'bytes 2-5/10'),
+            'bytes=7-': (206, b'789', 'bytes 7-9/10'),
+            'bytes=-3': (206, b'789', 'bytes 7-9/10'),
+            'bytes=8-20': (206, b'89', 'bytes 8-9/10'),
+            'bytes=10-12': (416, b'', 'bytes */10'),
+            'bytes=5-2': (416, b'', 'bytes */10'),
+            # Rangos múltiples o mal formados se ignoran y se envía el archivo completo
+            'bytes=0-1,3-4': (200, b'0123456789', None),
+            'bytes=abc': (200, b'0123456789', None),
+            'items=0-1': (200, b'0123456789', None),
+        }
+        for cabecera, (codigo, cuerpo, contentRange) in casos.items():
+            with self.subTest(rango = cabecera):
+                respuesta = self.client.get(f'/imagenes/{nombre}', HTTP_RANGE = cabecera)
+                self.assertEqual(respuesta.status_code, codigo)
+                contenido = b''.join(respuesta.streaming_content) if respuesta.streaming else respuesta.content
+                self.assertEqual(contenido, cuerpo)
+                self.assertEqual(respuesta.get('Content-Range'), contentRange)
+        # Con If-Range de otra versión se ignora el rango
+        self.assertEqual(self.client.get(f'/imagenes/{nombre}', HTTP_RANGE = 'bytes=2-5', HTTP_IF_RANGE = '"viejo"').status_code, 200)
+
+    def test_rutas_fuera_de_media_root(self):
+        for ruta in ('/imagenes/../manage.py', '/imagenes/..%2F..%2Fmanage.py', '/imagenes/usuario', '/imagenes/no/existe.png'):
+            with self.subTest(ruta = ruta):
+                self.assertEqual(self.client.get(ruta).status_code, 404)
+        self.assertEqual(self.client.post(f'/imagenes/{self.guardar("usuario/archivo.txt")}').status_code, 405)
+
+class DerivadosTest(PruebaApi):
+    def test_solo_se_generan_si_la_imagen_cambia(self):
+        lenguaje = self.crearLenguaje()
+        self.assertTrue(default_storage.exists(imagenes.nombreDerivado(lenguaje.logo.name, 'grande')))
+        with mock.patch('api.imagenes.generar') as generar:
+            lenguaje = Lenguaje.objects.get(id = lenguaje.id)
+            lenguaje.nombre = 'Python Renombrado'
+            lenguaje.save()
+            generar.assert_not_called()
+            lenguaje.logo = imagen((10, 200, 10))
+            lenguaje.save()
+            generar.assert_called_once_with(lenguaje.logo.name)
+
+    def test_bomba_de_descompresion_no_rompe_el_guardado(self):
+        # Con un límite de píxeles bajo, la imagen de 64x64 supera el doble del máximo y Pillow la rechaza
+        with mock.patch('PIL.Image.MAX_IMAGE_PIXELS', 100), self.assertLogs('api.signals', 'ERROR'):
+            lenguaje = self.crearLenguaje()
+        self.assertTrue(Lenguaje.objects.filter(id = lenguaje.id).exists())
+        self.assertFalse(default_storage.exists(imagenes.nombreDerivado(lenguaje.logo.name, 'grande')))
+
+class AdministracionListasTest(PruebaApi):
+    def setUp(self):
+        super().setUp()
+        self.usuario = self.crearUsuario('lista@saddwy.test')
+        self.cabeceras = self.autorizar(self.crearUsuario('admin@saddwy.test', administrador = True))
+        self.lenguaje = self.crearLenguaje()
+        self.nivel = self.crearNivel(self.lenguaje, preguntas = 5)
+
+    def recorrer(self, url):
+        ids = []
+        while url:
+            respuesta = self.client.get(url, **self.cabeceras)
+            self.assertEqual(respuesta.status_code, 200, respuesta.content)
+            ids.extend(fila['id'] for fila in respuesta.json()['results'])
+            url = respuesta.json()['next']
+            yield ids
+
+    def test_cursor_estable_con_filas_nuevas(self):
+        esperados = list(Pregunta.objects.order_by('-id').values_list('id', flat = True))
+        paginas = self.recorrer('/api/v01/admin/questions/?cantidad=2')
+        self.assertEqual(next(paginas), esperados[:2])
+        # Una fila insertada entre páginas queda antes del cursor y no desplaza ni repite filas
+        Pregunta.objects.create(nivel = self.nivel, explanation = 'Explicación', pregunta = '¿?', respuesta = {}, estado = True)
+        for ids in paginas:
+            pass
+        self.assertEqual(ids, esperados)
+
+    def test_filtros(self):
+        Pregunta.objects.filter(id = Pregunta.objects.order_by('id').first().id).update(estado = False)
+        self.assertEqual(len(self.client.get('/api/v01/admin/questions/?estado=false', **self.cabeceras).json()['results']), 1)
+        self.assertEqual(len(self.client.get(f'/api/v01/admin/questions/?estado=true&nivel={self.nivel.id}', **self.cabeceras).json()['results']), 4)
+        respuesta = self.client.get('/api/v01/admin/questions/?estado=quizas', **self.cabeceras)
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertIn('estado', respuesta.json())
+        self.assertEqual(self.client.get('/api/v01/admin/questions/?nivel=uno', **self.cabeceras).status_code, 400)
+        # Los parámetros que no están en filtros se ignoran
+        self.assertEqual(len(self.client.get('/api/v01/admin/questions/?pregunta=nada&explanation=x', **self.cabeceras).json()['results']), 5)
+
+    def test_progresos_se_serializan(self):
+        progresos.asignar(self.usuario)
+        respuesta = self.client.get(f'/api/v01/admin/progress/?usuario={self.usuario.id}', **self.cabeceras)
+        self.assertEqual(respuesta.status_code, 200)
+        fila, = respuesta.json()['results']
+        self.assertEqual((fila['usuarioNombre'], fila['lenguajeNombre']), ('Usuario De Prueba', 'Python'))
+        self.assertNotIn('nivelesPermitidos', fila)
+
+class ExportacionTest(PruebaApi):
+    def setUp(self):
+        super().setUp()
+        self.usuario = self.crearUsuario('exportar@saddwy.test')
+        self.administrador = self.crearUsuario('admin@saddwy.test', administrador = True)
+        Contactar.objects.create(nombre = 'Contacto, "Con" Comas', celular = '3001234567', correo = 'contacto@saddwy.test', mensaje = 'Línea uno\nLínea dos')
+
+    def exportar(self, ruta, usuario):
+        respuesta = self.client.get(f'/api/v01/export/{ruta}', **self.autorizar(usuario))
+        contenido = b''.join(respuesta.streaming_content).decode() if respuesta.streaming else None
+        return respuesta, contenido
+
+    def test_solo_administradores(self):
+        self.assertEqual(self.exportar('usuarios/', self.usuario)[0].status_code, 403)
+        self.assertEqual(self.client.get('/api/v01/export/usuarios/').status_code, 401)
+
+    def test_csv(self):
+        respuesta, contenido = self.exportar('contactos/', self.administrador)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertEqual(respuesta['Content-Disposition'], 'attachment; filename="contactos.csv"')
+        encabezado, fila = list(csv.reader(io.StringIO(contenido)))
+        self.assertEqual(encabezado, ['id', 'nombre', 'celular', 'correo', 'mensaje', 'registro'])
+        self.assertEqual(fila[1:5], ['Contacto, "Con" Comas', '3001234567', 'contacto@saddwy.test', 'Línea uno\nLínea dos'])
+
+    def test_ndjson(self):
+        respuesta, contenido = self.exportar('usuarios/?formato=ndjson', self.administrador)
+        self.assertEqual(respuesta['Content-Type'], 'application/x-ndjson')
+        filas = [json.loads(linea) for linea in contenido.splitlines()]
+        self.assertEqual([fila['correo'] for fila in filas], ['exportar@saddwy.test', 'admin@saddwy.test'])
+        self.assertEqual(set(filas[0]), {'id', 'nombre', 'correo', 'estado', 'registro', 'administrador'})
+        self.assertNotIn('password', contenido)
+
+    def test_modelo_o_formato_invalido(self):
+        self.assertEqual(self.exportar('claves/', self.administrador)[0].status_code, 400)
+        self.assertEqual(self.exportar('usuarios/?formato=xml', self.administrador)[0].status_code, 400)
+
+class OperacionesMasivasTest(PruebaApi):
+    def setUp(self):
+        super().setUp()
+        self.cabeceras = {**self.autorizar(self.crearUsuario('admin@saddwy.test', administrador = True)), 'content_type': 'application/json'}
+        self.lenguaje = self.crearLenguaje()
+        self.otroLenguaje = self.crearLenguaje('JavaScript')
+        self.nivel = self.crearNivel(self.lenguaje, preguntas = 2)
+        self.otroNivel = self.crearNivel(self.otroLenguaje)
+
+    def pregunta(self, nivel, **campos):
+        return {'nivel': nivel.id, 'explanation': 'Explicación', 'pregunta': '¿?', 'respuesta': {}, 'estado': True, **campos}
+
+    def test_crear_recalcula_contadores(self):
+        respuesta = self.client.post('/api/v01/admin/questions/bulk/', [self.pregunta(self.nivel), self.pregunta(self.otroNivel), self.pregunta(self.otroNivel, estado = False)], **self.cabeceras)
+        self.assertEqual(respuesta.status_code, 201, respuesta.content)
+        self.assertEqual(len(respuesta.json()['dato']['ids']), 3)
+        self.assertEqual(Nivel.objects.get(id = self.otroNivel.id).totalPreguntas, 1)
+        self.comprobarContadores()
+
+    def test_crear_con_una_fila_invalida_no_crea_ninguna(self):
+        antes = Pregunta.objects.count()
+        respuesta = self.client.post('/api/v01/admin/questions/bulk/', [self.pregunta(self.nivel), {**self.pregunta(self.nivel), 'nivel': 999999}], **self.cabeceras)
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertEqual(Pregunta.objects.count(), antes)
+        self.comprobarContadores()
+
+    def test_error_dentro_de_la_transaccion_deshace_todo(self):
+        antes = Pregunta.objects.count()
+        with mock.patch('api.contadores.recontarNiveles', side_effect = RuntimeError('falla')):
+            with self.assertRaises(RuntimeError):
+                self.client.post('/api/v01/admin/questions/bulk/', [self.pregunta(self.nivel), self.pregunta(self.nivel)], **self.cabeceras)
+        self.assertEqual(Pregunta.objects.count(), antes)
+        self.comprobarContadores()
+
+    def test_editar_mueve_contadores_y_es_atomico(self):
+        primera, segunda = Pregunta.objects.filter(nivel = self.nivel).order_by('id')
+        respuesta = self.client.patch('/api/v01/admin/questions/bulk/', [{'id': primera.id, 'nivel': self.otroNivel.id}, {'id': segunda.id, 'estado': False}], **self.cabeceras)
+        self.assertEqual(respuesta.status_code, 200, respuesta.content)
+        self.assertEqual((Nivel.objects.get(id = self.nivel.id).totalPreguntas, Nivel.objects.get(id = self.otroNivel.id).totalPreguntas), (0, 1))
+        self.comprobarContadores()
+        # Una fila inválida o un id inexistente no dejan cambios a medias
+        respuesta = self.client.patch('/api/v01/admin/questions/bulk/', [{'id': primera.id, 'nivel': self.nivel.id}, {'id': segunda.id, 'nivel': 999999}], **self.cabeceras)
+        self.assertEqual(respuesta.status_code, 400)
+        respuesta = self.client.patch('/api/v01/admin/questions/bulk/', [{'id': primera.id, 'nivel': self.nivel.id}, {'id': 999999, 'estado': True}], **self.cabeceras)
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertEqual(Pregunta.objects.get(id = primera.id).nivel_id, self.otroNivel.id)
+        self.comprobarContadores()
+
+    def test_cambiar_estado_de_niveles(self):
+        nivel = self.crearNivel(self.lenguaje)
+        respuesta = self.client.post('/api/v01/admin/levels/bulk/state/', {'ids': [self.nivel.id, nivel.id], 'estado': False}, **self.cabeceras)
+        self.assertEqual(respuesta.json()['dato']['actualizados'], 2)
+        self.assertEqual(Lenguaje.objects.get(id = self.lenguaje.id).totalNiveles, 0)
+        self.comprobarContadores()
+        self.assertEqual(self.client.post('/api/v01/admin/levels/bulk/state/', {'ids': [nivel.id], 'estado': 'no'}, **self.cabeceras).status_code, 400)
+
+    def test_solo_administradores(self):
+        estudiante = {**self.autorizar(self.crearUsuario('estudiante@saddwy.test')), 'content_type': 'application/json'}
+        pregunta = Pregunta.objects.filter(nivel = self.nivel).first()
+        antes = Pregunta.objects.count()
+        self.assertEqual(self.client.post('/api/v01/admin/questions/bulk/', [self.pregunta(self.nivel)], **estudiante).status_code, 403)
+        self.assertEqual(self.client.patch('/api/v01/admin/questions/bulk/', [{'id': pregunta.id, 'estado': False}], **estudiante).status_code, 403)
+        self.assertEqual(self.client.post('/api/v01/admin/levels/bulk/state/', {'ids': [self.nivel.id], 'estado': False}, **estudiante).status_code, 403)
+        self.assertEqual(self.client.post('/api/v01/admin/levels/bulk/state/', {'ids': [self.nivel.id], 'estado': False}, content_type = 'application/json').status_code, 401)
+        self.assertEqual(Pregunta.objects.count(), antes)
+        self.assertTrue(Pregunta.objects.get(id = pregunta.id).estado)
+        self.assertTrue(Nivel.objects.get(id = self.nivel.id).estado)
+
+    def test_ids_invalidos(self):
+        pregunta = Pregunta.objects.filter(nivel = self.nivel).first()
+        for id in ('abc', [pregunta.id], {'id': pregunta.id}, True, 1.5, None):
+            with self.subTest(id = id):
+                self.assertEqual(self.client.patch('/api/v01/admin/questions/bulk/', [{'id': id, 'estado': False}], **self.cabeceras).status_code, 400)
+                self.assertEqual(self.client.post('/api/v01/admin/levels/bulk/state/', {'ids': [self.nivel.id, id], 'estado': False}, **self.cabeceras).status_code, 400)
+        self.assertTrue(Pregunta.objects.get(id = pregunta.id).estado)
+        self.assertTrue(Nivel.objects.get(id = self.nivel.id).estado)
+
+class ContadoresTest(PruebaApi):
+    def setUp(self):
+        super().setUp()
+        self.lenguaje = self.crearLenguaje()
+        self.otroLenguaje = self.crearLenguaje('JavaScript')
+        self.nivel = self.crearNivel(self.lenguaje, preguntas = 3)
+
+    def test_crear_mover_desactivar_y_eliminar(self):
+        self.comprobarContadores()
+        cambios = {
+            'mover nivel': lambda nivel: setattr(nivel, 'lenguaje', self.otroLenguaje),
+            'desactivar nivel': lambda nivel: setattr(nivel, 'estado', False),
+            'reactivar y devolver nivel': lambda nivel: (setattr(nivel, 'estado', True), setattr(nivel, 'lenguaje', self.lenguaje)),
+        }
+        for nombre, cambio in cambios.items():
+            with self.subTest(cambio = nombre):
+                nivel = Nivel.objects.get(id = self.nivel.id)
+                cambio(nivel)
+                nivel.save()
+                self.comprobarContadores()
+        pregunta = Pregunta.objects.filter(nivel = self.nivel).first()
+        pregunta.estado = False
+        pregunta.save()
+        self.comprobarContadores()
+        pregunta.delete()
+        Pregunta.objects.filter(nivel = self.nivel).first().delete()
+        self.comprobarContadores()
+        self.assertEqual(Nivel.objects.get(id = self.nivel.id).totalPreguntas, 1)
+        Nivel.objects.get(id = self.nivel.id).delete()
+        self.comprobarContadores()
+        self.assertEqual(Lenguaje.objects.get(id = self.lenguaje.id).totalNiveles, 0)
+
+    def test_instancia_sin_estado_cargado_recuenta_su_padre(self):
+        # Una instancia construida a mano no pasa por from_db: se recuenta en lugar de mover
+        Nivel(id = self.nivel.id, lenguaje = self.lenguaje, nombre = 'Nivel', explanation = 'Explicación', totalPreguntas = 3, estado = False, registro = self.nivel.registro).save()
+        self.comprobarContadores()
+
+    def test_reconciliar_detecta_y_repara(self):
+        Nivel.objects.filter(id = self.nivel.id).update(totalPreguntas = 7)
+        Lenguaje.objects.filter(id = self.otroLenguaje.id).update(totalNiveles = 2)
+        salida = io.StringIO()
+        call_command('reconciliarContadores', stdout = salida)
+        self.assertIn('2 contadores con diferencias', salida.getvalue())
+        self.assertEqual(Nivel.objects.get(id = self.nivel.id).totalPreguntas, 7)
+        call_command('reconciliarContadores', reparar = True, stdout = io.StringIO())
+        self.comprobarContadores()
+        salida = io.StringIO()
+        call_command('reconciliarContadores', stdout = salida)
+        self.assertIn('Los contadores coinciden', salida.getvalue())
+
+class RegistrarActividadTest(PruebaApi):
+    def test_registrar_reintenta_si_otro_proceso_escribio(self):
+        usuario = self.crearUsuario('racha@saddwy.test')
+        copia = Usuario.objects.get(id = usuario.id)
+        hoy = usuario.registro + datetime.timedelta(days = 3)
+        self.assertTrue(rachas.registrar(usuario, usuario.registro))
+        # La copia tiene la columna vieja: el primer UPDATE no coincide y se vuelve a leer
+        with CaptureQueriesContext(connection) as consultas:
+            self.assertTrue(rachas.registrar(copia, hoy))
+        self.assertEqual(sum(consulta['sql'].startswith('UPDATE') for consulta in consultas.captured_queries), 2)
+        guardado = Usuario.objects.get(id = usuario.id).actividad
+        self.assertTrue(rachas.activo(guardado, 0) and rachas.activo(guardado, 3))
+        self.assertFalse(rachas.registrar(copia, hoy))
+        self.assertFalse(rachas.registrar(copia, usuario.registro - datetime.timedelta(days = 1)))
+
+class CompletarNivelTest(PruebaApi):
+    def setUp(self):
+        super().setUp()
+        self.usuario = self.crearUsuario('completar@saddwy.test')
+        self.lenguaje = self.crearLenguaje()
+        self.niveles = [self.crearNivel(self.lenguaje, preguntas = 3) for _ in range(3)]
+        progresos.asignar(self.usuario)
+        self.cabeceras = {**self.autorizar(self.usuario), 'content_type': 'application/json'}
+
+    def completar(self, nivel, **cabeceras):
+        return self.client.post(f'/api/v01/questions/{nivel.id}/', {'intentos': 3}, **self.cabeceras, **cabeceras)
+
+    def progreso(self):
+        return Progreso.objects.get(usuario = self.usuario, lenguaje = self.lenguaje)
+
+    def test_porcentaje_sin_count(self):
+        with CaptureQueriesContext(connection) as consultas:
+            self.assertEqual(self.completar(self.niveles[0]).status_code, 200)
+        self.assertFalse([consulta['sql'] for consulta in consultas.captured_queries if 'COUNT(' in consulta['sql']])
+        self.assertEqual((self.progreso().nivelesTerminados, self.progreso().progresoLenguaje), (1, 33))
+        self.completar(self.niveles[1])
+        self.completar(self.niveles[2])
+        self.assertEqual((self.progreso().nivelesTerminados, self.progreso().progresoLenguaje, self.progreso().puntos), (3, 100, 9))
+
+    def test_migrar_niveles_completados(self):
+        for numero, nivel in enumerate(self.niveles, start = 1):
+            Nivel.objects.filter(id = nivel.id).update(nombre = f'Nivel {numero}')
+        Progreso.objects.filter(usuario = self.usuario).update(puntos = 7, nivelesCompletados = {'Nivel 1': True, 'Nivel 2': True, 'Nivel 3': False, 'Borrado': True})
+        # Otro usuario completó un nivel después de migrar el JSON, pero su contador quedó sin llenar
+        otro = self.crearUsuario('otro@saddwy.test')
+        progresos.asignar(otro)
+        NivelCompletado.objects.create(usuario = otro, nivel = self.niveles[2], puntos = 3)
+        estado = lambda: (
+            sorted(NivelCompletado.objects.values_list('usuario_id', 'nivel_id', 'puntos')),
+            sorted(Progreso.objects.values_list('usuario_id', 'nivelesTerminados', 'progresoLenguaje', 'puntos'))
+        )
+        self.assertEqual(estado()[1], [(self.usuario.id, 0, 0, 7), (otro.id, 0, 0, 0)])
+        salida = io.StringIO()
+        call_command('migrarNivelesCompletados', lote = 1, stdout = salida)
+        self.assertIn('2 niveles completados migrados, 1 nombres sin nivel correspondiente', salida.getvalue())
+        despues = estado()
+        # Los puntos del progreso se reparten entre los niveles y el total se conserva
+        self.assertEqual(despues[0], sorted([(self.usuario.id, self.niveles[0].id, 4), (self.usuario.id, self.niveles[1].id, 3), (otro.id, self.niveles[2].id, 3)]))
+        self.assertEqual(despues[1], [(self.usuario.id, 2, 66, 7), (otro.id, 1, 33, 0)])
+        salida = io.StringIO()
+        call_command('migrarNivelesCompletados', stdout = salida)
+        self.assertIn('0 niveles completados migrados', salida.getvalue())
+        self.assertEqual(estado(), despues)
+
+    def puntos(self):
+        return (self.progreso().puntos, Puntaje.objects.get(usuario = self.usuario).puntos, self.progreso().nivelesTerminados)
+
+    def test_completado_repetido_no_suma(self):
+        self.completar(self.niveles[0])
+        respuesta = self.completar(self.niveles[0])
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertIn('anteriormente', respuesta.json()['mensaje'])
+        self.assertEqual(self.puntos(), (3, 3, 1))
+        self.assertEqual(NivelCompletado.objects.filter(usuario = self.usuario).count(), 1)
+
+    def test_integridad_sin_efectos(self):
+        nivel = Nivel.objects.select_related('lenguaje').get(id = self.niveles[0].id)
+        self.assertEqual(completados.completar(self.usuario.id, nivel, 3), 3)
+        with CaptureQueriesContext(connection) as consultas:
+            self.assertIsNone(completados.completar(self.usuario.id, nivel, 0))
+        # La inserción fallida se revierte en su savepoint y no se toca Progreso ni Puntaje
+        self.assertFalse([consulta['sql'] for consulta in consultas.captured_queries if consulta['sql'].startswith('UPDATE')])
+        self.assertEqual(self.puntos(), (3, 3, 1))
+
+    def test_idempotencia_repite_respuesta(self):
+        primera = self.completar(self.niveles[0], HTTP_IDEMPOTENCY_KEY = 'envio-1')
+        with self.assertNumQueries(0):
+            repetida = self.completar(self.niveles[0], HTTP_IDEMPOTENCY_KEY = 'envio-1')
+        self.assertEqual((repetida.status_code, repetida.json()), (primera.status_code, primera.json()))
+        self.assertEqual(repetida['Idempotency-Key-Replayed'], 'true')
+        self.assertFalse(primera.has_header('Idempotency-Key-Replayed'))
+        self.assertEqual(self.puntos(), (3, 3, 1))
+
+    def test_idempotencia_en_proceso(self):
+        solicitud = mock.Mock(headers = {'Idempotency-Key': 'envio-1'}, user = self.usuario)
+        cache.set(idempotencia.clave(solicitud, f'questions:{self.niveles[0].id}'), idempotencia.EN_PROCESO)
+        respuesta = self.completar(self.niveles[0], HTTP_IDEMPOTENCY_KEY = 'envio-1')
+        self.assertEqual(respuesta.status_code, 409)
+        self.assertFalse(NivelCompletado.objects.filter(usuario = self.usuario).exists())
+
+    def test_idempotencia_otro_cuerpo(self):
+        self.completar(self.niveles[0], HTTP_IDEMPOTENCY_KEY = 'envio-1')
+        respuesta = self.client.post(f'/api/v01/questions/{self.niveles[0].id}/', {'intentos': 0}, HTTP_IDEMPOTENCY_KEY = 'envio-1', **self.cabeceras)
+        self.assertEqual(respuesta.status_code, 422)
+        self.assertFalse(respuesta.has_header('Idempotency-Key-Replayed'))
+        self.assertEqual(self.puntos(), (3, 3, 1))
+
+    def test_idempotencia_por_nivel(self):
+        # La misma clave en otro nivel es otro envío
+        self.completar(self.niveles[0], HTTP_IDEMPOTENCY_KEY = 'envio-1')
+        self.assertFalse(self.completar(self.niveles[1], HTTP_IDEMPOTENCY_KEY = 'envio-1').has_header('Idempotency-Key-Replayed'))
+        self.assertEqual(self.puntos(), (6, 6, 2))
+
+class RankingTest(PruebaApi):
+    def setUp(self):
+        super().setUp()
+        ahora = timezone.now()
+        # Orden esperado: más puntos primero; con empate, quien llegó antes; con el mismo instante, el id menor
+        self.usuarios = {}
+        for nombre, puntos, segundos in (('Ana', 30, 0), ('Beatriz', 50, 10), ('Carlos', 30, -10), ('Diana', 30, 0), ('Esteban', None, 0)):
+            usuario = self.crearUsuario(f'{nombre.lower()}@saddwy.test')
+            Usuario.objects.filter(id = usuario.id).update(nombre = nombre)
+            if puntos is not None:
+                Puntaje.objects.create(usuario = usuario, puntos = puntos, actualizado = ahora + datetime.timedelta(seconds = segundos))
+            self.usuarios[nombre] = usuario
+        self.orden = ['Beatriz', 'Carlos', 'Ana', 'Diana']
+
+    def ranking(self, usuario, **parametros):
+        return self.client.get('/api/v01/ranking/', parametros, **self.autorizar(self.usuarios[usuario]))
+
+    def test_orden_y_desempate(self):
+        listado = self.ranking('Ana').json()['dato']['listado']
+        self.assertEqual([listado[str(puesto)]['nombre'] for puesto in range(1, 5)], self.orden)
+        self.assertEqual([fila['puntos'] for fila in listado.values()], [50, 30, 30, 30])
+        for puesto, nombre in enumerate(self.orden, start = 1):
+            self.assertEqual(clasificacion.posicion(Puntaje.objects.get(usuario = self.usuarios[nombre])), puesto)
+
+    def test_paginas(self):
+        with mock.patch.object(clasificacion, 'POR_PAGINA', 2):
+            paginas = [self.ranking('Ana', pagina = numero).json()['dato']['listado'] for numero in (1, 2, 3)]
+            self.assertEqual(self.ranking('Ana', pagina = 0).json()['dato']['listado'], paginas[0])
+        self.assertEqual([[fila['nombre'] for fila in pagina.values()] for pagina in paginas], [self.orden[:2], self.orden[2:], []])
+        self.assertEqual([list(pagina) for pagina in paginas[:2]], [['1', '2'], ['3', '4']])
+        self.assertEqual(self.ranking('Ana', pagina = 'x').status_code, 400)
+
+    def test_posicion_del_usuario(self):
+        # La posición no depende de la página pedida
+        with mock.patch.object(clasificacion, 'POR_PAGINA', 2):
+            self.assertEqual(self.ranking('Diana').json()['dato']['usuario'], {'puesto': 4, 'nombre': 'Diana', 'puntos': 30})
+        self.assertEqual(self.ranking('Esteban').json()['dato']['usuario'], {'puesto': None, 'nombre': 'Esteban', 'puntos': 0})
+
+    def test_sumar_puntos(self):
+        clasificacion.sumarPuntos(self.usuarios['Esteban'].id, 40)
+        clasificacion.sumarPuntos(self.usuarios['Diana'].id, 15)
+        # Esteban no tenía fila: se crea con los puntos sumados
+        self.assertEqual(self.ranking('Esteban').json()['dato']['usuario'], {'puesto': 3, 'nombre': 'Esteban', 'puntos': 40})
+        self.assertEqual(self.ranking('Diana').json()['dato']['usuario'], {'puesto': 2, 'nombre': 'Diana', 'puntos': 45})
+
+    def test_reconstruir_ranking(self):
+        lenguaje = self.crearLenguaje()
+        otro = self.crearLenguaje('JavaScript')
+        for nombre, puntos in (('Ana', (5, 20)), ('Esteban', (10, 0))):
+            for lenguajeProgreso, cantidad in zip((lenguaje, otro), puntos):
+                Progreso.objects.create(usuario = self.usuarios[nombre], lenguaje = lenguajeProgreso, puntos = cantidad)
+        call_command('reconstruirRanking', stdout = io.StringIO())
+        self.assertEqual(dict(Puntaje.objects.values_list('usuario__nombre', 'puntos')), {'Ana': 25, 'Esteban': 10})
+        self.assertEqual([fila['nombre'] for fila in clasificacion.pagina()], ['Ana', 'Esteban'])
+
+class ReplicaTest(PruebaApi):
+    def setUp(self):
+        super().setUp()
+        self.usuario = self.crearUsuario('replica@saddwy.test')
+        self.lenguaje = self.crearLenguaje()
+        self.nivel = self.crearNivel(self.lenguaje, preguntas = 3)
+        progresos.asignar(self.usuario)
+        self.cabeceras = self.autorizar(self.usuario)
+        # Como con DB_REPLICA, pero la réplica de pruebas no existe: se anota el alias elegido y la consulta va a la primaria
+        self.lecturas = []
+        leer = enrutador.EnrutadorReplica.db_for_read
+        def anotar(enrutadorReplica, model, **hints):
+            self.lecturas.append(leer(enrutadorReplica, model, **hints))
+            return enrutador.PRIMARIA
+        for parche in (mock.patch.object(enrutador.EnrutadorReplica, 'db_for_read', anotar), mock.patch.object(enrutador, 'disponible', return_value = True)):
+            parche.start()
+            self.addCleanup(parche.stop)
+
+    def solicitud(self, metodo, ruta, vista):
+        return enrutador.MiddlewareReplica(vista)(RequestFactory().generic(metodo, ruta))
+
+    def test_lecturas_de_ruta_configurada(self):
+        self.assertEqual(self.client.get('/api/v01/ranking/', **self.cabeceras).status_code, 200)
+        self.assertEqual(set(self.lecturas), {enrutador.REPLICA})
+
+    def test_post_en_primaria(self):
+        respuesta = self.client.post(f'/api/v01/questions/{self.nivel.id}/', {'intentos': 3}, content_type = 'application/json', **self.cabeceras)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(set(self.lecturas), {enrutador.PRIMARIA})
+
+    def test_lectura_despues_de_escritura(self):
+        def vista(request):
+            Lenguaje.objects.get(id = self.lenguaje.id)
+            Lenguaje.objects.filter(id = self.lenguaje.id).update(nombre = 'Go')
+            return Lenguaje.objects.get(id = self.lenguaje.id).nombre
+        self.assertEqual(self.solicitud('GET', '/api/v01/ranking/', vista), 'Go')
+        self.assertEqual(self.lecturas, [enrutador.REPLICA, enrutador.PRIMARIA])
+        # El estado es por solicitud: la siguiente vuelve a leer de la réplica
+        self.solicitud('GET', '/api/v01/ranking/', lambda request: Lenguaje.objects.get(id = self.lenguaje.id))
+        self.assertEqual(self.lecturas[-1], enrutador.REPLICA)
+
+    def test_rutas_y_metodos_sin_replica(self):
+        leer = lambda request: Lenguaje.objects.get(id = self.lenguaje.id)
+        self.solicitud('POST', '/api/v01/ranking/', leer)
+        self.solicitud('GET', '/api/v01/admin/lenguajes/', leer)
+        Lenguaje.objects.get(id = self.lenguaje.id)
+        self.assertEqual(self.lecturas, [enrutador.PRIMARIA] * 3)
+
+    @override_settings(REPLICA_RUTAS = ('/api/v01/start/',))
+    def test_catalogo_desde_primaria(self):
+        # Aun con /start/ en la réplica, el catálogo que se guarda tras invalidar se lee de la primaria
+        self.client.get('/api/v01/start/', **self.cabeceras)
+        self.lenguaje.nombre = 'Go'
+        self.lenguaje.save()
+        self.lecturas.clear()
+        respuesta = self.client.get('/api/v01/start/', **self.cabeceras)
+        self.assertEqual(respuesta.json()['dato'][0]['nombre'], 'Go')
+        self.assertTrue(self.lecturas)
+        self.assertEqual(set(self.lecturas), {enrutador.PRIMARIA})
+
+    def test_sin_alias_replica(self):
+        with mock.patch.object(enrutador, 'disponible', return_value = False):
+            self.solicitud('GET', '/api/v01/ranking/', lambda request: Lenguaje.objects.get(id = self.lenguaje.id))
+        self.assertEqual(self.lecturas, [enrutador.PRIMARIA])
+        self.assertFalse(enrutador.EnrutadorReplica().allow_migrate(enrutador.REPLICA, 'api'))
+
+class SqliteTest(PruebaApi):
+    def setUp(self):
+        super().setUp()
+        if connection.vendor != 'sqlite':
+            self.skipTest('Los pragmas y el mantenimiento son propios de SQLite')
+
+    def test_pragmas_en_conexion_nueva(self):
+        # La base de pruebas está en memoria y no admite WAL: se abre una conexión nueva a un archivo
+        carpeta = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, carpeta, ignore_errors = True)
+        nueva = type(connections['default'])({**connection.settings_dict, 'NAME': os.path.join(carpeta, 'pragmas.sqlite3')}, alias = 'pragmas')
+        self.addCleanup(nueva.close)
+        with nueva.cursor() as cursor:
+            valores = {}
+            for nombre in ('journal_mode', 'synchronous', 'busy_timeout', 'cache_size'):
+                cursor.execute(f'PRAGMA {nombre}')
+                valores[nombre] = cursor.fetchone()[0]
+        self.assertEqual(valores, {'journal_mode': 'wal', 'synchronous': 1, 'busy_timeout': settings.SQLITE_PRAGMAS['busy_timeout'], 'cache_size': settings.SQLITE_PRAGMAS['cache_size']})
+
+    def test_mantener_base_datos(self):
+        salida = io.StringIO()
+        call_command('mantenerBaseDatos', stdout = salida)
+        self.assertIn('Mantenimiento completado', salida.getvalue())
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT count(*) FROM sqlite_master WHERE name = 'sqlite_stat1'")
+            self.assertEqual(cursor.fetchone()[0], 1)
+
+class InstrumentacionTest(PruebaApi):
+    def setUp(self):
+        super().setUp()
+        self.cabeceras = self.autorizar(self.crearUsuario('sql@saddwy.test'))
+
+    def test_server_timing(self):
+        with CaptureQueriesContext(connection) as consultas:
+            respuesta = self.client.get('/api/v01/ranking/', **self.cabeceras)
+        encontrado = re.fullmatch(r'db;desc="SQL \((\d+)\)";dur=([\d.]+), total;dur=([\d.]+)', respuesta['Server-Timing'])
+        self.assertIsNotNone(encontrado)
+        self.assertEqual(int(encontrado[1]), len(consultas))
+        self.assertLessEqual(float(encontrado[2]), float(encontrado[3]))
+
+    def test_server_timing_existente(self):
+        def vista(request):
+            respuesta = HttpResponse()
+            respuesta['Server-Timing'] = 'cache;dur=1'
+            return respuesta
+        respuesta = instrumentacion.MiddlewareSQL(vista)(RequestFactory().get('/'))
+        self.assertRegex(respuesta['Server-Timing'], r'^cache;dur=1, db;desc="SQL \(0\)";dur=[\d.]+, total;dur=[\d.]+$')
+
+    @override_settings(SQL_UMBRAL_LENTO_MS = 0)
+    def test_consultas_lentas(self):
+        with self.assertLogs('api.sql', 'WARNING') as registro:
+            self.client.get('/api/v01/ranking/', **self.cabeceras)
+        self.assertTrue(registro.records)
+        self.assertTrue(all(' [default] SELECT ' in linea for linea in registro.output))
+        self.assertIn('ranking', registro.output[0])
+        self.assertIsInstance(registro.records[0].duracion, float)
+
+    @override_settings(SQL_UMBRAL_LENTO_MS = 60 * 1000)
+    def test_consultas_rapidas(self):
+        with self.assertNoLogs('api.sql', 'WARNING'):
+            self.client.get('/api/v01/ranking/', **self.cabeceras)
+
+class PerfiladoTest(PruebaApi):
+    def setUp(self):
+        super().setUp()
+        raiz = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, raiz, ignore_errors = True)
+        self.carpeta = os.path.join(raiz, 'perfiles')
+        ajustes = override_settings(PERFILES_DIR = self.carpeta)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+        self.admin = self.autorizar(self.crearUsuario('admin@saddwy.test', administrador = True))
+        self.estudiante = self.autorizar(self.crearUsuario('estudiante@saddwy.test'))
+
+    def archivos(self):
+        return sorted(archivo['nombre'] for archivo in perfilado.listar())
+
+    def test_sin_solicitar_no_perfila(self):
+        respuesta = self.client.get('/api/v01/ranking/', **self.admin)
+        self.assertFalse(respuesta.has_header('X-Perfil'))
+        self.assertEqual(self.archivos(), [])
+
+    def test_solo_administradores(self):
+        for cabeceras in (self.estudiante, {}, {'HTTP_AUTHORIZATION': 'Token falso'}):
+            respuesta = self.client.get('/api/v01/ranking/?perfil=1', HTTP_X_PERFIL = '1', **cabeceras)
+            self.assertFalse(respuesta.has_header('X-Perfil'))
+        self.assertEqual(self.archivos(), [])
+        self.assertEqual(self.client.get('/api/v01/profiles/', **self.estudiante).status_code, 403)
+
+    def test_perfil_de_administrador(self):
+        base = self.client.get('/api/v01/ranking/', HTTP_X_PERFIL = '1', **self.admin)['X-Perfil']
+        otra = self.client.get('/api/v01/ranking/?perfil=1', **self.admin)['X-Perfil']
+        self.assertEqual(self.archivos(), sorted(f'{nombre}.{extension}' for nombre in (base, otra) for extension in ('prof', 'txt')))
+        self.assertEqual(len(self.client.get('/api/v01/profiles/', **self.admin).json()['dato']), 4)
+        respuesta = self.client.get(f'/api/v01/profiles/{base}.prof/', **self.admin)
+        self.assertEqual(respuesta.status_code, 200)
+        with open(os.path.join(self.carpeta, f'{base}.prof'), 'rb') as archivo:
+            self.assertEqual(b''.join(respuesta.streaming_content), archivo.read())
+        respuesta.close()
+
+    def test_nombres_fuera_de_la_carpeta(self):
+        os.makedirs(self.carpeta)
+        with open(os.path.join(os.path.dirname(self.carpeta), 'secreto.txt'), 'w') as archivo:
+            archivo.write('secreto')
+        for nombre in ('../secreto.txt', '..', 'secreto.py', '.prof'):
+            self.assertIsNone(perfilado.NOMBRE.match(nombre), nombre)
+        for ruta in ('..%2Fsecreto.txt', '%2E%2E%2Fsecreto.txt', 'secreto.txt', 'settings.py'):
+            self.assertEqual(self.client.get(f'/api/v01/profiles/{ruta}/', **self.admin).status_code, 404, ruta)
+
+    @override_settings(PERFILES_MAXIMO = 1)
+    def test_podar(self):
+        os.makedirs(self.carpeta)
+        for numero, nombre in enumerate(('a.prof', 'a.txt', 'b.prof', 'b.txt', 'otro.log')):
+            ruta = os.path.join(self.carpeta, nombre)
+            open(ruta, 'w').close()
+            os.utime(ruta, (1000 + numero, 1000 + numero))
+        perfilado.podar()
+        # Se conservan los dos archivos del perfil más reciente; lo que no es un perfil no se toca
+        self.assertEqual(sorted(os.listdir(self.carpeta)), ['b.prof', 'b.txt', 'otro.log'])
+
+class MetricasTest(PruebaApi):
+    def test_sin_token_configurado(self):
+        for cabeceras in ({}, {'HTTP_AUTHORIZATION': 'Bearer '}):
+            self.assertEqual(self.client.get('/api/v01/metrics/', **cabeceras).status_code, 403)
+
+    @override_settings(METRICAS_TOKEN = 'recolector')
+    def test_token(self):
+        self.assertEqual(self.client.get('/api/v01/metrics/').status_code, 403)
+        self.assertEqual(self.client.get('/api/v01/metrics/', HTTP_AUTHORIZATION = 'Bearer otro').status_code, 403)
+        respuesta = self.client.get('/api/v01/metrics/', HTTP_AUTHORIZATION = 'Bearer recolector')
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertTrue(respuesta['Content-Type'].startswith('text/plain; version=0.0.4'))
+
+    def carpeta(self):
+        carpeta = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, carpeta, ignore_errors = True)
+        return carpeta
+
+    def test_volcado_por_proceso(self):
+        with override_settings(METRICAS_DIR = self.carpeta()):
+            metricas.volcar(forzar = True)
+            propio = metricas.archivo()
+            self.assertEqual(os.listdir(settings.METRICAS_DIR), [os.path.basename(propio)])
+            # Un pid reciclado recibe otro identificador y no pisa el archivo del proceso anterior
+            with mock.patch('os.getpid', return_value = 1):
+                primero = metricas.archivo()
+            with mock.patch('os.getpid', return_value = 2):
+                metricas.archivo()
+            with mock.patch('os.getpid', return_value = 1):
+                self.assertNotEqual(metricas.archivo(), primero)
+                self.assertTrue(os.path.basename(metricas.archivo()).startswith('1-'))
+
+    def test_volcados_concurrentes(self):
+        with override_settings(METRICAS_DIR = self.carpeta(), METRICAS_INTERVALO = 0):
+            metricas.incrementar('api_cache_total', (('cache', 'prueba'), ('resultado', 'acierto')))
+            hilos = [threading.Thread(target = metricas.volcar, kwargs = {'forzar': numero % 2 == 0}) for numero in range(16)]
+            for hilo in hilos:
+                hilo.start()
+            for hilo in hilos:
+                hilo.join()
+            self.assertEqual(os.listdir(settings.METRICAS_DIR), [os.path.basename(metricas.archivo())])
+            with open(metricas.archivo()) as origen:
+                self.assertIn(['api_cache_total', [['cache', 'prueba'], ['resultado', 'acierto']], 1], json.load(origen))
+
+    @override_settings(METRICAS_RETENCION = 60)
+    def test_recolectar_poda_archivos_viejos(self):
+        with override_settings(METRICAS_DIR = self.carpeta()):
+            fila = [['api_cache_total', [['cache', 'otro'], ['resultado', 'fallo']], 2]]
+            for nombre in ('10-a.json', '11-b.json', '12-c.json.tmp'):
+                with open(os.path.join(settings.METRICAS_DIR, nombre), 'w') as destino:
+                    json.dump(fila, destino)
+            viejo = time.time() - 120
+            os.utime(os.path.join(settings.METRICAS_DIR, '11-b.json'), (viejo, viejo))
+            os.utime(os.path.join(settings.METRICAS_DIR, '12-c.json.tmp'), (viejo, viejo))
+            total = metricas.recolectar()
+            self.assertEqual(total[('api_cache_total', (('cache', 'otro'), ('resultado', 'fallo')))], 2)
+            self.assertEqual(os.listdir(settings.METRICAS_DIR), ['10-a.json'])
+
+class LimitesTest(PruebaApi):
+    def setUp(self):
+        super().setUp()
+        caches['limites'].clear()
+        self.reloj = mock.Mock(return_value = 1000.0)
+        parche = mock.patch.object(limites.CubetaFichas, 'timer', self.reloj)
+        parche.start()
+        self.addCleanup(parche.stop)
+
+    def recuperar(self, correo = 'nadie@saddwy.test'):
+        return self.client.post('/api/v01/recovery/', {'correo': correo}, content_type = 'application/json')
+
+    @override_settings(LIMITES = {'recoveryEmail.ip': '2/min'})
+    def test_429_y_retry_after(self):
+        self.assertNotEqual(self.recuperar().status_code, 429)
+        self.assertNotEqual(self.recuperar().status_code, 429)
+        respuesta = self.recuperar()
+        self.assertEqual(respuesta.status_code, 429)
+        self.assertEqual(respuesta['Retry-After'], '30')
+        self.assertEqual((respuesta.json()['estado'], respuesta.json()['validar']), (429, False))
+
+    @override_settings(LIMITES = {'recoveryEmail.ip': '2/min'})
+    def test_x_forwarded_for_rotativo(self):
+        recuperar = lambda numero: self.client.post('/api/v01/recovery/', {'correo': f'nadie{numero}@saddwy.test'}, content_type = 'application/json', HTTP_X_FORWARDED_FOR = f'203.0.113.{numero}')
+        self.assertNotEqual(recuperar(1).status_code, 429)
+        self.assertNotEqual(recuperar(2).status_code, 429)
+        self.assertEqual(recuperar(3).status_code, 429)
+
+    @override_settings(LIMITES = {'recoveryEmail.ip': '2/min'}, REST_FRAMEWORK = {**settings.REST_FRAMEWORK, 'NUM_PROXIES': 1})
+    def test_x_forwarded_for_detras_de_proxy(self):
+        # Solo cuenta la dirección que agrega el proxy, no las que el cliente antepone
+        recuperar = lambda numero, cliente: self.client.post('/api/v01/recovery/', {'correo': 'nadie@saddwy.test'}, content_type = 'application/json', HTTP_X_FORWARDED_FOR = f'198.51.100.{numero}, {cliente}')
+        self.assertNotEqual(recuperar(1, '203.0.113.7').status_code, 429)
+        self.assertNotEqual(recuperar(2, '203.0.113.7').status_code, 429)
+        self.assertEqual(recuperar(3, '203.0.113.7').status_code, 429)
+        self.assertNotEqual(recuperar(4, '203.0.113.8').status_code, 429)
+
+    @override_settings(LIMITES = {'recoveryEmail.ip': '2/min'})
+    def test_recarga(self):
+        self.recuperar()
+        self.recuperar()
+        self.reloj.return_value = 1029.0
+        self.assertEqual(self.recuperar().status_code, 429)
+        # Cada 30 segundos se recupera una ficha, no la ráfaga completa
+        self.reloj.return_value = 1030.0
+        self.assertNotEqual(self.recuperar().status_code, 429)
+        self.assertEqual(self.recuperar().status_code, 429)
+        self.reloj.return_value = 1090.0
+        self.assertNotEqual(self.recuperar().status_code, 429)
+        self.assertNotEqual(self.recuperar().status_code, 429)
+        self.assertEqual(self.recuperar().status_code, 429)
+
+    @override_settings(LIMITES = {'recoveryEmail.correo': '1/hour'})
+    def test_correo_normalizado(self):
+        self.assertNotEqual(self.recuperar(' Persona@SaddWy.test ').status_code, 429)
+        self.assertEqual(self.recuperar('persona@saddwy.test').status_code, 429)
+        self.assertNotEqual(self.recuperar('otra@saddwy.test').status_code, 429)
+
+    @override_settings(LIMITES = {'recoverAccount.correo': '1/hour'})
+    def test_token_falsificado(self):
+        usuario = self.crearUsuario('cuenta@saddwy.test')
+        falso = jwt.encode({'token_type': 'refresh', 'user_id': usuario.id, 'jti': 'falso', 'exp': int(time.time()) + 3600}, 'otra clave', algorithm = 'HS256')
+        recuperar = lambda token: self.client.post(f'/api/v01/recover/{token}/', {'password': CLAVE}, content_type = 'application/json')
+        # El token falsificado no gasta la cubeta de la cuenta
+        for _ in range(3):
+            self.assertNotEqual(recuperar(falso).status_code, 429)
+        self.assertEqual(recuperar(str(tokens.RefreshToken.for_user(usuario))).status_code, 200)
+        self.assertEqual(recuperar(str(tokens.RefreshToken.for_user(usuario))).status_code, 429)
+
+@override_settings(METRICAS_TOKEN = 'recolector')
+class RendimientoTest(PruebaApi):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.resultados = {}
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        # La tabla de latencias solo se imprime a pedido: RENDIMIENTO_INFORME=1 python manage.py test
+        if cls.resultados and os.environ.get('RENDIMIENTO_INFORME'):
+            print(f'\n{"endpoint":<20}{"p50 ms":>9}{"p95 ms":>9}{"p99 ms":>9}{"consultas":>11}{"presupuesto":>13}')
+            for nombre, (p50, p95, p99, consultas) in cls.resultados.items():
+                print(f'{nombre:<20}{p50:>9.1f}{p95:>9.1f}{p99:>9.1f}{consultas:>11}{PRESUPUESTOS[nombre]:>13}')
+
+    @classmethod
+    def setUpTestData(cls):
+        FotoPredeterminada.objects.create(foto = imagen())
+        call_command('generarDatos', usuarios = 300, lenguajes = 3, niveles = 6, preguntas = 5, lote = 100, prefijo = 'bench', stdout = io.StringIO())
+        cls.usuario = Usuario.objects.filter(correo__startswith = 'bench.').order_by('id').first()
+        cls.administrador = Usuario.objects.create_user('admin@saddwy.test', 'Administrador Bench', CLAVE)
+        Usuario.objects.filter(id = cls.administrador.id).update(estado = True, administrador = True)
+        cls.nivel = Nivel.objects.filter(lenguaje__nombre__contains = 'bench').order_by('-id').first()
+        cls.pendientes = [
+            Usuario.objects.create_user(f'pendiente{numero}@saddwy.test', 'Usuario Pendiente', CLAVE)
+            for numero in range(REPETICIONES)
+        ]
+
+    def setUp(self):
+        super().setUp()
+        self.acceso = str(autenticacion.generarToken(self.usuario).access_token)
+        self.accesoAdmin = str(autenticacion.generarToken(Usuario.objects.get(id = self.administrador.id)).access_token)
+
+    def solicitudes(self):
+        usuario = {'HTTP_AUTHORIZATION': f'Token {self.acceso}'}
+        admin = {'HTTP_AUTHORIZATION': f'Token {self.accesoAdmin}'}
+        json = {'content_type': 'application/json'}
+        # Los tokens se crean antes de medir: RefreshToken.for_user inserta en la lista de tokens emitidos
+        validar = [str(tokens.RefreshToken.for_user(pendiente)) for pendiente in self.pendientes]
+        recuperar = [str(tokens.RefreshToken.for_user(self.usuario)) for _ in range(REPETICIONES)]
+        actualizar = [str(tokens.RefreshToken.for_user(self.usuario)) for _ in range(REPETICIONES)]
+        return {
+            'register': lambda i: self.client.post('/api/v01/register/', {'nombre': 'Usuario Registrado', 'correo': f'nuevo{i}@saddwy.test', 'password': 'Registro#2024x'}, **json),
+            'validate': lambda i: self.client.get(f'/api/v01/validate/{validar[i]}/'),
+            'login': lambda i: self.client.post('/api/v01/login/', {'correo': self.usuario.correo, 'password': CLAVE}, **json),
+            'start': lambda i: self.client.get('/api/v01/start/', **usuario),
+            'ranking': lambda i: self.client.get('/api/v01/ranking/', **usuario),
+            'edit': lambda i: self.client.put('/api/v01/edit/', {'nombre': 'Nombre Editado'}, **json, **usuario),
+            'questions GET': lambda i: self.client.get(f'/api/v01/questions/{self.nivel.id}/', **usuario),
+            'questions POST': lambda i: self.client.post(f'/api/v01/questions/{self.nivel.id}/', {'intentos': 3}, **json, **usuario),
+            'profile': lambda i: self.client.get('/api/v01/profile/', **usuario),
+            'contact': lambda i: self.client.post('/api/v01/contact/', {'nombre': 'Contacto De Prueba', 'celular': '3001234567', 'correo': 'contacto@saddwy.test', 'mensaje': 'Mensaje de prueba para el equipo'}, **json, **usuario),
+            'recovery': lambda i: self.client.post('/api/v01/recovery/', {'correo': self.usuario.correo}, **json),
+            'recover': lambda i: self.client.post(f'/api/v01/recover/{recuperar[i]}/', {'password': CLAVE}, **json),
+            'export': lambda i: self.client.get('/api/v01/export/usuarios/?formato=ndjson', **admin),
+            'refresh': lambda i: self.client.post('/api/v01/refresh/', {'refresh': actualizar[i]}, **json),
+            'documentation': lambda i: self.client.get('/api/v01/documentation/swagger/?format=openapi'),
+            'metrics': lambda i: self.client.get('/api/v01/metrics/', HTTP_AUTHORIZATION = 'Bearer recolector'),
+            'admin users': lambda i: self.client.get('/api/v01/admin/users/', **admin),
+            'admin languages': lambda i: self.client.get('/api/v01/admin/languages/', **admin),
+            'admin levels': lambda i: self.client.get('/api/v01/admin/levels/', **admin),
+            'admin questions': lambda i: self.client.get('/api/v01/admin/questions/', **admin),
+            'admin progress': lambda i: self.client.get('/api/v01/admin/progress/', **admin),
+            'admin completions': lambda i: self.client.get('/api/v01/admin/completions/', **admin),
+            'admin photos': lambda i: self.client.get('/api/v01/admin/photos/', **admin),
+            'admin contact': lambda i: self.client.get('/api/v01/admin/contact/', **admin),
+        }
+
+    def medir(self, nombre, solicitud):
+        duraciones, consultas = [], 0
+        for i in range(REPETICIONES):
+            with CaptureQueriesContext(connection) as capturadas:
+                inicio = time.perf_counter()
+                respuesta = solicitud(i)
+                # Las respuestas en streaming solo consultan al consumirse
+                if respuesta.streaming:
+                    b''.join(respuesta.streaming_content)
+                duraciones.append((time.perf_counter() - inicio) * 1000)
+            self.assertLess(respuesta.status_code, 400, f'{nombre}: {respuesta.status_code} {getattr(respuesta, "content", b"")[:300]}')
+            # Los SAVEPOINT de transaction.atomic dentro del TestCase no son consultas de la vista
+            consultas = max(consultas, sum(1 for consulta in capturadas.captured_queries if 'SAVEPOINT' not in consulta['sql']))
+        percentiles = statistics.quantiles(duraciones, n = 100, method = 'inclusive')
+        self.resultados[nombre] = (percentiles[49], percentiles[94], percentiles[98], consultas)
+        return consultas
+
+    def test_presupuesto_consultas(self):
+        solicitudes = self.solicitudes()
+        self.assertEqual(set(solicitudes), set(PRESUPUESTOS))
+        for nombre, solicitud in solicitudes.items():
+            with self.subTest(endpoint = nombre):
+                consultas = self.medir(nombre, solicitud)
+                self.assertLessEqual(consultas, PRESUPUESTOS[nombre], f'{nombre} hizo {consultas} consultas; el presupuesto es {PRESUPUESTOS[nombre]}')
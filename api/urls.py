@@ -19,6 +19,7 @@ router.register('languages', LenguajeView)
 router.register('levels', NivelView)
 router.register('questions', PreguntaView)
 router.register('progress', ProgresoView)
+router.register('completions', NivelCompletadoView)
 router.register('photos', FotoView)
 router.register('contact', Contactenos)
 
@@ -34,6 +35,10 @@ urlpatterns = [
     path('v01/contact/', ContactUs),
     path('v01/recovery/', recoveryEmail),
     path('v01/recover/<str:token>/', recoverAccount),
+    path('v01/export/<str:modelo>/', export),
+    path('v01/profiles/', profiles),
+    path('v01/profiles/<str:nombre>/', profileFile),
+    path('v01/metrics/', metrics),
     path('v01/refresh/', TokenRefreshView.as_view()),
     path('v01/documentation/swagger/', schema_view.with_ui('swagger', cache_timeout = 0)),
     path('v01/documentation/redoc/', schema_view.with_ui('redoc', cache_timeout = 0)),
@@ -0,0 +1,53 @@
+import difflib
+
+ESPECIALES = frozenset('!@#$%^&*()-_=+{};:,<.>/?[]\'"`~\\|')
+MAYUSCULAS = frozenset('ABCDEFGHIJKLMNOPQRSTUVWXYZ')
+MINUSCULAS = frozenset('abcdefghijklmnopqrstuvwxyz')
+DIGITOS = frozenset('0123456789')
+
+UMBRAL_SIMILITUD = 0.5
+
+def validarNombre(nombre):
+    if len(nombre) < 10 or len(nombre) > 30:
+        return 'Por favor, ingrese un nombre válido con longitud de 10 a 30 caracteres'
+    elif any(caracter.isdigit() for caracter in nombre):
+        return 'Por favor, evite incluir números en el nombre'
+    return None
+
+def similar(texto, password):
+    # Se compara la contraseña completa. La cota por longitudes (la de real_quick_ratio) se calcula antes
+    # de construir el SequenceMatcher, que indexa la contraseña: una mucho más larga que el texto no puede superar el umbral
+    if 2 * min(len(texto), len(password)) <= UMBRAL_SIMILITUD * (len(texto) + len(password)):
+        return False
+    comparador = difflib.SequenceMatcher(None, texto.lower(), password.lower())
+    # Las demás cotas rápidas descartan la mayoría de los casos antes del cálculo completo
+    return (
+        comparador.quick_ratio() > UMBRAL_SIMILITUD and
+        comparador.ratio() > UMBRAL_SIMILITUD
+    )
+
+def validarPassword(password, nombre, correo):
+    if len(password) < 8:
+        return 'Por favor, ingresa una contraseña con un mínimo de 8 caracteres'
+
+    # Un solo recorrido de la contraseña para construir el conjunto de caracteres usados
+    caracteres = set(password)
+    espacio = ' ' in caracteres
+    mayuscula = not caracteres.isdisjoint(MAYUSCULAS)
+    minuscula = not caracteres.isdisjoint(MINUSCULAS)
+    digito = not caracteres.isdisjoint(DIGITOS)
+    especial = not caracteres.isdisjoint(ESPECIALES)
+
+    if espacio:
+        return 'Por favor, asegúrate que tu contraseña no contenga espacios'
+    elif not mayuscula:
+        return 'Por favor, asegúrate de incluir al menos una letra mayúscula en tu contraseña'
+    elif not minuscula:
+        return 'Por favor, asegúrate de incluir al menos una letra minúscula en tu contraseña'
+    elif not digito:
+        return 'Por favor, asegúrate de incluir al menos un número en tu contraseña'
+    elif not especial:
+        return 'Por favor, asegúrate de incluir al menos un carácter especial en tu contraseña'
+    elif similar(nombre, password) and similar(correo, password):
+        return 'Por favor, elige una contraseña que no contenga información personal'
+    return None
@@ -1,14 +1,16 @@
-from smtplib import SMTPException
 from .models import *
 from .serializers import *
+from . import autenticacion, clasificacion, catalogo, completados, contadores, correos, exportacion, idempotencia, limites, metricas, perfilado, progresos, rachas, validaciones
 from django.conf import settings
 from django.contrib.auth.hashers import make_password, check_password
-from django.core import validators, exceptions, mail
-from django.db.models import Sum, Min
+from django.core import validators, exceptions
+from django.db import transaction
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.utils.http import parse_etags
 from drf_yasg.utils import swagger_auto_schema
 from rest_framework import permissions, response, status, decorators, viewsets
 from rest_framework_simplejwt import tokens, exceptions as TokenError
-import difflib, re, jwt, imghdr, random, datetime, json
+import imghdr, os, random
 
 @swagger_auto_schema(
     method = 'POST',
@@ -16,6 +18,7 @@ import difflib, re, jwt, imghdr, random, datetime, json
     responses = {
         201: 'Registro exitoso. Se envía un correo electrónico de confirmación.',
         400: 'Error en la solicitud. Se proporciona un mensaje descriptivo del error.',
+        429: 'Demasiadas solicitudes. La cabecera Retry-After indica los segundos de espera.',
         500: 'Error interno del servidor.'
     },
     operation_description =
@@ -45,6 +48,7 @@ import difflib, re, jwt, imghdr, random, datetime, json
     """
 )
 @decorators.api_view(['POST'])
+@decorators.throttle_classes(limites.LIMITES)
 def register(request):
     try:
         nombre = request.data['nombre']
@@ -52,50 +56,36 @@ def register(request):
         password = request.data['password']
         datos = request.data.copy()
 
-        if len(nombre) < 10 or len(nombre) > 30:
-            return http_400_bad_request('Por favor, ingrese un nombre válido con longitud de 10 a 30 caracteres')
-        elif any(caracter.isdigit() for caracter in nombre):
-            return http_400_bad_request('Por favor, evite incluir números en el nombre')
+        error = validaciones.validarNombre(nombre)
+        if error:
+            return http_400_bad_request(error)
 
         if not correo:
             return http_400_bad_request('Por favor, asegúrate de ingresar tu correo electrónico. Este campo no puede estar vacío')
         elif len(correo) > 254:
             return http_400_bad_request('Por favor, ingrese un correo válido con un máximo de 254 caracteres')
-        elif Usuario.objects.filter(correo = correo).exists():
-            if Usuario.objects.filter(correo = correo, estado = True):
-                return http_400_bad_request('Por favor selecciona otro correo electrónico, debido a que ya existe una cuenta asociada a este correo')
-            elif Usuario.objects.filter(correo = correo, estado = False):
-                Usuario.objects.filter(correo = correo, estado = False).delete()
-        else:
+
+        estadoCorreo = Usuario.objects.filter(correo = correo).values_list('estado', flat = True).first()
+        if estadoCorreo:
+            return http_400_bad_request('Por favor selecciona otro correo electrónico, debido a que ya existe una cuenta asociada a este correo')
+        elif estadoCorreo is None:
             validators.validate_email(correo)
 
-        if len(password) < 8:
-            return http_400_bad_request('Por favor, ingresa una contraseña con un mínimo de 8 caracteres')
-        elif ' ' in password:
-            return http_400_bad_request('Por favor, asegúrate que tu contraseña no contenga espacios')
-        elif not re.search(r'[A-Z]', password):
-            return http_400_bad_request('Por favor, asegúrate de incluir al menos una letra mayúscula en tu contraseña')
-        elif not re.search(r'[a-z]', password):
-            return http_400_bad_request('Por favor, asegúrate de incluir al menos una letra minúscula en tu contraseña')
-        elif not re.search(r'\d', password):
-            return http_400_bad_request('Por favor, asegúrate de incluir al menos un número en tu contraseña')
-        else:
-            patron = r'[!@#$%^&*()\-_=+{};:,<.>/?[\]\'"`~\\|]'
-            similitud_1 = difflib.SequenceMatcher(None, nombre.lower(), password.lower()).ratio()
-            similitud_2 = difflib.SequenceMatcher(None, correo.lower(), password.lower()).ratio()
-            if not re.search(patron, password):
-                return http_400_bad_request('Por favor, asegúrate de incluir al menos un carácter especial en tu contraseña')
-            elif similitud_1 > 0.5 and similitud_2 > 0.5:
-                return http_400_bad_request('Por favor, elige una contraseña que no contenga información personal')
+        error = validaciones.validarPassword(password, nombre, correo)
+        if error:
+            return http_400_bad_request(error)
     
+        if estadoCorreo is False:
+            Usuario.objects.filter(correo = correo, estado = False).delete()
         datos['password'] = make_password(password)
         foto = FotoPredeterminada.objects.all()
         datos['foto'] = foto[random.randint(0, (FotoPredeterminada.objects.count() - 1))].foto
         serializer = UsuarioSerializer(data = datos)
         if serializer.is_valid():
-            usuario = serializer.save()
-            token = tokens.RefreshToken.for_user(usuario)
-            mensaje = f"""
+            with transaction.atomic():
+                usuario = serializer.save()
+                token = tokens.RefreshToken.for_user(usuario)
+                mensaje = f"""
                 Estimada/o {usuario.nombre},
 
                 ¡Bienvenida/o a nuestro portal de programación! Estamos encantados de que te hayas registrado con nosotros.
@@ -113,13 +103,11 @@ def register(request):
                 Atentamente,
                 SaddWy
             """
-            mail.send_mail(
-                '¡Bienvenida/o a SaddWy! Confirma tu cuenta para comenzar',
-                mensaje,
-                settings.EMAIL_HOST_USER,
-                [usuario.correo],
-                fail_silently = False,
-            )
+                correos.encolar(
+                    correos.ASUNTO_REGISTRO,
+                    mensaje,
+                    [usuario.correo]
+                )
             return response.Response({
                 'estado': 201,
                 'validar': True,
@@ -142,6 +130,7 @@ def register(request):
     responses = {
         200: 'Inicio de sesión exitoso. Se proporciona información del usuario y su progreso.',
         400: 'Error en la solicitud. Se proporciona un mensaje descriptivo del error.',
+        429: 'Demasiadas solicitudes. La cabecera Retry-After indica los segundos de espera.',
         500: 'Error interno del servidor.'
     },
     operation_description =
@@ -164,6 +153,7 @@ def register(request):
     """
 )
 @decorators.api_view(['POST'])
+@decorators.throttle_classes(limites.LIMITES)
 def login(request):
     try:
         correo = request.data['correo']
@@ -182,18 +172,17 @@ def login(request):
             return http_400_bad_request('Lo siento, el correo y/o contraseña ingresados son incorrectos. Por favor, inténtalo nuevamente')
 
         if not usuario.administrador:
-            for lenguaje in Lenguaje.objects.filter(estado = True):
-                if not Progreso.objects.filter(usuario = usuario, lenguaje = lenguaje).exists():
-                    Progreso.objects.create(usuario = usuario, lenguaje = lenguaje)
+            progresos.asignar(usuario)
 
         usuarioSerializer = UsuarioSerializer(usuario, context = {'request': request})
-        token = tokens.RefreshToken.for_user(usuario) 
+        token = autenticacion.generarToken(usuario)
         return response.Response({
             'estado': 200,
             'validar': True,
             'mensaje': '¡Inicio de sesión exitoso!',
             'dato': {
                 'foto': usuarioSerializer.data['foto'],
+                'fotos': usuarioSerializer.data['fotos'],
                 'nombre': usuarioSerializer.data['nombre'],
                 'acceso': str(token.access_token),
                 'actualizar': str(token),
@@ -224,7 +213,9 @@ def validate(request, token):
         usuario = Usuario.objects.get(id = id.payload['user_id'])
         if not usuario.estado:
             usuario.estado = True        
-            usuario.save()            
+            usuario.save()
+            if not usuario.administrador:
+                progresos.asignar(usuario)
             return response.Response({
                 'estado': 200,
                 'validar': True,
@@ -247,6 +238,7 @@ def validate(request, token):
     responses = {
         200: 'Solicitud de recuperación enviada exitosamente. Se proporciona un mensaje informativo.',
         400: 'Error en la solicitud. Se proporciona un mensaje descriptivo del error.',
+        429: 'Demasiadas solicitudes. La cabecera Retry-After indica los segundos de espera.',
         500: 'Error interno del servidor.'
     },
     operation_description =
@@ -263,6 +255,7 @@ def validate(request, token):
     """
 )
 @decorators.api_view(['POST'])
+@decorators.throttle_classes(limites.LIMITES)
 def recoveryEmail(request):
     try:
         correo = request.data['correo']
@@ -291,12 +284,10 @@ def recoveryEmail(request):
 
             El equipo de SaddWy
             '''
-        mail.send_mail(
-            'Restablecimiento de contraseña en SaddWy',
+        correos.encolar(
+            correos.ASUNTO_RECUPERACION,
             mensaje,
-            settings.EMAIL_HOST_USER,
-            [usuario.correo],
-            fail_silently = False
+            [usuario.correo]
         )
         return response.Response({
             'estado': 200,
@@ -309,8 +300,6 @@ def recoveryEmail(request):
         return http_400_bad_request('Por favor, verifica que el correo esté escrito correctamente debido a que has ingresado uno no válido')
     except Usuario.DoesNotExist:
         return http_400_bad_request('Lo siento, los datos ingresados son incorrectos. Por favor, inténtalo nuevamente')
-    except SMTPException:
-        return http_500_internal_server_error('Lo siento, ha habido un problema al enviar el correo electrónico. Por favor, intenta nuevamente más tarde')
     except Exception as e:
         return http_500_internal_server_error(str(e))
 
@@ -320,6 +309,7 @@ def recoveryEmail(request):
     responses = {
         200: 'Recuperación exitosa. La contraseña de la cuenta del usuario ha sido actualizada correctamente.',
         400: 'Error en la solicitud. Se proporciona un mensaje descriptivo del error.',
+        429: 'Demasiadas solicitudes. La cabecera Retry-After indica los segundos de espera.',
         500: 'Error interno del servidor.'
     },
     operation_description = 
@@ -337,30 +327,16 @@ def recoveryEmail(request):
     """
 )
 @decorators.api_view(['POST'])
+@decorators.throttle_classes(limites.LIMITES)
 def recoverAccount(request, token):
     try:
         id = tokens.RefreshToken(token)
         password = request.data['password']
         usuario = Usuario.objects.get(id = id.payload['user_id'], estado = True)
         
-        if len(password) < 8:
-            return http_400_bad_request('Por favor, ingresa una contraseña con un mínimo de 8 caracteres')
-        elif ' ' in password:
-            return http_400_bad_request('Por favor, asegúrate que tu contraseña no contenga espacios')
-        elif not re.search(r'[A-Z]', password):
-            return http_400_bad_request('Por favor, asegúrate de incluir al menos una letra mayúscula en tu contraseña')
-        elif not re.search(r'[a-z]', password):
-            return http_400_bad_request('Por favor, asegúrate de incluir al menos una letra minúscula en tu contraseña')
-        elif not re.search(r'\d', password):
-            return http_400_bad_request('Por favor, asegúrate de incluir al menos un número en tu contraseña')
-        else:
-            patron = r'[!@#$%^&*()\-_=+{};:,<.>/?[\]\'"`~\\|]'
-            similitud1 = difflib.SequenceMatcher(None, usuario.nombre.lower(), password.lower()).ratio()
-            similitud2 = difflib.SequenceMatcher(None, usuario.correo.lower(), password.lower()).ratio()
-            if not re.search(patron, password):
-                return http_400_bad_request('Por favor, asegúrate de incluir al menos un carácter especial en tu contraseña')
-            elif similitud1 > 0.5 and similitud2 > 0.5:
-                return http_400_bad_request('Por favor, elige una contraseña que no contenga información personal')
+        error = validaciones.validarPassword(password, usuario.nombre, usuario.correo)
+        if error:
+            return http_400_bad_request(error)
         
         usuario.password = make_password(password)
         usuario.save()
@@ -402,11 +378,9 @@ def recoverAccount(request, token):
 @decorators.permission_classes([permissions.IsAuthenticated])
 def profile(request):
     try:
-        token = request.headers.get('Authorization').split()[1]
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms = ["HS256"])
-        usuario = Usuario.objects.get(id = payload['user_id'])
+        usuario = request.user.usuario
         usuarioSerializer = UsuarioSerializer(usuario, context = {'request': request})
-        progresoSerializer = ProgresoSerializer(Progreso.objects.filter(usuario = usuario.id), many = True, context = {'request': request})
+        progresoSerializer = ProgresoSerializer(Progreso.objects.filter(usuario = usuario.id).select_related('lenguaje').only('progresoLenguaje', 'lenguaje__nombre', 'lenguaje__logo'), many = True)
         return response.Response({
             'estado': 200,
             'validar': True,
@@ -414,17 +388,18 @@ def profile(request):
             'dato': {
                 'usuario': {
                     'foto': usuarioSerializer.data['foto'],
+                    'fotos': usuarioSerializer.data['fotos'],
                     'nombre': usuarioSerializer.data['nombre'],
                     'correo': usuarioSerializer.data['correo'],
                     'racha': usuarioSerializer.data['racha'],
+                    'rachaActual': usuarioSerializer.data['rachaActual'],
+                    'rachaMaxima': usuarioSerializer.data['rachaMaxima'],
                     'registro': usuarioSerializer.data['registro']
                 },
                 'progreso': progresoSerializer.data
             }
         }, status = status.HTTP_200_OK)
-    except (IndexError, jwt.exceptions.InvalidTokenError):
-        return http_400_bad_request('El token de acceso que has proporcionado no es válido o tiene un formato incorrecto. Por favor, revisa y asegúrate de que el token sea correcto')
-    except (jwt.exceptions.DecodeError, Usuario.DoesNotExist, Progreso.DoesNotExist):
+    except (Usuario.DoesNotExist, Progreso.DoesNotExist):
         return http_500_internal_server_error('Lo siento, ha ocurrido un problema al procesar tu solicitud. Por favor, intenta nuevamente más tarde')
     except Exception as e:
         return http_500_internal_server_error(str(e))
@@ -434,12 +409,14 @@ def profile(request):
     operation_summary = 'Obtener tarjetas de lenguajes',
     responses = {
         200: 'Éxito. Se devuelven las tarjetas de los lenguajes disponibles.',
+        304: 'Sin cambios. El catálogo coincide con el ETag enviado en If-None-Match.',
         401: 'No autorizado. El usuario no tiene permiso para acceder a esta función.',
         500: 'Error interno del servidor.'
     },
     operation_description = 
     """
     Este endpoint permite a los usuarios autorizados visualizar las tarjetas de los lenguajes disponibles, junto con sus niveles respectivos. Los niveles que están marcados como activos están permitidos para que el usuario pueda comenzar las actividades y desbloquear más niveles.
+    La respuesta incluye un ETag; si se envía de nuevo en If-None-Match y el catálogo no ha cambiado, se responde 304 sin cuerpo.
 
     ---
     parámetros
@@ -454,14 +431,12 @@ def profile(request):
 @decorators.api_view(['GET'])
 @decorators.permission_classes([permissions.IsAuthenticated])
 def cards(request):
-    try:    
-        serializer = CartaSerializer(Lenguaje.objects.filter(estado = True), many = True, context = {'request': request})
-        return response.Response({
-            'estado': 200,
-            'validar': True,
-            'mensaje': '¡Excelente! La información ha sido procesada exitosamente',
-            'dato': serializer.data
-        }, status = status.HTTP_200_OK)
+    try:
+        etag, cuerpo = catalogo.obtener()
+        cabeceras = {'ETag': etag, 'Cache-Control': 'private, no-cache'}
+        if etag in parse_etags(request.headers.get('If-None-Match', '')):
+            return HttpResponseNotModified(headers = cabeceras)
+        return HttpResponse(cuerpo, content_type = 'application/json', headers = cabeceras)
     except Exception as e:
         return http_500_internal_server_error(str(e))
 
@@ -491,25 +466,21 @@ def cards(request):
 @decorators.permission_classes([permissions.IsAuthenticated])
 def ranking(request):
     try:
-        token = request.headers.get('Authorization').split()[1]
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms = ["HS256"])
-        progresos = Progreso.objects.values('usuario').annotate(
-            puntos = Sum('puntos'), 
-            registro = Min('registro')
-        ).order_by('-puntos', 'registro')[:50]
-        listado = {}
-        for i, resultado in enumerate(progresos, start = 1):
-            listado[i] = {
-                'puesto': i,
-                'nombre': Usuario.objects.get(id = resultado['usuario']).nombre,
-                'puntos': resultado['puntos']
+        numeroPagina = int(request.query_params.get('pagina', 1))
+        listado = {fila['puesto']: fila for fila in clasificacion.pagina(numeroPagina)}
+        puntaje = Puntaje.objects.select_related('usuario').filter(usuario_id = request.user.id).first()
+        if puntaje:
+            usuario = {
+                'puesto': clasificacion.posicion(puntaje),
+                'nombre': puntaje.usuario.nombre,
+                'puntos': puntaje.puntos
+            }
+        else:
+            usuario = {
+                'puesto': None,
+                'nombre': request.user.usuario.nombre,
+                'puntos': 0
             }
-            if resultado['usuario'] == payload['user_id']:
-                usuario = {
-                    'puesto': i,
-                    'nombre': Usuario.objects.get(id = payload['user_id']).nombre,
-                    'puntos': resultado['puntos']
-                }
         return response.Response({
             'estado': 200,
             'validar': True,
@@ -519,9 +490,9 @@ def ranking(request):
                 'usuario': usuario
             }
         }, status = status.HTTP_200_OK)
-    except (IndexError, jwt.exceptions.InvalidTokenError):
-        return http_400_bad_request('El token de acceso que has proporcionado no es válido o tiene un formato incorrecto. Por favor, revisa y asegúrate de que el token sea correcto')
-    except (jwt.exceptions.DecodeError, Usuario.DoesNotExist):
+    except ValueError:
+        return http_400_bad_request('Por favor, ingresa un número de página válido')
+    except Usuario.DoesNotExist:
         return http_500_internal_server_error('Lo siento, ha ocurrido un problema al procesar tu solicitud. Por favor, intenta nuevamente más tarde')
     except Exception as e:
         return http_500_internal_server_error(str(e))
@@ -570,9 +541,7 @@ def ranking(request):
 @decorators.permission_classes([permissions.IsAuthenticated])
 def editUser(request):
     try:
-        token = request.headers.get('Authorization').split()[1]
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms = ["HS256"])
-        usuario = Usuario.objects.get(id = payload['user_id'])
+        usuario = request.user.usuario
         foto = request.FILES.get('foto')
         nombre = request.data.get('nombre')
         password = request.data.get('password')
@@ -581,36 +550,18 @@ def editUser(request):
         if foto:
             if not foto.name.lower().endswith(('.jpg', '.jpeg', '.png')):
                 return http_400_bad_request('Por favor, asegúrate de cargar una imagen en formato JPG o PNG para completar el proceso')
-            if 'predeterminado' not in usuario.foto.path:
-                usuario.foto.delete()
 
         if nombre:
-            if len(nombre) < 10 or len(nombre) > 30:
-                return http_400_bad_request('Por favor, ingrese un nombre válido con longitud de 10 a 30 caracteres')
-            elif any(caracter.isdigit() for caracter in nombre):
-                return http_400_bad_request('Por favor, evite incluir números en el nombre')
+            error = validaciones.validarNombre(nombre)
+            if error:
+                return http_400_bad_request(error)
         else:
             nombre = usuario.nombre
             
         if password:
-            if len(password) < 8:
-                return http_400_bad_request('Por favor, ingresa una contraseña con un mínimo de 8 caracteres')
-            elif ' ' in password:
-                return http_400_bad_request('Por favor, asegúrate que tu contraseña no contenga espacios')
-            elif not re.search(r'[A-Z]', password):
-                return http_400_bad_request('Por favor, asegúrate de incluir al menos una letra mayúscula en tu contraseña')
-            elif not re.search(r'[a-z]', password):
-                return http_400_bad_request('Por favor, asegúrate de incluir al menos una letra minúscula en tu contraseña')
-            elif not re.search(r'\d', password):
-                return http_400_bad_request('Por favor, asegúrate de incluir al menos un número en tu contraseña')
-            else:
-                patron = r'[!@#$%^&*()\-_=+{};:,<.>/?[\]\'"`~\\|]'
-                similitud_1 = difflib.SequenceMatcher(None, nombre.lower(), password.lower()).ratio()
-                similitud_2 = difflib.SequenceMatcher(None, usuario.correo.lower(), password.lower()).ratio()
-                if not re.search(patron, password):
-                    return http_400_bad_request('Por favor, asegúrate de incluir al menos un carácter especial en tu contraseña')
-                elif similitud_1 > 0.5 and similitud_2 > 0.5:
-                    return http_400_bad_request('Por favor, elige una contraseña que no contenga información personal')
+            error = validaciones.validarPassword(password, nombre, usuario.correo)
+            if error:
+                return http_400_bad_request(error)
             datos['password'] = make_password(password)
 
         usuarioSerializer = UsuarioSerializer(instance = usuario, data = datos, context = {'request': request}, partial = True)
@@ -622,19 +573,49 @@ def editUser(request):
                 'mensaje': '¡Información actualizada exitosamente!',
                 'dato': {
                     'foto': usuarioSerializer.data['foto'],
+                    'fotos': usuarioSerializer.data['fotos'],
                     'nombre': usuarioSerializer.data['nombre'],
                     'correo': usuarioSerializer.data['correo'],
                 }
             }, status = status.HTTP_200_OK)
         else:
             return http_400_bad_request(usuarioSerializer.errors)
-    except (IndexError, jwt.exceptions.InvalidTokenError):
-        return http_400_bad_request('El token de acceso que has proporcionado no es válido o tiene un formato incorrecto. Por favor, revisa y asegúrate de que el token sea correcto')
-    except (jwt.exceptions.DecodeError, Usuario.DoesNotExist):
+    except Usuario.DoesNotExist:
         return http_500_internal_server_error('Lo siento, ha ocurrido un problema al procesar tu solicitud. Por favor, intenta nuevamente más tarde')
     except Exception as e:
         return http_500_internal_server_error(str(e))
 
+def completarNivel(request, id):
+    try:
+        usuario = request.user.usuario
+        intentos = request.data['intentos']
+        nivel = Nivel.objects.select_related('lenguaje').get(id = id, estado = True)
+        rachas.registrar(usuario)
+        puntosGanados = completados.completar(usuario.id, nivel, intentos)
+        if puntosGanados is None:
+            return response.Response({
+                'estado': 200,
+                'validar': True,
+                'mensaje': f'¡Felicitaciones! Ya has completado el {nivel.nombre} anteriormente'
+            })
+        return response.Response({
+            'estado': 200,
+            'validar': True,
+            'mensaje': '¡Fantástico! ¡Has completado todas las preguntas!. ¡Sigue así y estarás dominando la programación en poco tiempo!'
+        })
+    except KeyError:
+        return http_400_bad_request('Por favor, proporciona los datos obligatorios que faltan en la solicitud')
+    except Nivel.DoesNotExist:
+        return http_400_bad_request('Lo siento, el nivel especificado no existe en el sistema. Por favor, verifica el nombre del nivel e inténtalo nuevamente')
+    except Usuario.DoesNotExist:
+        return http_500_internal_server_error('Lo siento, ha ocurrido un problema al procesar tu solicitud. Por favor, intenta nuevamente más tarde')
+    except Progreso.DoesNotExist:
+        return http_500_internal_server_error('Lo siento, no hemos podido encontrar el progreso asignado automáticamente para este usuario. Por favor, comunícate con el equipo de soporte para obtener asistencia')
+    except ValueError:
+        return http_500_internal_server_error('Lo siento, no pudimos completar la operación de conversión de datos debido a un error interno del sistema. Por favor, comunícate con el equipo técnico para obtener asistencia')
+    except Exception as e:
+        return http_500_internal_server_error(str(e))
+
 @swagger_auto_schema(
     method = 'GET',
     operation_summary = 'Obtener preguntas por id',
@@ -671,6 +652,8 @@ def editUser(request):
         200: 'Éxito. Devuelve información actualizada del usuario y su progreso.',
         400: 'Error en la solicitud. Se proporciona un mensaje descriptivo del error.',
         401: 'No autorizado. El token de acceso proporcionado es inválido o está en un formato incorrecto.',
+        409: 'Conflicto. Otra solicitud con el mismo Idempotency-Key todavía se está procesando.',
+        422: 'Entidad no procesable. El Idempotency-Key ya se usó con otros datos.',
         500: 'Error interno del servidor.'
     },
     operation_description = 
@@ -697,6 +680,12 @@ def editUser(request):
       descripción: El número de intentos realizados para completar las preguntas.
       requerido: true
       tipo: string
+
+    - nombre: Idempotency-Key
+      en: header
+      descripción: Identificador único del envío. Las repeticiones con la misma clave devuelven la respuesta original sin volver a sumar puntos. Reutilizar la clave con otros datos devuelve 422.
+      requerido: false
+      tipo: string
     """
 )
 @decorators.api_view(['GET', 'POST'])
@@ -705,7 +694,7 @@ def questions(request, id):
     if request.method == 'GET':
         try:
             niveles = Nivel.objects.get(id = id, estado = True)
-            serializer = PreguntaSerializer(Pregunta.objects.filter(nivel = niveles, estado = True), many = True)
+            serializer = PreguntaSerializer(Pregunta.objects.filter(nivel = niveles, estado = True).select_related('nivel'), many = True)
             return response.Response({
                 'estado': 200,
                 'validar': True,
@@ -719,60 +708,15 @@ def questions(request, id):
         except Exception as e:
             return http_500_internal_server_error(str(e))
     elif request.method == 'POST':
-        try:
-            token = request.headers.get('Authorization').split()[1]
-            payload = jwt.decode(token, settings.SECRET_KEY, algorithms = ["HS256"])
-            usuario = Usuario.objects.get(id = payload['user_id'])
-            intentos = request.data['intentos']
-            nivel = Nivel.objects.get(id = id, estado = True)
-            nombreNivel = nivel.nombre
-            progreso = Progreso.objects.get(usuario = usuario, lenguaje = nivel.lenguaje)
-            dias = {
-                'Monday': 'Lunes',
-                'Tuesday': 'Martes',
-                'Wednesday': 'Miércoles',
-                'Thursday': 'Jueves',
-                'Friday': 'Viernes',
-                'Saturday': 'Sábado',
-                'Sunday': 'Domingo'
-            }
-            nombreDia = dias.get(datetime.datetime.now().strftime("%A"))
-            usuario.racha[nombreDia] = True
-            usuario.save()
-            nivelesCompletados = progreso.nivelesCompletados
-            if nombreNivel not in nivelesCompletados:
-                if nivel.totalPreguntas <= intentos:
-                    progreso.puntos += nivel.totalPreguntas
-                else:
-                    progreso.puntos += (nivel.totalPreguntas - intentos) * 2 + nivel.totalPreguntas
-                nivelesCompletados[nombreNivel] = True
-            else:
-                return response.Response({
-                    'estado': 200,
-                    'validar': True,
-                    'mensaje': f'¡Felicitaciones! Ya has completado el {nombreNivel} anteriormente'
-                })
-            progreso.progresoLenguaje = len(nivelesCompletados) * 100 / Nivel.objects.filter(lenguaje = nivel.lenguaje, estado = True).count()
-            progreso.save()
-            return response.Response({
-                'estado': 200,
-                'validar': True,
-                'mensaje': '¡Fantástico! ¡Has completado todas las preguntas!. ¡Sigue así y estarás dominando la programación en poco tiempo!'
-            })
-        except KeyError:
-            return http_400_bad_request('Por favor, proporciona los datos obligatorios que faltan en la solicitud')
-        except (IndexError, jwt.exceptions.InvalidTokenError, json.JSONDecodeError):
-            return http_400_bad_request('El token de acceso que has proporcionado no es válido o tiene un formato incorrecto. Por favor, revisa y asegúrate de que el token sea correcto')
-        except Nivel.DoesNotExist:
-            return http_400_bad_request('Lo siento, el nivel especificado no existe en el sistema. Por favor, verifica el nombre del nivel e inténtalo nuevamente')
-        except jwt.exceptions.DecodeError:
-            return http_500_internal_server_error('Lo siento, ha ocurrido un problema al procesar tu solicitud. Por favor, intenta nuevamente más tarde')
-        except Progreso.DoesNotExist:
-            return http_500_internal_server_error('Lo siento, no hemos podido encontrar el progreso asignado automáticamente para este usuario. Por favor, comunícate con el equipo de soporte para obtener asistencia')
-        except ValueError:
-            return http_500_internal_server_error('Lo siento, no pudimos completar la operación de conversión de datos debido a un error interno del sistema. Por favor, comunícate con el equipo técnico para obtener asistencia')
-        except Exception as e:
-            return http_500_internal_server_error(str(e))
+        # Con Idempotency-Key, las repeticiones devuelven el resultado guardado sin tocar la base de datos
+        llave = idempotencia.clave(request, f'questions:{id}')
+        if llave is None:
+            return completarNivel(request, id)
+        huella = idempotencia.huella(request)
+        repetida = idempotencia.reservar(llave, huella)
+        if repetida is not None:
+            return repetida
+        return idempotencia.guardar(llave, huella, completarNivel(request, id))
 
 @swagger_auto_schema(
     method = 'POST',
@@ -823,10 +767,9 @@ def ContactUs(request):
         correo = request.data['correo']
         mensaje = request.data['mensaje']
 
-        if len(nombre) < 10 or len(nombre) > 30:
-            return http_400_bad_request('Por favor, ingrese un nombre válido con longitud de 10 a 30 caracteres')
-        elif any(caracter.isdigit() for caracter in nombre):
-            return http_400_bad_request('Por favor, evite incluir números en el nombre')
+        error = validaciones.validarNombre(nombre)
+        if error:
+            return http_400_bad_request(error)
         
         if celular[0] != '3' or len(celular) != 10:
             return http_400_bad_request('El número de celular proporcionado no es válido para Colombia. Por favor, verifica e inténtalo nuevamente.')
@@ -862,6 +805,115 @@ def ContactUs(request):
     except Exception as e:
         return http_500_internal_server_error(str(e))
 
+@swagger_auto_schema(
+    method = 'GET',
+    operation_summary = 'Exportar datos',
+    responses = {
+        200: 'Éxito. Se transmiten las filas en el formato solicitado.',
+        400: 'Error en la solicitud. Se proporciona un mensaje descriptivo del error.',
+        403: 'Prohibido. Solo los administradores pueden exportar datos.'
+    },
+    operation_description =
+    """
+    Este endpoint permite a los administradores descargar todos los usuarios, progresos o mensajes de contacto. Las filas se envían a medida que se leen de la base de datos, por lo que la memoria usada no depende del tamaño de la tabla.
+
+    ---
+    parámetros:
+      - nombre: modelo
+        en: path
+        descripción: Datos a exportar (usuarios, progresos o contactos).
+        requerido: true
+        tipo: string
+
+      - nombre: formato
+        en: query
+        descripción: Formato de salida (csv o ndjson). Por defecto csv.
+        requerido: false
+        tipo: string
+    """
+)
+@decorators.api_view(['GET'])
+@decorators.permission_classes([autenticacion.EsAdministrador])
+def export(request, modelo):
+    formato = request.query_params.get('formato', 'csv')
+    if modelo not in exportacion.MODELOS:
+        return http_400_bad_request('Por favor, elige entre usuarios, progresos o contactos para exportar')
+    if formato not in exportacion.FORMATOS:
+        return http_400_bad_request('Por favor, elige el formato csv o ndjson')
+    respuesta = StreamingHttpResponse(exportacion.generar(modelo, formato), content_type = exportacion.FORMATOS[formato])
+    respuesta['Content-Disposition'] = f'attachment; filename="{modelo}.{formato}"'
+    return respuesta
+
+@swagger_auto_schema(
+    method = 'GET',
+    operation_summary = 'Listar perfiles de rendimiento',
+    responses = {
+        200: 'Éxito. Se devuelven los perfiles más recientes.',
+        403: 'Prohibido. Solo los administradores pueden consultar los perfiles.'
+    },
+    operation_description =
+    """
+    Este endpoint permite a los administradores listar los perfiles generados al enviar la cabecera X-Perfil o el parámetro ?perfil=1 en cualquier solicitud. Cada perfil tiene un archivo .prof (pstats) y un archivo .txt con pilas colapsadas para flamegraph.
+    """
+)
+@decorators.api_view(['GET'])
+@decorators.permission_classes([autenticacion.EsAdministrador])
+def profiles(request):
+    archivos = sorted(perfilado.listar(), key = lambda archivo: archivo['modificado'], reverse = True)[:100]
+    return response.Response({
+        'estado': 200,
+        'validar': True,
+        'mensaje': '',
+        'dato': archivos
+    }, status = status.HTTP_200_OK)
+
+@swagger_auto_schema(
+    method = 'GET',
+    operation_summary = 'Descargar perfil de rendimiento',
+    responses = {
+        200: 'Éxito. Se descarga el archivo del perfil.',
+        403: 'Prohibido. Solo los administradores pueden descargar los perfiles.',
+        404: 'El perfil no existe.'
+    },
+    operation_description =
+    """
+    Este endpoint permite a los administradores descargar un perfil (.prof o .txt) por su nombre.
+    ---
+    parámetros:
+      - nombre: nombre
+        en: path
+        descripción: Nombre del archivo devuelto por el listado de perfiles.
+        requerido: true
+        tipo: string
+    """
+)
+@decorators.api_view(['GET'])
+@decorators.permission_classes([autenticacion.EsAdministrador])
+def profileFile(request, nombre):
+    ruta = os.path.join(perfilado.carpeta(), nombre)
+    if not perfilado.NOMBRE.match(nombre) or not os.path.isfile(ruta):
+        return http_404_not_found()
+    return FileResponse(open(ruta, 'rb'), as_attachment = True, filename = nombre)
+
+@swagger_auto_schema(
+    method = 'GET',
+    operation_summary = 'Métricas para Prometheus',
+    responses = {
+        200: 'Éxito. Se devuelven las métricas en el formato de texto de Prometheus.',
+        403: 'Prohibido. Falta la cabecera Authorization: Bearer <METRICAS_TOKEN> o METRICAS_TOKEN no está configurado.'
+    },
+    operation_description =
+    """
+    Este endpoint expone en formato de texto de Prometheus la cantidad de solicitudes por vista, método y código de estado, histogramas de latencia por vista, consultas SQL por vista, la duración de los envíos SMTP de register y recoveryEmail y la proporción de aciertos de la caché.
+    Con METRICAS_DIR configurado se suman las métricas de todos los procesos que comparten esa carpeta, incluido el worker enviarCorreos.
+    """
+)
+@decorators.api_view(['GET'])
+@decorators.authentication_classes([])
+@decorators.permission_classes([autenticacion.EsRecolectorMetricas])
+def metrics(request):
+    return HttpResponse(metricas.exponer(), content_type = 'text/plain; version=0.0.4; charset=utf-8')
+
 def http_400_bad_request(mensaje):
     return response.Response({
         'estado': 400,
@@ -883,10 +935,85 @@ def http_500_internal_server_error(mensaje):
         'mensaje': mensaje
     }, status = status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+class OperacionesMasivas:
+    # Creación, edición y cambio de estado de muchas filas en una sola transacción.
+    # Cada vista indica qué filas relacionadas quedan afectadas y cómo recalcularlas una sola vez.
+    def afectados(self, instancias):
+        return set()
+
+    def recalcular(self, afectados):
+        pass
+
+    def sonIds(self, ids):
+        # Cadenas, listas o diccionarios harían fallar in_bulk, id__in o set() con un error 500
+        return all(isinstance(id, int) and not isinstance(id, bool) for id in ids)
+
+    @decorators.action(detail = False, methods = ['post', 'patch'], url_path = 'bulk', permission_classes = [autenticacion.EsAdministrador])
+    def masivo(self, request):
+        if not isinstance(request.data, list) or not request.data:
+            return http_400_bad_request('Por favor, envía una lista con los elementos a procesar')
+        modelo = self.get_queryset().model
+        if request.method == 'POST':
+            serializer = self.get_serializer(data = request.data, many = True)
+            serializer.is_valid(raise_exception = True)
+            with transaction.atomic(), contadores.suspendido():
+                instancias = modelo.objects.bulk_create([modelo(**datos) for datos in serializer.validated_data])
+                self.recalcular(self.afectados(instancias))
+            return response.Response({
+                'estado': 201,
+                'validar': True,
+                'mensaje': '¡Información registrada exitosamente!',
+                'dato': {'ids': [instancia.id for instancia in instancias]}
+            }, status = status.HTTP_201_CREATED)
+
+        ids = [elemento.get('id') if isinstance(elemento, dict) else None for elemento in request.data]
+        if not self.sonIds(ids):
+            return http_400_bad_request('Por favor, verifica que todos los elementos tengan un id existente')
+        instancias = modelo.objects.in_bulk(ids)
+        if len(instancias) != len(set(ids)):
+            return http_400_bad_request('Por favor, verifica que todos los elementos tengan un id existente')
+        antes = self.afectados(instancias.values())
+        campos = set()
+        for elemento in request.data:
+            serializer = self.get_serializer(instancias[elemento['id']], data = elemento, partial = True)
+            serializer.is_valid(raise_exception = True)
+            for campo, valor in serializer.validated_data.items():
+                setattr(instancias[elemento['id']], campo, valor)
+                campos.add(campo)
+        with transaction.atomic(), contadores.suspendido():
+            if campos:
+                modelo.objects.bulk_update(instancias.values(), list(campos))
+            self.recalcular(antes | self.afectados(instancias.values()))
+        return response.Response({
+            'estado': 200,
+            'validar': True,
+            'mensaje': '¡Información actualizada exitosamente!',
+            'dato': {'ids': list(instancias)}
+        }, status = status.HTTP_200_OK)
+
+    @decorators.action(detail = False, methods = ['post'], url_path = 'bulk/state', permission_classes = [autenticacion.EsAdministrador])
+    def masivoEstado(self, request):
+        ids = request.data.get('ids') if isinstance(request.data, dict) else None
+        estado = request.data.get('estado') if isinstance(request.data, dict) else None
+        if not isinstance(ids, list) or not self.sonIds(ids) or not isinstance(estado, bool):
+            return http_400_bad_request('Por favor, envía la lista de ids y el estado (true o false)')
+        filas = self.get_queryset().model.objects.filter(id__in = ids)
+        with transaction.atomic(), contadores.suspendido():
+            afectados = self.afectados(filas)
+            actualizados = filas.update(estado = estado)
+            self.recalcular(afectados)
+        return response.Response({
+            'estado': 200,
+            'validar': True,
+            'mensaje': '¡Información actualizada exitosamente!',
+            'dato': {'actualizados': actualizados}
+        }, status = status.HTTP_200_OK)
+
 class UsuarioView(viewsets.ModelViewSet):
     queryset = Usuario.objects.all()
     serializer_class = UsuarioSerializerAdmin
     permission_classes = [permissions.IsAuthenticated]
+    filtros = ['estado', 'administrador']
 
     def update(self, request, *args, **kwargs):
         instance = self.get_object()
@@ -904,6 +1031,7 @@ class LenguajeView(viewsets.ModelViewSet):
     queryset = Lenguaje.objects.all()
     serializer_class = LenguajeSerializerAdmin
     permission_classes = [permissions.IsAuthenticated]
+    filtros = ['estado']
 
     def update(self, request, *args, **kwargs):
         instance = self.get_object()
@@ -917,20 +1045,43 @@ class LenguajeView(viewsets.ModelViewSet):
             'dato': serializer.data
         }, status = status.HTTP_200_OK)
 
-class NivelView(viewsets.ModelViewSet):
-    queryset = Nivel.objects.all()
+class NivelView(OperacionesMasivas, viewsets.ModelViewSet):
+    queryset = Nivel.objects.select_related('lenguaje')
     serializer_class = NivelSerializerAdmin
     permission_classes = [permissions.IsAuthenticated]
+    filtros = ['estado', 'lenguaje']
+
+    def afectados(self, instancias):
+        return {instancia.lenguaje_id for instancia in instancias}
 
-class PreguntaView(viewsets.ModelViewSet):
-    queryset = Pregunta.objects.all()
+    def recalcular(self, afectados):
+        # bulk_create y update no emiten post_save, así que los contadores y el catálogo se actualizan aquí
+        contadores.recontarLenguajes(afectados)
+        transaction.on_commit(catalogo.invalidar)
+
+class PreguntaView(OperacionesMasivas, viewsets.ModelViewSet):
+    queryset = Pregunta.objects.select_related('nivel')
     serializer_class = PreguntaSerializerAdmin
     permission_classes = [permissions.IsAuthenticated]
+    filtros = ['estado', 'nivel']
+
+    def afectados(self, instancias):
+        return {instancia.nivel_id for instancia in instancias}
+
+    def recalcular(self, afectados):
+        contadores.recontarNiveles(afectados)
 
 class ProgresoView(viewsets.ModelViewSet):
-    queryset = Progreso.objects.all()
+    queryset = Progreso.objects.select_related('usuario', 'lenguaje')
     serializer_class = ProgresoSerializerAdmin
     permission_classes = [permissions.IsAuthenticated]
+    filtros = ['usuario', 'lenguaje']
+
+class NivelCompletadoView(viewsets.ModelViewSet):
+    queryset = NivelCompletado.objects.select_related('usuario', 'nivel')
+    serializer_class = NivelCompletadoSerializerAdmin
+    permission_classes = [permissions.IsAuthenticated]
+    filtros = ['usuario', 'nivel']
 
 class FotoView(viewsets.ModelViewSet):
     queryset = FotoPredeterminada.objects.all()
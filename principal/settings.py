@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/5.0/ref/settings/
 """
 
 from pathlib import Path
+from corsheaders.defaults import default_headers
 from datetime import timedelta
 import os, secrets
 
@@ -47,6 +48,8 @@ INSTALLED_APPS = [
 AUTH_USER_MODEL = 'api.Usuario'
 
 MIDDLEWARE = [
+    'api.instrumentacion.MiddlewareSQL',
+    'api.perfilado.MiddlewarePerfil',
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.common.CommonMiddleware",
     'django.middleware.security.SecurityMiddleware',
@@ -56,14 +59,26 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'api.enrutador.MiddlewareReplica',
 ]
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
-    )
+        'rest_framework_simplejwt.authentication.JWTStatelessUserAuthentication',
+    ),
+    'DEFAULT_PAGINATION_CLASS': 'api.paginacion.PaginacionCursor',
+    'DEFAULT_FILTER_BACKENDS': (
+        'api.paginacion.FiltroCampos',
+    ),
+    'EXCEPTION_HANDLER': 'api.limites.manejarExcepcion',
+    # Proxies de confianza delante de la aplicación (0 si se expone directamente). Sin este valor DRF
+    # usaría X-Forwarded-For completo, que envía el cliente, como clave de PorIp
+    'NUM_PROXIES': int(os.environ.get('NUM_PROXIES', 0)),
 }
 
+# El acceso se valida solo con los claims del token, sin consultar Usuario: desactivar una cuenta o
+# quitarle el rol de administrador tarda hasta ACCESS_TOKEN_LIFETIME en aplicarse. El refresco sí
+# consulta la fila (api.autenticacion.RefrescoSerializer).
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes = 10),
     "REFRESH_TOKEN_LIFETIME": timedelta(days = 1),
@@ -82,12 +97,12 @@ SIMPLE_JWT = {
 
     "AUTH_TOKEN_CLASSES": ("rest_framework_simplejwt.tokens.AccessToken",),
     "TOKEN_TYPE_CLAIM": "token_type",
-    "TOKEN_USER_CLASS": "rest_framework_simplejwt.models.TokenUser",
+    "TOKEN_USER_CLASS": "api.autenticacion.UsuarioToken",
 
     "JTI_CLAIM": "jti",
 
     "TOKEN_OBTAIN_SERIALIZER": "rest_framework_simplejwt.serializers.TokenObtainPairSerializer",
-    "TOKEN_REFRESH_SERIALIZER": "rest_framework_simplejwt.serializers.TokenRefreshSerializer",
+    "TOKEN_REFRESH_SERIALIZER": "api.autenticacion.RefrescoSerializer",
     "TOKEN_VERIFY_SERIALIZER": "rest_framework_simplejwt.serializers.TokenVerifySerializer",
     "TOKEN_BLACKLIST_SERIALIZER": "rest_framework_simplejwt.serializers.TokenBlacklistSerializer",
 }
@@ -118,15 +133,124 @@ CORS_ALLOW_CREDENTIALS = True
 
 CORS_ALLOWED_ORIGINS = ['http://77.37.63.223']
 
+CORS_ALLOW_HEADERS = (*default_headers, 'idempotency-key', 'x-perfil')
+
+CORS_EXPOSE_HEADERS = ['X-Perfil', 'Idempotency-Key-Replayed']
+
 # Database
 # https://docs.djangoproject.com/en/5.0/ref/settings/#databases
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Segundos que un proceso de trabajo conserva su conexión entre solicitudes
+        'CONN_MAX_AGE': int(os.environ.get('CONN_MAX_AGE', 600)),
+        'CONN_HEALTH_CHECKS': True,
+    }
+}
+
+# Réplica de solo lectura para las consultas GET de REPLICA_RUTAS (api/enrutador.py). En local
+# puede ser otro archivo SQLite que sincronizarReplica copia desde la primaria.
+if os.environ.get('DB_REPLICA'):
+    DATABASES['replica'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.environ['DB_REPLICA'],
+        'CONN_MAX_AGE': DATABASES['default']['CONN_MAX_AGE'],
+        'CONN_HEALTH_CHECKS': True,
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['api.enrutador.EnrutadorReplica']
+
+# /api/v01/start/ no se incluye: el catálogo se guarda en caché sin expiración y se arma desde la primaria
+REPLICA_RUTAS = (
+    '/api/v01/ranking/',
+    '/api/v01/profile/',
+    '/api/v01/questions/',
+)
+
+# Consultas que tardan al menos este tiempo se escriben con su vista en SQL_LENTAS_ARCHIVO
+SQL_UMBRAL_LENTO_MS = float(os.environ.get('SQL_UMBRAL_LENTO_MS', 100))
+SQL_LENTAS_ARCHIVO = os.environ.get('SQL_LENTAS_ARCHIVO', str(BASE_DIR / 'consultas_lentas.log'))
+
+# Perfiles de cProfile pedidos por administradores con la cabecera X-Perfil o ?perfil=1
+PERFILES_DIR = os.environ.get('PERFILES_DIR', str(BASE_DIR / 'perfiles'))
+PERFILES_MAXIMO = 200
+# Muestreo de pilas para el flamegraph. El intervalo de cambio de hilo (sys.getswitchinterval, 5 ms)
+# es global al proceso y no se modifica, así que intervalos menores no dan más muestras
+PERFILES_INTERVALO_MS = 5
+
+# Métricas de /api/v01/metrics/. Con varios procesos (workers de principal.wsgi y enviarCorreos)
+# cada uno vuelca sus totales en METRICAS_DIR cada METRICAS_INTERVALO segundos; la carpeta se
+# vacía al desplegar y recolectar borra los archivos sin volcar en METRICAS_RETENCION segundos,
+# que dejan de sumarse. METRICAS_TOKEN exige Authorization: Bearer <token> al recolector; sin él
+# /metrics responde 403 a todos.
+METRICAS_DIR = os.environ.get('METRICAS_DIR') or None
+METRICAS_INTERVALO = float(os.environ.get('METRICAS_INTERVALO', 10))
+METRICAS_RETENCION = float(os.environ.get('METRICAS_RETENCION', 60 * 60 * 24))
+METRICAS_TOKEN = os.environ.get('METRICAS_TOKEN', '')
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'sql': {'format': '%(asctime)s %(message)s'},
+    },
+    'handlers': {
+        'consultasLentas': {
+            'class': 'logging.handlers.RotatingFileHandler',
+            'filename': SQL_LENTAS_ARCHIVO,
+            'maxBytes': 5 * 1024 * 1024,
+            'backupCount': 5,
+            'delay': True,
+            'formatter': 'sql',
+        },
+    },
+    'loggers': {
+        'api.sql': {'handlers': ['consultasLentas'], 'level': 'WARNING', 'propagate': False},
+    },
+}
+
+# Pragmas aplicados a cada conexión SQLite nueva (api/sqlite.py). Con WAL los lectores
+# no bloquean al escritor y synchronous = NORMAL solo sincroniza en los checkpoints.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT', 5000)),
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64000,
+}
+
+# Caché usada para el catálogo de lenguajes (/v01/start/). Con varios procesos de
+# trabajo debe apuntar a un backend compartido (Redis, Memcached o base de datos)
+# para que la invalidación por señales llegue a todos los procesos.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Cubetas de los límites de solicitudes. Con un solo proceso basta locmem; con varios workers
+    # se usa un backend compartido, por ejemplo LIMITES_CACHE_BACKEND=django.core.cache.backends.filebased.FileBasedCache
+    # con LIMITES_CACHE_UBICACION=/var/tmp/saddwy_limites, o DatabaseCache tras createcachetable
+    'limites': {
+        'BACKEND': os.environ.get('LIMITES_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('LIMITES_CACHE_UBICACION', 'limites'),
     }
 }
 
+# Cubetas de fichas de login, register, recoveryEmail y recoverAccount, por IP y por correo
+# (en recoverAccount, por la cuenta del token). Cada tasa es la ráfaga máxima y el tiempo en que se recupera.
+LIMITES_CACHE = 'limites'
+LIMITES = {
+    'login.ip': '30/min',
+    'login.correo': '10/min',
+    'register.ip': '10/min',
+    'register.correo': '5/hour',
+    'recoveryEmail.ip': '10/min',
+    'recoveryEmail.correo': '5/hour',
+    'recoverAccount.ip': '10/min',
+    'recoverAccount.correo': '10/hour',
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 AUTH_PASSWORD_VALIDATORS = [
@@ -162,6 +286,21 @@ MEDIA_URL = 'imagenes/'
 
 MEDIA_ROOT = os.path.join(BASE_DIR, 'static')
 
+# Los archivos subidos se nombran por el hash de su contenido; los que quedan sin
+# referencia se eliminan con el comando limpiarMedios
+STORAGES = {
+    'default': {
+        'BACKEND': 'api.almacenamiento.AlmacenamientoContenido',
+    },
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+}
+
+# Origen usado para construir las URL absolutas de fotos y logos en las respuestas (por ejemplo
+# https://api.saddwy.com). Por defecto es el único host admitido, el mismo origen que daba la petición
+MEDIA_HOST = os.environ.get('MEDIA_HOST', f'http://{ALLOWED_HOSTS[0]}')
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.0/ref/settings/#default-auto-field
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
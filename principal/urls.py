@@ -14,11 +14,12 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
-from django.conf.urls.static import static
+from api import medios
 from django.conf import settings
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, re_path, include
 
 urlpatterns = [
-    path('api/', include('api.urls'))
-] + static(settings.MEDIA_URL, document_root = settings.MEDIA_ROOT)
\ No newline at end of file
+    path('api/', include('api.urls')),
+    re_path(rf"^{settings.MEDIA_URL.strip('/')}/(?P<ruta>.+)$", medios.servir)
+]
\ No newline at end of file